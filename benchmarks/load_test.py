@@ -0,0 +1,451 @@
+"""
+Load test for the MCP server against a stubbed USA Spending API.
+
+The starlette_app is run in-process through httpx.ASGITransport and the USA Spending API
+is replaced with an httpx.MockTransport, so no network access is needed.
+The refresh of an outdated toptier_agencies.json on import is answered from the file itself.
+Concurrent MCP tools/call requests are sent for every tool and the throughput and
+p50/p95/p99 latency are reported per tool.
+The cached responses are cleared before every request so reference data tools are measured
+against the stubbed API as well, pass --warm-cache to measure cache hits instead.
+
+Run from the root of the repository:
+    uv run benchmarks/load_test.py
+    uv run benchmarks/load_test.py --save-baseline benchmarks/baseline.json
+    uv run benchmarks/load_test.py --compare benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from unittest import mock
+
+import httpx
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "src"))
+
+import utils.http  # noqa: E402
+from tools.v2.references.total_budgetary_resources.total_budgetary_resources import (  # noqa: E402
+    budgetary_resources_history,
+)
+from utils.cache import negative_cache, response_cache  # noqa: E402
+from utils.timeseries import timeseries_store  # noqa: E402
+
+# Arguments used for each tool, keep these in sync with the tools registered in server.py
+tool_calls = {
+    "aggregate_awards": {
+        "filters": {"award_type_codes": ["A", "B", "C", "D"]},
+        "group_by": ["Recipient Name"],
+        "top_k": 3,
+        "max_pages": 3,
+    },
+    "federal_accounts": {"limit": 50},
+    "list_budget_functions": {},
+    "major_object_class": {"fiscal_year": 2024, "funding_agency_id": 456},
+    "major_object_class_matrix": {
+        "fiscal_years": [2022, 2023, 2024],
+        "funding_agency_ids": [456, 862],
+    },
+    "recipient": {"limit": 100, "keyword": "acme"},
+    # Served from the recipient index once recipient has run, from the API before that
+    "recipient_autocomplete": {"name": "acme", "limit": 10},
+    "spending": {"type": "agency", "filters": {"fy": "2024", "quarter": "4"}},
+    "spending_by_award": {
+        "filters": {"award_type_codes": ["A", "B", "C", "D"]},
+        "fields": ["Award ID", "Recipient Name", "Award Amount", "Description"],
+        "limit": 100,
+    },
+    "spending_over_time": {
+        "group": "fiscal_year",
+        "filters": {"time_period": [{"start_date": "2008-10-01", "end_date": "2024-09-30"}]},
+    },
+    "subawards": {"page": 1, "limit": 100, "sort": "amount", "order": "desc"},
+    "toptier_agencies": {"keyword": "department", "limit": 10},
+    "total_budgetary_resources": {"fiscal_year": 2024},
+}
+
+
+def award_rows(count, page=1):
+    return [
+        {
+            "internal_id": page * 1000 + i,
+            "Award ID": f"AWARD-{page}-{i}",
+            "Recipient Name": f"RECIPIENT {i % 7}",
+            "Award Amount": 1000.0 * (i + 1),
+            "Description": "PROFESSIONAL SERVICES " * 4,
+            "generated_internal_id": f"CONT_AWD_{page}_{i}",
+        }
+        for i in range(count)
+    ]
+
+
+# Canned USA Spending API responses, sized like a typical response
+def stub_response(request: httpx.Request):
+    path = request.url.path
+    payload = json.loads(request.content) if request.content else {}
+    limit = int(payload.get("limit", 10))
+    page = int(payload.get("page", 1))
+
+    if path == "/api/v2/search/spending_by_award/":
+        return {
+            "spending_level": "awards",
+            "limit": limit,
+            "results": award_rows(limit, page),
+            "page_metadata": {"page": page, "hasNext": page < 3},
+            "messages": ["For searches, time period start and end dates are currently limited"],
+        }
+    if path == "/api/v2/recipient/":
+        return {
+            "page_metadata": {"page": page, "limit": limit, "total": 10 * limit},
+            "results": [
+                {
+                    "id": f"{i}-R",
+                    "name": f"ACME {i}",
+                    "duns": None,
+                    "uei": f"UEI{i:09d}",
+                    "amount": 1000.0 * i,
+                    "recipient_level": "R",
+                }
+                for i in range(limit)
+            ],
+        }
+    if path == "/api/v2/subawards/":
+        return {
+            "page_metadata": {
+                "page": page,
+                "next": page + 1,
+                "previous": None,
+                "hasNext": True,
+                "hasPrevious": False,
+            },
+            "results": [
+                {
+                    "id": i,
+                    "subaward_number": f"SUB-{i}",
+                    "description": "ENGINEERING SUPPORT",
+                    "action_date": "2024-01-01",
+                    "amount": 100.0 * i,
+                    "recipient_name": f"SUBCONTRACTOR {i}",
+                }
+                for i in range(limit)
+            ],
+        }
+    if path == "/api/v2/federal_accounts/":
+        return {
+            "count": 2000,
+            "limit": limit,
+            "page": page,
+            "next": page + 1,
+            "previous": None,
+            "hasNext": True,
+            "hasPrevious": False,
+            "fy": "2024",
+            "results": [
+                {
+                    "account_name": f"Operations and Support {i}",
+                    "account_number": f"070-{i:04d}",
+                    "account_id": i,
+                    "managing_agency_acronym": "DHS",
+                    "agency_identifier": "070",
+                    "budgetary_resources": 1e9 / (i + 1),
+                    "managing_agency": "Department of Homeland Security",
+                }
+                for i in range(limit)
+            ],
+        }
+    if path == "/api/v2/search/spending_over_time/":
+        return {
+            "group": payload.get("group"),
+            "results": [
+                {"aggregated_amount": 1e9 + year, "time_period": {"fiscal_year": str(year)}}
+                for year in range(2009, 2025)
+            ],
+            "messages": [],
+        }
+    if path == "/api/v2/budget_functions/list_budget_functions/":
+        return {
+            "results": [
+                {"budget_function_code": f"{i:03d}", "budget_function_title": f"Function {i}"}
+                for i in range(20)
+            ]
+        }
+    if path == "/api/v2/financial_spending/major_object_class/":
+        return {
+            "results": [
+                {
+                    "major_object_class_code": f"{i}0",
+                    "major_object_class_name": f"Object class {i}",
+                    "obligated_amount": 1e6 * i,
+                }
+                for i in range(10)
+            ]
+        }
+    if path == "/api/v2/references/total_budgetary_resources/":
+        return {
+            "results": [
+                {
+                    "fiscal_year": 2024,
+                    "fiscal_period": period,
+                    "total_budgetary_resources": 1e12 + period,
+                }
+                for period in range(3, 13)
+            ],
+            "messages": [],
+        }
+    if path == "/api/v2/spending/":
+        return {
+            "total": 1e12,
+            "end_date": "2024-09-30",
+            "results": [
+                {
+                    "amount": 1e9 * i,
+                    "id": i,
+                    "type": payload.get("type"),
+                    "name": f"Agency {i}",
+                    "code": f"{i:03d}",
+                    "total": 1e9 * i,
+                }
+                for i in range(100)
+            ],
+        }
+    if path == "/api/v2/references/toptier_agencies/":
+        return {"results": []}
+    return None
+
+
+def import_server():
+    """
+    Imports the server without calling the USA Spending API.
+    Importing the tools refreshes an outdated toptier_agencies.json with a blocking request,
+    so that request is answered with the contents of the file.
+    """
+
+    def get(url, **kwargs):
+        with open(os.path.join(root, "src", "resources", "toptier_agencies.json"), "rb") as f:
+            return httpx.Response(200, content=b'{"results": ' + f.read() + b"}")
+
+    # The tools print whether toptier_agencies.json is out of date, keep that out of the report
+    with mock.patch("httpx.get", get), contextlib.redirect_stdout(io.StringIO()):
+        import server
+    return server
+
+
+def clear_caches():
+    # The recipient index is kept, recipient_autocomplete is meant to be served from it
+    response_cache.clear()
+    negative_cache.clear()
+    timeseries_store.clear()
+    budgetary_resources_history.clear()
+
+
+def create_upstream(latency):
+    async def handler(request: httpx.Request):
+        if latency > 0:
+            await asyncio.sleep(latency)
+        body = stub_response(request)
+        if body is None:
+            return httpx.Response(404, json={"detail": "Not found"})
+        return httpx.Response(200, json=body)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def percentile(samples, percent):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    index = min(len(samples) - 1, max(0, round(percent / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def summarize(latencies, errors, elapsed):
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": round(requests / elapsed, 2) if elapsed > 0 else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+    }
+
+
+async def call_tool(mcp_client, request_id, name, arguments):
+    """Sends one tools/call request, returns the latency and if the call succeeded."""
+    body = {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": arguments},
+    }
+    start = time.perf_counter()
+    response = await mcp_client.post(
+        "/mcp/",
+        json=body,
+        headers={"Accept": "application/json, text/event-stream"},
+    )
+    latency = time.perf_counter() - start
+
+    if response.status_code != 200:
+        return latency, False
+    # The response is a server sent event, the JSON-RPC message is on the data line
+    for line in response.text.splitlines():
+        if line.startswith("data:"):
+            message = json.loads(line[len("data:") :])
+            result = message.get("result")
+            return latency, result is not None and not result.get("isError", False)
+    return latency, False
+
+
+async def run_tool(mcp_client, name, arguments, requests, concurrency, warm_cache):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for request_id in range(requests):
+        queue.put_nowait(request_id)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            request_id = queue.get_nowait()
+            if not warm_cache:
+                clear_caches()
+            latency, success = await call_tool(mcp_client, request_id, name, arguments)
+            if success:
+                latencies.append(latency)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run(tools, requests, concurrency, latency, warm_cache):
+    server = import_server()
+    utils.http.client = create_upstream(latency)
+    results = {}
+    # The tools print every response, keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with server.session_manager.run():
+            transport = httpx.ASGITransport(app=server.starlette_app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as c:
+                for name in tools:
+                    results[name] = await run_tool(
+                        c, name, tool_calls[name], requests, concurrency, warm_cache
+                    )
+    return results
+
+
+def print_report(results, baseline=None):
+    header = f"{'tool':<28}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    if baseline is not None:
+        header += f"{'p95 vs base':>14}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<28}{result['throughput']:>10}{result['p50_ms']!s:>10}"
+            f"{result['p95_ms']!s:>10}{result['p99_ms']!s:>10}{result['errors']:>8}"
+        )
+        if baseline is not None:
+            change = get_change(result, baseline.get("results", {}).get(name))
+            line += f"{'n/a' if change is None else f'{change:+.1%}':>14}"
+        print(line)
+
+
+def get_change(result, baseline_result, metric="p95_ms"):
+    if not baseline_result or not baseline_result.get(metric) or result.get(metric) is None:
+        return None
+    return result[metric] / baseline_result[metric] - 1
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        change = get_change(result, baseline.get("results", {}).get(name))
+        if change is not None and change > threshold:
+            regressions.append(f"{name} p95 latency is {change:+.1%} compared to the baseline")
+        if result["errors"] > 0:
+            regressions.append(f"{name} had {result['errors']} errors")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per tool.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent requests.")
+    parser.add_argument(
+        "--upstream-latency-ms",
+        type=float,
+        default=0,
+        help="Simulated latency of the USA Spending API.",
+    )
+    parser.add_argument(
+        "--warm-cache",
+        action="store_true",
+        help="Keep cached responses between requests so repeated calls measure cache hits.",
+    )
+    parser.add_argument("--tools", nargs="*", default=list(tool_calls), choices=list(tool_calls))
+    parser.add_argument("--save-baseline", help="Write the results to this file.")
+    parser.add_argument("--compare", help="Compare the results to this baseline file.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fail when p95 latency is this much higher than the baseline, 0.2 is 20%%.",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run(
+            args.tools,
+            args.requests,
+            args.concurrency,
+            args.upstream_latency_ms / 1000,
+            args.warm_cache,
+        )
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("warm_cache", False) != args.warm_cache:
+            print("WARNING: The baseline was recorded with a different --warm-cache setting")
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(
+                {
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "upstream_latency_ms": args.upstream_latency_ms,
+                    "warm_cache": args.warm_cache,
+                    "python": sys.version.split()[0],
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
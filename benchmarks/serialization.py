@@ -0,0 +1,130 @@
+"""
+Benchmarks the JSON serialization backends in utils/serialization.py.
+
+dumps and loads are timed with the json module and with orjson, when it is installed,
+on payloads shaped like the ones the server handles: a page of spending_by_award results,
+the toptier_agencies.json dataset, and a large columnar reshape.
+
+Run from the root of the repository:
+    uv run benchmarks/serialization.py
+    uv run benchmarks/serialization.py --repeat 50 --output serialization.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "src"))
+
+import utils.serialization  # noqa: E402
+from utils.reshape import reshape  # noqa: E402
+
+
+def award_rows(count):
+    return [
+        {
+            "internal_id": i,
+            "Award ID": f"AWARD-{i}",
+            "Recipient Name": f"RECIPIENT {i % 97}",
+            "Award Amount": 1000.25 * (i + 1),
+            "Start Date": "2024-01-01",
+            "Description": "PROFESSIONAL SERVICES " * 4,
+            "generated_internal_id": f"CONT_AWD_{i}",
+            "Place of Performance State Code": None,
+        }
+        for i in range(count)
+    ]
+
+
+def get_payloads():
+    with open(os.path.join(root, "src/resources/toptier_agencies.json")) as f:
+        toptier_agencies = json.load(f)
+    big_page = {"results": award_rows(10_000), "page_metadata": {"page": 1, "hasNext": True}}
+    return {
+        "spending_by_award page": {"results": award_rows(100), "page_metadata": {"page": 1}},
+        "toptier_agencies.json": {"results": toptier_agencies},
+        "10k awards": big_page,
+        # reshape replaces the results in place, so reshape a copy
+        "10k awards columnar": reshape(dict(big_page), output_format="columnar"),
+    }
+
+
+def time_function(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def run(repeat):
+    backends = ["json"]
+    if utils.serialization.orjson is not None:
+        backends.append("orjson")
+
+    results = []
+    for name, payload in get_payloads().items():
+        text = json.dumps(payload, separators=(",", ":"))
+        data = text.encode()
+        result = {"payload": name, "bytes": len(data)}
+        for backend in backends:
+            orjson = utils.serialization.orjson if backend == "orjson" else None
+            with patch("utils.serialization.orjson", orjson):
+                result[f"{backend}_dumps_us"] = round(
+                    time_function(
+                        lambda payload=payload: utils.serialization.dumps(payload), repeat
+                    ),
+                    2,
+                )
+                result[f"{backend}_loads_us"] = round(
+                    time_function(lambda data=data: utils.serialization.loads(data), repeat), 2
+                )
+        results.append(result)
+    return results
+
+
+def print_report(results):
+    has_orjson = "orjson_dumps_us" in results[0]
+    header = f"{'payload':<24}{'bytes':>12}{'json dumps':>14}{'json loads':>14}"
+    if has_orjson:
+        header += f"{'orjson dumps':>14}{'orjson loads':>14}{'speedup':>16}"
+    print(header)
+    for result in results:
+        line = (
+            f"{result['payload']:<24}{result['bytes']:>12}"
+            f"{result['json_dumps_us']:>14}{result['json_loads_us']:>14}"
+        )
+        if has_orjson:
+            dumps_speedup = result["json_dumps_us"] / result["orjson_dumps_us"]
+            loads_speedup = result["json_loads_us"] / result["orjson_loads_us"]
+            speedup = f"{dumps_speedup:.1f}x / {loads_speedup:.1f}x"
+            line += f"{result['orjson_dumps_us']:>14}{result['orjson_loads_us']:>14}{speedup:>16}"
+        print(line)
+    if not has_orjson:
+        print("orjson is not installed, only the json module was timed.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20, help="Timings taken per benchmark.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
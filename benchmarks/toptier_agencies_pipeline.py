@@ -0,0 +1,200 @@
+"""
+Microbenchmarks for the custom toptier_agencies pipeline.
+
+filter_by_keyword, sort_results, get_pagination and create_mcp_response run on every
+toptier_agencies tool call. These are timed on the real toptier_agencies.json and on
+synthetic datasets 10x to 1000x larger, with keyword, sort and page size variations.
+
+Run from the root of the repository:
+    uv run benchmarks/toptier_agencies_pipeline.py
+    uv run benchmarks/toptier_agencies_pipeline.py --scales 1 10 --output pipeline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "src"))
+
+from tools.v2.references.toptier_agencies.toptier_agencies_custom import (  # noqa: E402
+    create_mcp_response,
+    filter_by_keyword,
+    get_pagination,
+    read_cached_file,
+    sort_results,
+)
+from tools.v2.references.toptier_agencies.toptier_agencies_schemas import (  # noqa: E402
+    custom_pagination_output_schema,
+    original_output_schema,
+)
+from utils.http import HttpClient  # noqa: E402
+
+keywords = [None, "department", "a", "no-agency-matches-this"]
+sorts = [
+    ("percentage_of_total_budget_authority", "desc"),
+    ("agency_name", "asc"),
+]
+limits = [5, 50, 500]
+
+
+def load_agencies():
+    agencies, use_cached_file = read_cached_file(
+        os.path.join(root, "src/resources/toptier_agencies.json")
+    )
+    if not use_cached_file:
+        raise SystemExit("Unable to read src/resources/toptier_agencies.json")
+    return agencies
+
+
+# Copies of the real agencies with unique names and amounts so sorting is not trivial
+def scale_agencies(agencies, scale):
+    if scale == 1:
+        return agencies
+    scaled = []
+    for copy in range(scale):
+        for agency in agencies:
+            agency = dict(agency)
+            agency["agency_id"] = agency["agency_id"] + copy * 10_000
+            agency["agency_name"] = f"{agency['agency_name']} {copy}"
+            agency["percentage_of_total_budget_authority"] = (
+                agency["percentage_of_total_budget_authority"] * (copy + 1) % 1
+            )
+            scaled.append(agency)
+    return scaled
+
+
+def get_client():
+    output_schema = json.loads(json.dumps(original_output_schema))
+    output_schema["properties"].update(custom_pagination_output_schema)
+    return HttpClient(endpoint="", method="GET", output_schema=output_schema)
+
+
+def time_function(function, repeat, number=1):
+    """Returns the timings in microseconds of each repeat, like timeit.repeat."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number * 1e6)
+    return timings
+
+
+def benchmark(name, parameters, function, repeat):
+    timings = time_function(function, repeat)
+    return {
+        "name": name,
+        **parameters,
+        "min_us": round(min(timings), 2),
+        "median_us": round(statistics.median(timings), 2),
+        "max_us": round(max(timings), 2),
+    }
+
+
+def run_dataset(dataset, client, repeat):
+    size = len(dataset)
+    results = []
+    for keyword in keywords:
+        results.append(
+            benchmark(
+                "filter_by_keyword",
+                {"rows": size, "keyword": keyword},
+                lambda keyword=keyword: filter_by_keyword(dataset, keyword),
+                repeat,
+            )
+        )
+
+    for sort, order in sorts:
+        # sort_results sorts in place, so sort a fresh copy each time like the tool does
+        results.append(
+            benchmark(
+                "sort_results",
+                {"rows": size, "sort": sort, "order": order},
+                lambda sort=sort, order=order: sort_results(list(dataset), sort, order),
+                repeat,
+            )
+        )
+
+    for limit in limits:
+        results.append(
+            benchmark(
+                "get_pagination",
+                {"rows": size, "limit": limit},
+                lambda limit=limit: get_pagination(dataset, limit, 1),
+                repeat,
+            )
+        )
+        paginated_results, page_metadata = get_pagination(dataset, limit, 1)
+        results.append(
+            benchmark(
+                "create_mcp_response",
+                {"rows": size, "limit": limit},
+                lambda paginated_results=paginated_results,
+                page_metadata=page_metadata: create_mcp_response(
+                    paginated_results, page_metadata, client
+                ),
+                repeat,
+            )
+        )
+
+    # The whole tool call with the default arguments
+    def pipeline():
+        results = filter_by_keyword(dataset, "department")
+        sort_results(results)
+        paginated_results, page_metadata = get_pagination(results, 5, 1)
+        return create_mcp_response(paginated_results, page_metadata, client)
+
+    results.append(benchmark("pipeline", {"rows": size, "keyword": "department"}, pipeline, repeat))
+    return results
+
+
+def run(scales, repeat):
+    agencies = load_agencies()
+    client = get_client()
+    results = []
+    for scale in scales:
+        results += run_dataset(scale_agencies(agencies, scale), client, repeat)
+    return results
+
+
+def print_report(results):
+    print(f"{'benchmark':<22}{'rows':>8}  {'parameters':<56}{'min us':>12}{'median us':>12}")
+    for result in results:
+        parameters = ", ".join(
+            f"{key}={value}"
+            for key, value in result.items()
+            if key not in ["name", "rows", "min_us", "median_us", "max_us"]
+        )
+        print(
+            f"{result['name']:<22}{result['rows']:>8}  {parameters:<56}"
+            f"{result['min_us']:>12}{result['median_us']:>12}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="*", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20, help="Timings taken per benchmark.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    # The pipeline prints validation warnings, keep those out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run(args.scales, args.repeat)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,32 @@
+import os
+import sys
+
+from utils.startup_profile import is_requested, startup_profiler
+
+# Enabled before the imports below so their import time is part of the startup profile
+if is_requested():
+    startup_profiler.enable()
+
 import contextlib
 import logging
-import os
 from collections.abc import AsyncIterator
+from contextvars import ContextVar
 from typing import Any
 
+import anyio
 import mcp.types as types
 import uvicorn
 from dotenv import load_dotenv
 from mcp.server.lowlevel import Server
 from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from mcp.shared.exceptions import McpError
 from pydantic import AnyUrl
 from starlette.applications import Starlette
 from starlette.middleware.cors import CORSMiddleware
-from starlette.routing import Mount
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
 from starlette.types import Receive, Scope, Send
 
 # Import prompts
@@ -45,10 +58,13 @@ from resources.toptier_agencies import (
 # Import tools
 from tools.config import (
     # Tool handlers
+    call_tool_aggregate_awards,
     call_tool_federal_accounts,
     call_tool_list_budget_functions,
     call_tool_major_object_class,
+    call_tool_major_object_class_matrix,
     call_tool_recipient,
+    call_tool_recipient_autocomplete,
     call_tool_spending,
     call_tool_spending_by_award,
     call_tool_spending_over_time,
@@ -56,10 +72,13 @@ from tools.config import (
     call_tool_toptier_agencies,
     call_tool_total_budgetary_resources,
     # Tool definitions
+    tool_aggregate_awards,
     tool_federal_accounts,
     tool_list_budget_functions,
     tool_major_object_class,
+    tool_major_object_class_matrix,
     tool_recipient,
+    tool_recipient_autocomplete,
     tool_spending,
     tool_spending_by_award,
     tool_spending_over_time,
@@ -67,11 +86,66 @@ from tools.config import (
     tool_toptier_agencies,
     tool_total_budgetary_resources,
 )
+from utils.loop_monitor import loop_monitor
+from utils.offload import shutdown_executor
+from utils.snapshot import (
+    CACHE_SNAPSHOT,
+    close_replay_logs,
+    load_snapshot,
+    record_call,
+    write_snapshot,
+)
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 HOST = os.getenv("MCP_SERVER_HOST", "127.0.0.1")
 PORT = int(os.getenv("MCP_SERVER_PORT", "8000"))
+# Seconds a tool call may run before it is cancelled, 0 for no deadline
+TOOL_TIMEOUT = float(os.getenv("MCP_TOOL_TIMEOUT", "300"))
+
+
+def parse_tool_timeouts(value: str) -> dict[str, float]:
+    """
+    Parses MCP_TOOL_TIMEOUTS, such as aggregate_awards=1800,subawards=600.
+    Malformed entries are skipped with a warning so a typo does not keep the server from starting.
+    """
+    timeouts = {}
+    for item in value.split(","):
+        if item.strip() == "":
+            continue
+        name, separator, seconds = item.partition("=")
+        try:
+            if separator == "" or name.strip() == "":
+                raise ValueError("expected name=seconds")
+            timeouts[name.strip()] = float(seconds)
+        except ValueError as e:
+            logger.warning(f"Skipping the MCP_TOOL_TIMEOUTS entry {item!r} due to {e=}")
+    return timeouts
+
+
+# Tools that send more than one request to the USA Spending API need longer
+aggregating_tools = [
+    "aggregate_awards",
+    "major_object_class_matrix",
+    "spending",
+    "spending_over_time",
+    "subawards",
+]
+tool_timeouts = {
+    **{name: 3 * TOOL_TIMEOUT for name in aggregating_tools},
+    **parse_tool_timeouts(os.getenv("MCP_TOOL_TIMEOUTS", "")),
+}
+
+
+def get_tool_timeout(name: str) -> float | None:
+    timeout = tool_timeouts.get(name, TOOL_TIMEOUT)
+    return timeout if timeout > 0 else None
+
+
+# The cancel scopes of the tool calls made during the current HTTP request
+request_cancel_scopes: ContextVar[set[anyio.CancelScope] | None] = ContextVar(
+    "request_cancel_scopes", default=None
+)
 
 
 # Configure logging
@@ -79,11 +153,70 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 
+
+def is_closed_stream_error(error: BaseException | None) -> bool:
+    # An exception group from the task group of the session, checked by shape for Python 3.10
+    inner_errors = getattr(error, "exceptions", None)
+    if isinstance(inner_errors, tuple) and len(inner_errors) > 0:
+        return all(is_closed_stream_error(inner) for inner in inner_errors)
+    return isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError))
+
+
+class ClosedStreamFilter(logging.Filter):
+    """
+    A tool call cancelled because its client disconnected still answers on the closed stream,
+    which the session manager logs as a crashed session. Those are logged at debug instead.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.exc_info and is_closed_stream_error(record.exc_info[1]):
+            record.levelno = logging.DEBUG
+            record.levelname = logging.getLevelName(logging.DEBUG)
+            return logging.getLogger(record.name).isEnabledFor(logging.DEBUG)
+        return True
+
+
+logging.getLogger("mcp.server.streamable_http_manager").addFilter(ClosedStreamFilter())
+
 app = Server("usa-spending-mcp-server")
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.ContentBlock]:
+    """
+    Runs the tool within a deadline and a cancel scope.
+    The cancel scope is cancelled if the client goes away before the tool returns,
+    that way the request to the USA Spending API does not keep holding a connection.
+    """
+    record_call(name, arguments)
+    timeout = get_tool_timeout(name)
+    cancel_scopes = request_cancel_scopes.get()
+    with anyio.CancelScope() as cancel_scope:
+        if cancel_scopes is not None:
+            cancel_scopes.add(cancel_scope)
+        try:
+            with anyio.fail_after(timeout):
+                return await dispatch_tool(name, arguments)
+        except TimeoutError as e:
+            raise McpError(
+                types.ErrorData(
+                    code=types.INTERNAL_ERROR,
+                    message=f"The {name} tool did not finish within {timeout} seconds.",
+                    data="Try again with narrower filters or a smaller limit.",
+                )
+            ) from e
+        finally:
+            if cancel_scopes is not None:
+                cancel_scopes.discard(cancel_scope)
+
+    # Only reached when the cancel scope was cancelled
+    raise McpError(types.ErrorData(code=types.INTERNAL_ERROR, message="Request cancelled."))
+
+
+async def dispatch_tool(name: str, arguments: dict[str, Any]) -> list[types.ContentBlock]:
+    if name == "aggregate_awards":
+        return await call_tool_aggregate_awards(arguments)
+
     if name == "federal_accounts":
         return await call_tool_federal_accounts(arguments)
 
@@ -93,9 +226,15 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.ContentB
     if name == "major_object_class":
         return await call_tool_major_object_class(arguments)
 
+    if name == "major_object_class_matrix":
+        return await call_tool_major_object_class_matrix(arguments)
+
     if name == "recipient":
         return await call_tool_recipient(arguments)
 
+    if name == "recipient_autocomplete":
+        return await call_tool_recipient_autocomplete(arguments)
+
     if name == "spending":
         return await call_tool_spending(arguments)
 
@@ -120,10 +259,13 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.ContentB
 @app.list_tools()
 async def list_tools() -> list[types.Tool]:
     return [
+        tool_aggregate_awards,
         tool_federal_accounts,
         tool_list_budget_functions,
         tool_major_object_class,
+        tool_major_object_class_matrix,
         tool_recipient,
+        tool_recipient_autocomplete,
         tool_spending,
         tool_spending_by_award,
         tool_spending_over_time,
@@ -196,7 +338,20 @@ session_manager = StreamableHTTPSessionManager(
 
 
 async def handle_streamable_http(scope: Scope, receive: Receive, send: Send) -> None:
-    await session_manager.handle_request(scope, receive, send)
+    # Tool calls run in tasks started by the session manager, which copy this context
+    cancel_scopes = set()
+    token = request_cancel_scopes.set(cancel_scopes)
+    try:
+        await session_manager.handle_request(scope, receive, send)
+    finally:
+        request_cancel_scopes.reset(token)
+        # Any tool call still running at this point was abandoned by the client
+        for cancel_scope in cancel_scopes:
+            cancel_scope.cancel()
+
+
+async def metrics(request: Request) -> JSONResponse:
+    return JSONResponse({"event_loop": loop_monitor.metrics()})
 
 
 @contextlib.asynccontextmanager
@@ -204,10 +359,28 @@ async def lifespan(app: Starlette) -> AsyncIterator[None]:
     """Context manager for session manager."""
     async with session_manager.run():
         logger.info("Application started with StreamableHTTP session manager!")
+        if startup_profiler.enabled:
+            print(startup_profiler.report(), file=sys.stderr)
+            startup_profiler.disable()
+        if CACHE_SNAPSHOT:
+            # A bad snapshot only means starting with an empty cache
+            try:
+                logger.info(f"Loaded {load_snapshot(CACHE_SNAPSHOT)} cached responses")
+            except Exception as e:
+                logger.error(f"Unable to load the cache snapshot due to {e=}")
+        loop_monitor.start()
         try:
             yield
         finally:
             logger.info("Application shutting down...")
+            await loop_monitor.stop()
+            shutdown_executor()
+            close_replay_logs()
+            if CACHE_SNAPSHOT:
+                try:
+                    logger.info(f"Wrote {write_snapshot(CACHE_SNAPSHOT)} cached responses")
+                except OSError as e:
+                    logger.error(f"Unable to write the cache snapshot due to {e=}")
 
 
 # Create an ASGI application using the transport
@@ -215,6 +388,7 @@ starlette_app = Starlette(
     debug=True,
     routes=[
         Mount("/mcp", app=handle_streamable_http),
+        Route("/metrics", endpoint=metrics, methods=["GET"]),
     ],
     lifespan=lifespan,
 )
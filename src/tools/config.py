@@ -11,10 +11,18 @@ from tools.v2.financial_spending.major_object_class import (
     call_tool_major_object_class,
     tool_major_object_class,
 )
+from tools.v2.financial_spending.major_object_class_matrix import (
+    call_tool_major_object_class_matrix,
+    tool_major_object_class_matrix,
+)
 from tools.v2.recipient.recipient import (
     call_tool_recipient,
     tool_recipient,
 )
+from tools.v2.recipient.recipient_autocomplete import (
+    call_tool_recipient_autocomplete,
+    tool_recipient_autocomplete,
+)
 from tools.v2.references.toptier_agencies.toptier_agencies import (
     call_tool_toptier_agencies,
     tool_toptier_agencies,
@@ -23,6 +31,10 @@ from tools.v2.references.total_budgetary_resources.total_budgetary_resources imp
     call_tool_total_budgetary_resources,
     tool_total_budgetary_resources,
 )
+from tools.v2.search.spending_by_award.aggregate_awards import (
+    call_tool_aggregate_awards,
+    tool_aggregate_awards,
+)
 from tools.v2.search.spending_by_award.spending_by_award import (
     call_tool_spending_by_award,
     tool_spending_by_award,
@@ -41,14 +53,20 @@ from tools.v2.subawards.subawards import (
 )
 
 __all__ = [
+    "call_tool_aggregate_awards",
+    "tool_aggregate_awards",
     "call_tool_list_budget_functions",
     "tool_list_budget_functions",
     "call_tool_federal_accounts",
     "tool_federal_accounts",
     "call_tool_major_object_class",
     "tool_major_object_class",
+    "call_tool_major_object_class_matrix",
+    "tool_major_object_class_matrix",
     "call_tool_recipient",
     "tool_recipient",
+    "call_tool_recipient_autocomplete",
+    "tool_recipient_autocomplete",
     "call_tool_toptier_agencies",
     "tool_toptier_agencies",
     "call_tool_total_budgetary_resources",
@@ -1,5 +1,6 @@
 from mcp.types import Tool
 
+from utils.cache import reference_cache_policy
 from utils.http import HttpClient
 
 input_schema = {"type": "object", "additionalProperties": False}
@@ -34,5 +35,10 @@ endpoint = "/api/v2/budget_functions/list_budget_functions/"
 
 
 async def call_tool_list_budget_functions():
-    get_client = HttpClient(endpoint=endpoint, method="GET", output_schema=output_schema)
+    get_client = HttpClient(
+        endpoint=endpoint,
+        method="GET",
+        output_schema=output_schema,
+        cache_policy=reference_cache_policy,
+    )
     return await get_client.send()
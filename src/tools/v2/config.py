@@ -0,0 +1,27 @@
+from utils.reshape import output_formats
+
+# Schema properties shared by the tools that return a list of results
+output_format_object = {
+    "type": "string",
+    "enum": output_formats,
+    "default": "json",
+    "description": (
+        "The format of the results. "
+        "json returns a list of objects. "
+        "columnar returns the field names once in columns followed by a list of rows. "
+        "csv returns the results as a CSV string with a header row. "
+        "Prefer columnar or csv when requesting many results."
+    ),
+}
+
+select_object = {
+    "type": "array",
+    "items": {"type": "string"},
+    "minItems": 1,
+    "description": (
+        "Dotted paths of the fields to return, everything else and null values are removed. "
+        "Paths through a list apply to every item in the list. "
+        "For example [results.Award ID, results.Award Amount, page_metadata.hasNext]. "
+        "When omitted the full response is returned."
+    ),
+}
@@ -2,7 +2,9 @@ from typing import Any
 
 from mcp.types import Tool
 
+from utils.cache import reference_cache_policy
 from utils.http import HttpClient
+from utils.reshape import get_transform
 
 from .federal_accounts_schemas import (
     input_schema,
@@ -30,6 +32,8 @@ async def call_tool_federal_accounts(arguments: dict[str, Any]):
     limit = arguments.get("limit", 5)
     page = arguments.get("page")
     keyword = arguments.get("keyword")
+    output_format = arguments.get("output_format")
+    select = arguments.get("select")
 
     payload = {}
     if bool(filters):
@@ -44,6 +48,12 @@ async def call_tool_federal_accounts(arguments: dict[str, Any]):
         payload["keyword"] = keyword
 
     post_client = HttpClient(
-        endpoint=endpoint, method="POST", payload=payload, output_schema=output_schema
+        endpoint=endpoint,
+        method="POST",
+        payload=payload,
+        output_schema=output_schema,
+        transform=get_transform(output_format, select),
+        cache_policy=reference_cache_policy,
+        prefetch=True,
     )
     return await post_client.send()
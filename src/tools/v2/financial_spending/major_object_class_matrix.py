@@ -0,0 +1,175 @@
+import asyncio
+from typing import Any
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, ErrorData, TextContent, Tool
+
+from utils.cache import closed_period_cache_policy, reference_cache_policy
+from utils.dates import is_closed_fy
+from utils.http import HttpClient
+from utils.reshape import get_transform
+from utils.serialization import dumps
+
+from .major_object_class import endpoint
+from .major_object_class_matrix_schemas import input_schema, max_cells
+from .major_object_class_schemas import output_schema
+
+"""
+Comparing major object classes across agencies or years took one major_object_class call
+per agency and fiscal year. This tool requests every agency and fiscal year pair concurrently
+and pivots the results into one table with a row per major object class
+and a column per agency and fiscal year.
+"""
+tool_major_object_class_matrix = Tool(
+    name="major_object_class_matrix",
+    description=(
+        "This compares how several agencies spend money across several fiscal years. "
+        "It returns one table with a row for each major object class, such as personnel "
+        "compensation, and the obligated amount for each agency and fiscal year. "
+        "Use this instead of calling major_object_class for each agency and year."
+    ),
+    inputSchema=input_schema,
+    title="Major Object Class Matrix",
+)
+
+cell_concurrency = 8
+
+
+def get_column(funding_agency_id: int, fiscal_year: int) -> str:
+    return f"{funding_agency_id} FY{fiscal_year}"
+
+
+async def fetch_cell(funding_agency_id, fiscal_year, semaphore):
+    get_client = HttpClient(
+        endpoint=endpoint,
+        method="GET",
+        params={"fiscal_year": fiscal_year, "funding_agency_id": funding_agency_id},
+        output_schema=output_schema,
+        # Each cell is cached on its own so overlapping matrices share requests
+        cache_policy=(
+            closed_period_cache_policy if is_closed_fy(fiscal_year) else reference_cache_policy
+        ),
+    )
+    async with semaphore:
+        return await get_client.send_json()
+
+
+def pivot(cells: dict) -> list:
+    """
+    Returns a row per major object class with a column per cell.
+    A cell is 0 when the agency had no obligations for the class that year
+    and None when the cell could not be fetched.
+    """
+    rows = {}
+    for column, body in cells.items():
+        if body is None:
+            continue
+        for result in body.get("results", []):
+            code = result.get("major_object_class_code")
+            row = rows.setdefault(
+                code,
+                {
+                    "major_object_class_code": code,
+                    "major_object_class_name": result.get("major_object_class_name"),
+                },
+            )
+            row[column] = row.get(column, 0) + float(result.get("obligated_amount") or 0)
+
+    results = []
+    for code in sorted(rows, key=str):
+        row = rows[code]
+        for column, body in cells.items():
+            row.setdefault(column, None if body is None else 0)
+        results.append(
+            {
+                "major_object_class_code": row["major_object_class_code"],
+                "major_object_class_name": row["major_object_class_name"],
+                **{column: row[column] for column in cells},
+            }
+        )
+    return results
+
+
+async def call_tool_major_object_class_matrix(arguments: dict[str, Any]):
+    fiscal_years = arguments.get("fiscal_years")
+    funding_agency_ids = arguments.get("funding_agency_ids")
+    output_format = arguments.get("output_format")
+
+    if not bool(fiscal_years):
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="fiscal_years must be provided.",
+                data="These are the fiscal years that you are comparing, for example [2024].",
+            )
+        )
+    if not bool(funding_agency_ids):
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="funding_agency_ids must be provided.",
+                data=(
+                    "The unique USAspending.gov agency identifiers. "
+                    "These IDs are the agency_id returned in the toptier_agencies tool."
+                ),
+            )
+        )
+
+    fiscal_years = list(dict.fromkeys(int(fiscal_year) for fiscal_year in fiscal_years))
+    funding_agency_ids = list(dict.fromkeys(int(agency_id) for agency_id in funding_agency_ids))
+    if len(fiscal_years) * len(funding_agency_ids) > max_cells:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message=(
+                    f"At most {max_cells} agency and fiscal year pairs can be requested, "
+                    f"received {len(funding_agency_ids)} agencies and "
+                    f"{len(fiscal_years)} fiscal years."
+                ),
+                data="Split the agencies or fiscal years across several calls.",
+            )
+        )
+
+    transform = get_transform(output_format)
+    pairs = [
+        (funding_agency_id, fiscal_year)
+        for funding_agency_id in funding_agency_ids
+        for fiscal_year in fiscal_years
+    ]
+    semaphore = asyncio.Semaphore(cell_concurrency)
+    responses = await asyncio.gather(
+        *[fetch_cell(*pair, semaphore) for pair in pairs], return_exceptions=True
+    )
+
+    # One agency that did not report for a year should not fail the whole matrix
+    cells = {}
+    errors = []
+    for (funding_agency_id, fiscal_year), response in zip(pairs, responses):
+        column = get_column(funding_agency_id, fiscal_year)
+        if isinstance(response, McpError):
+            cells[column] = None
+            errors.append(
+                {
+                    "funding_agency_id": funding_agency_id,
+                    "fiscal_year": fiscal_year,
+                    "message": response.error.message,
+                }
+            )
+        elif isinstance(response, BaseException):
+            raise response
+        else:
+            cells[column] = response
+
+    response = {
+        # What each amount column of the results refers to
+        "cells": {
+            get_column(*pair): {"funding_agency_id": pair[0], "fiscal_year": pair[1]}
+            for pair in pairs
+        },
+        "results": pivot(cells),
+        "errors": errors,
+    }
+    if transform is not None:
+        response = transform(response)
+
+    return [TextContent(type="text", text=dumps(response))]
@@ -0,0 +1,30 @@
+from tools.v2.config import output_format_object
+
+# Every agency and fiscal year pair is one request to the USA Spending API
+max_cells = 50
+
+input_schema = {
+    "type": "object",
+    "required": ["fiscal_years", "funding_agency_ids"],
+    "additionalProperties": False,
+    "properties": {
+        "fiscal_years": {
+            "type": "array",
+            "items": {"type": "number"},
+            "minItems": 1,
+            "description": "The fiscal years that are compared, for example [2022, 2023, 2024].",
+        },
+        "funding_agency_ids": {
+            "type": "array",
+            "items": {"type": "number"},
+            "minItems": 1,
+            "description": (
+                "The unique USAspending.gov agency identifiers that are compared. "
+                "These IDs are the agency_id values returned in the toptier_agencies tool "
+                "i.e [1137, 862]. "
+                f"At most {max_cells} agency and fiscal year pairs can be requested at once."
+            ),
+        },
+        "output_format": output_format_object,
+    },
+}
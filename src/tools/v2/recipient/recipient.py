@@ -3,6 +3,8 @@ from typing import Any
 from mcp.types import Tool
 
 from utils.http import HttpClient
+from utils.recipient_index import get_recipients, recipient_index
+from utils.reshape import get_transform
 
 from .recipient_schemas import (
     input_schema,
@@ -29,6 +31,8 @@ async def call_tool_recipient(arguments: dict[str, Any]):
     page = arguments.get("page")
     keyword = arguments.get("keyword")
     award_type = arguments.get("award_type")
+    output_format = arguments.get("output_format")
+    select = arguments.get("select")
 
     payload = {}
     if order is not None:
@@ -45,6 +49,13 @@ async def call_tool_recipient(arguments: dict[str, Any]):
         payload["award_type"] = award_type
 
     post_client = HttpClient(
-        endpoint=endpoint, method="POST", payload=payload, output_schema=output_schema
+        endpoint=endpoint,
+        method="POST",
+        payload=payload,
+        output_schema=output_schema,
+        transform=get_transform(output_format, select),
+        prefetch=True,
+        extract=get_recipients,
+        observer=recipient_index.add_all,
     )
     return await post_client.send()
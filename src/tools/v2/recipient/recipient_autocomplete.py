@@ -0,0 +1,70 @@
+from typing import Any
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, ErrorData, TextContent, Tool
+
+from utils.http import HttpClient
+from utils.recipient_index import recipient_index
+from utils.serialization import dumps
+
+from .recipient import endpoint
+from .recipient_autocomplete_schemas import input_schema
+from .recipient_schemas import output_schema
+
+"""
+Agents often try several spellings of a recipient before they find its UEI.
+Names are looked up in the recipients already seen by the recipient and spending_by_award tools,
+see utils/recipient_index.py, and only when none match is the USA Spending API searched.
+"""
+tool_recipient_autocomplete = Tool(
+    name="recipient_autocomplete",
+    description=(
+        "This finds the UEI, DUNS, recipient_id and recipient level of a recipient by name. "
+        "The name can be the start of the name or a close spelling. "
+        "Use this before filtering other tools by recipient."
+    ),
+    inputSchema=input_schema,
+    title="Recipient Autocomplete",
+)
+
+
+async def call_tool_recipient_autocomplete(arguments: dict[str, Any]):
+    name = arguments.get("name")
+    limit = int(arguments.get("limit", 10))
+
+    if not isinstance(name, str) or name.strip() == "":
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="name must be provided.",
+                data="For example, Lockheed Martin.",
+            )
+        )
+
+    results = recipient_index.search(name, limit=limit)
+    source = "local"
+    if len(results) == 0:
+        post_client = HttpClient(
+            endpoint=endpoint,
+            method="POST",
+            payload={"keyword": name, "limit": limit, "sort": "amount", "order": "desc"},
+            output_schema=output_schema,
+        )
+        body = await post_client.send_json()
+        recipient_index.add_recipients(body)
+        source = "usaspending"
+        # The keyword search also matches on UEI and DUNS which the index does not
+        results = recipient_index.search(name, limit=limit) or [
+            {
+                "name": row.get("name"),
+                "uei": row.get("uei"),
+                "duns": row.get("duns"),
+                "id": row.get("id"),
+                "recipient_level": row.get("recipient_level"),
+                "match": "keyword",
+            }
+            for row in body.get("results", [])[:limit]
+        ]
+
+    response = {"name": name, "source": source, "results": results}
+    return [TextContent(type="text", text=dumps(response))]
@@ -0,0 +1,16 @@
+input_schema = {
+    "type": "object",
+    "required": ["name"],
+    "additionalProperties": False,
+    "properties": {
+        "name": {
+            "type": "string",
+            "minLength": 2,
+            "description": (
+                "The full name, the start of the name, or a close spelling of the recipient. "
+                "For example, Lockheed Martin or Lockhead."
+            ),
+        },
+        "limit": {"type": "number", "default": 10, "minimum": 1, "maximum": 50},
+    },
+}
@@ -1,3 +1,5 @@
+from tools.v2.config import output_format_object, select_object
+
 input_schema = {
     "type": "object",
     "required": [],
@@ -23,6 +25,8 @@ input_schema = {
             ],
             "default": "all",
         },
+        "output_format": output_format_object,
+        "select": select_object,
     },
 }
 
@@ -5,7 +5,9 @@ from mcp.types import (
     Tool,
 )
 
+from utils.cache import reference_cache_policy
 from utils.http import HttpClient
+from utils.startup_profile import startup_profiler
 
 from .toptier_agencies_custom import (
     cached_file_is_current,
@@ -25,25 +27,28 @@ from .toptier_agencies_schemas import (
 
 # Get the contents of the cached toptier agencies
 filename = "src/resources/toptier_agencies.json"
-toptier_agencies, use_cached_file = read_cached_file(filename)
-current = cached_file_is_current(toptier_agencies)
+with startup_profiler.section("dataset", filename):
+    toptier_agencies, use_cached_file = read_cached_file(filename)
+    current = cached_file_is_current(toptier_agencies)
 # Try to fetch fresh version of file if outdated or error occurs during read
 if current is False or use_cached_file is False:
-    toptier_agencies, use_cached_file = get_fresh_toptier_agencies(
-        toptier_agencies, original_output_schema, use_cached_file
-    )
+    with startup_profiler.section("dataset", "get_fresh_toptier_agencies"):
+        toptier_agencies, use_cached_file = get_fresh_toptier_agencies(
+            toptier_agencies, original_output_schema, use_cached_file
+        )
 toptier_agencies_len = len(toptier_agencies)
 
 
 # Update input/output schema if using cached_file
 # Since I added extra features like keyword search
-input_schema = deepcopy(original_input_schema)
-if use_cached_file:
-    input_schema["properties"].update(custom_filters_input_schema)
+with startup_profiler.section("schema", "toptier_agencies"):
+    input_schema = deepcopy(original_input_schema)
+    if use_cached_file:
+        input_schema["properties"].update(custom_filters_input_schema)
 
-output_schema = deepcopy(original_output_schema)
-if use_cached_file:
-    output_schema["properties"].update(custom_pagination_output_schema)
+    output_schema = deepcopy(original_output_schema)
+    if use_cached_file:
+        output_schema["properties"].update(custom_pagination_output_schema)
 
 
 tool_toptier_agencies = Tool(
@@ -71,7 +76,11 @@ async def call_tool_toptier_agencies(arguments: dict[str, Any]):
         params["order"] = order
 
     get_client = HttpClient(
-        endpoint=endpoint, method="GET", params=params, output_schema=output_schema
+        endpoint=endpoint,
+        method="GET",
+        params=params,
+        output_schema=output_schema,
+        cache_policy=reference_cache_policy,
     )
     # If unable to read toptier_agencies cached file, use the API endpoint.
     if not use_cached_file:
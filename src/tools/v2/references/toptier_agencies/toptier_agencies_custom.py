@@ -1,8 +1,7 @@
-import json
 from collections.abc import Iterable
 from copy import deepcopy
 
-from httpx import HTTPError, Response, get
+from httpx import HTTPError, get
 from jsonschema import ValidationError, validate
 from mcp.shared.exceptions import McpError
 from mcp.types import (
@@ -16,6 +15,7 @@ from utils.dates import (
     is_outdated_fy_fq,
     latest_fy_fq_with_data,
 )
+from utils.serialization import dumps, loads
 
 """
 USA Spending API only returns all the top tier agencies, which is about 111.
@@ -33,11 +33,10 @@ def create_mcp_response(paginated_results, page_metadata, get_client):
         }
 
         # Do a check to make sure the response schema is valid
-        mock_response = Response(status_code=200, json=response)
-        get_client.validate_response(mock_response)
+        get_client.validate_payload(response)
 
         # Turn into a JSON string and minify
-        response = json.dumps(response, separators=(",", ":"))
+        response = dumps(response)
         return [TextContent(type="text", text=response)]
     except Exception as e:
         print("Failed to create_mcp_response in toptier_agencies")
@@ -114,7 +113,7 @@ def read_cached_file(filename: str):
     use_cached_file = False
     try:
         f = open(filename)
-        toptier_agencies = json.loads(f.read())
+        toptier_agencies = loads(f.read())
         f.close()
         if not f.closed:
             print("File descriptor was not closed for toptier_agencies.json")
@@ -159,7 +158,7 @@ def get_fresh_toptier_agencies(toptier_agencies, output_schema, use_cached_file)
     fresh_toptier_agencies = []
     try:
         response = get(url, timeout=60)
-        fresh_toptier_agencies = response.json()
+        fresh_toptier_agencies = loads(response.content)
     except HTTPError as e:
         print(f"Error occurred while fetching fresh toptier_agencies {e=}")
     except Exception as e:
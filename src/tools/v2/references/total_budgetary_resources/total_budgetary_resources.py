@@ -1,9 +1,15 @@
+import asyncio
+import time
+from datetime import date, timedelta
 from typing import Any
 
 from mcp.shared.exceptions import McpError
-from mcp.types import INVALID_PARAMS, ErrorData, Tool
+from mcp.types import INVALID_PARAMS, ErrorData, TextContent, Tool
 
+from utils.cache import reference_cache_policy
+from utils.dates import fiscal_period_end_date, next_fiscal_period
 from utils.http import HttpClient
+from utils.serialization import dumps
 
 from .total_budgetary_resources_schemas import (
     input_schema,
@@ -21,6 +27,105 @@ tool_total_budgetary_resources = Tool(
 
 endpoint = "/api/v2/references/total_budgetary_resources/?"
 
+# Days after a fiscal period ends before it is expected to be published
+publish_lag = 30
+
+
+class BudgetaryResourcesHistory:
+    """
+    The entire history since FY 2017 is small, so it is fetched once without filters
+    and every fiscal_year and fiscal_period query is answered from it.
+    It is fetched again once the period after the latest one is expected to be published,
+    and then at most every reference_cache_policy.soft_ttl until that period shows up.
+    """
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.clear()
+
+    def clear(self):
+        self.results = None
+        self.messages = []
+        self.by_year = {}
+        self.by_period = {}
+        self.fetched_at = 0.0
+
+    def expected_publish_date(self) -> date | None:
+        if len(self.by_period) == 0:
+            return None
+        next_period = next_fiscal_period(*max(self.by_period))
+        return fiscal_period_end_date(*next_period) + timedelta(days=publish_lag)
+
+    def is_stale(self) -> bool:
+        if self.results is None:
+            return True
+        expected = self.expected_publish_date()
+        return (expected is None or date.today() >= expected) and (
+            time.monotonic() - self.fetched_at >= reference_cache_policy.soft_ttl
+        )
+
+    def load(self, body: dict):
+        # Parsed before the current history is cleared, rows without a valid period are skipped
+        results = []
+        by_year = {}
+        by_period = {}
+        for row in body.get("results") or []:
+            try:
+                fiscal_year = int(row["fiscal_year"])
+                fiscal_period = int(row["fiscal_period"])
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping the total_budgetary_resources row {row} due to {e=}")
+                continue
+            results.append(row)
+            by_year.setdefault(fiscal_year, []).append(row)
+            by_period[(fiscal_year, fiscal_period)] = row
+
+        self.clear()
+        self.results = results
+        self.messages = body.get("messages", [])
+        self.by_year = by_year
+        self.by_period = by_period
+        self.fetched_at = time.monotonic()
+
+    async def refresh(self):
+        async with self.lock:
+            # Another tool call may have refreshed while this one waited on the lock
+            if not self.is_stale():
+                return
+            get_client = HttpClient(
+                endpoint=endpoint,
+                method="GET",
+                params={},
+                output_schema=output_schema,
+            )
+            try:
+                body = await get_client.send_json()
+            except McpError:
+                # An outdated history is better than none while the USA Spending API is down
+                if self.results is None:
+                    raise
+                print("Unable to refresh total_budgetary_resources, serving the stored history")
+                self.fetched_at = time.monotonic()
+                return
+            get_client.validate_payload(body)
+            self.load(body)
+
+    async def query(self, fiscal_year: int | None, fiscal_period: int | None) -> dict:
+        if self.is_stale():
+            await self.refresh()
+
+        if fiscal_year is None:
+            results = self.results
+        elif fiscal_period is None:
+            results = self.by_year.get(fiscal_year, [])
+        else:
+            row = self.by_period.get((fiscal_year, fiscal_period))
+            results = [] if row is None else [row]
+        return {"results": results, "messages": self.messages}
+
+
+budgetary_resources_history = BudgetaryResourcesHistory()
+
 
 async def call_tool_total_budgetary_resources(arguments: dict[str, Any]):
     fiscal_year = arguments.get("fiscal_year")
@@ -50,13 +155,8 @@ async def call_tool_total_budgetary_resources(arguments: dict[str, Any]):
             )
         )
 
-    params = {}
-    if fiscal_year is not None:
-        params["fiscal_year"] = fiscal_year
-    if fiscal_period is not None:
-        params["fiscal_period"] = fiscal_period
-
-    get_client = HttpClient(
-        endpoint=endpoint, method="GET", params=params, output_schema=output_schema
+    response = await budgetary_resources_history.query(
+        None if fiscal_year is None else int(fiscal_year),
+        None if fiscal_period is None else int(fiscal_period),
     )
-    return await get_client.send()
+    return [TextContent(type="text", text=dumps(response))]
@@ -0,0 +1,117 @@
+from typing import Any
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, ErrorData, TextContent, Tool
+
+from utils.aggregate import GroupBy
+from utils.http import HttpClient
+from utils.reshape import get_transform
+from utils.serialization import dumps
+
+from .aggregate_awards_schemas import input_schema
+from .spending_by_award import endpoint
+
+"""
+Agents were paging through spending_by_award only to add up the amounts themselves.
+This tool pages through spending_by_award inside the server instead.
+Each page is streamed through a group by and then discarded.
+Only the aggregate table is returned.
+"""
+tool_aggregate_awards = Tool(
+    name="aggregate_awards",
+    description=(
+        "This groups the awards matching the filters by one or more spending_by_award fields. "
+        "It returns the sum, count, min, and max of an amount for each group "
+        "and optionally the largest awards in each group. "
+        "Use this instead of paging through spending_by_award to total spending "
+        "by recipient, agency, or state."
+    ),
+    inputSchema=input_schema,
+    title="Aggregate Awards",
+)
+
+# The USA Spending API does not return more than 100 results per page
+page_limit = 100
+
+
+async def call_tool_aggregate_awards(arguments: dict[str, Any]):
+    filters = arguments.get("filters")
+    group_by = arguments.get("group_by")
+    value_field = arguments.get("value_field", "Award Amount")
+    top_k = int(arguments.get("top_k", 0))
+    sort = arguments.get("sort", "sum")
+    order = arguments.get("order", "desc")
+    limit = int(arguments.get("limit", 25))
+    max_pages = int(arguments.get("max_pages", 10))
+    output_format = arguments.get("output_format")
+
+    if not bool(filters):
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="filters must be provided.",
+            )
+        )
+    if not bool(group_by):
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="group_by must be provided.",
+                data="For example [Recipient Name].",
+            )
+        )
+    if max_pages < 1:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="max_pages must be 1 or more.",
+            )
+        )
+
+    transform = get_transform(output_format)
+    top_k_fields = ["Award ID", value_field]
+    fields = list(dict.fromkeys([*group_by, *top_k_fields]))
+    aggregator = GroupBy(group_by, value_field, top_k=top_k, top_k_fields=top_k_fields)
+
+    page = 1
+    keyset = None
+    has_next = True
+    while has_next and page <= max_pages:
+        payload = {
+            "filters": filters,
+            "fields": fields,
+            "limit": page_limit,
+            "sort": value_field,
+            "order": "desc",
+        }
+        # Continue after the last record when the API returns it, deep pages are slow upstream
+        if keyset is not None:
+            payload.update(keyset)
+        else:
+            payload["page"] = page
+        post_client = HttpClient(endpoint=endpoint, method="POST", payload=payload)
+        response = await post_client.send_json()
+        aggregator.add_rows(response.get("results", []))
+        page_metadata = response.get("page_metadata", {})
+        has_next = page_metadata.get("hasNext", False)
+        if page_metadata.get("last_record_unique_id") is not None:
+            keyset = {
+                "last_record_unique_id": page_metadata["last_record_unique_id"],
+                "last_record_sort_value": page_metadata.get("last_record_sort_value"),
+            }
+        page += 1
+
+    response = {
+        "group_by": group_by,
+        "value_field": value_field,
+        "pages_fetched": page - 1,
+        "rows_scanned": aggregator.rows,
+        "groups": len(aggregator.groups),
+        # False when max_pages was reached before all the awards were fetched
+        "complete": not has_next,
+        "results": aggregator.results(sort=sort, order=order, limit=limit),
+    }
+    if transform is not None:
+        response = transform(response)
+
+    return [TextContent(type="text", text=dumps(response))]
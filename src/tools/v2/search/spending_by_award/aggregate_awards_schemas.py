@@ -0,0 +1,75 @@
+from tools.v2.config import output_format_object
+from utils.aggregate import aggregate_functions
+
+from .spending_by_award_schemas import (
+    award_advanced_filter_object,
+    spending_by_award_fields_enum,
+)
+
+# Fields that hold an amount, these can be summed
+aggregate_awards_value_fields = [
+    "Award Amount",
+    "Total Outlays",
+    "Loan Value",
+    "Subsidy Cost",
+    "COVID-19 Obligations",
+    "COVID-19 Outlays",
+    "Infrastructure Obligations",
+    "Infrastructure Outlays",
+]
+
+input_schema = {
+    "type": "object",
+    "required": ["filters", "group_by"],
+    "additionalProperties": False,
+    "properties": {
+        "filters": award_advanced_filter_object,
+        "group_by": {
+            "type": "array",
+            "items": {"type": "string", "enum": spending_by_award_fields_enum},
+            "minItems": 1,
+            "description": (
+                "The spending_by_award fields the awards are grouped by. "
+                "For example [Recipient Name] or "
+                "[Awarding Agency, Place of Performance State Code]."
+            ),
+        },
+        "value_field": {
+            "type": "string",
+            "enum": aggregate_awards_value_fields,
+            "default": "Award Amount",
+            "description": "The amount that is summed for each group.",
+        },
+        "top_k": {
+            "type": "number",
+            "default": 0,
+            "minimum": 0,
+            "maximum": 10,
+            "description": "How many of the largest awards to return for each group.",
+        },
+        "sort": {
+            "type": "string",
+            "enum": aggregate_functions,
+            "default": "sum",
+            "description": "The aggregate the groups are sorted by.",
+        },
+        "order": {"type": "string", "enum": ["asc", "desc"], "default": "desc"},
+        "limit": {
+            "type": "number",
+            "default": 25,
+            "minimum": 1,
+            "description": "How many groups are returned.",
+        },
+        "max_pages": {
+            "type": "number",
+            "default": 10,
+            "minimum": 1,
+            "maximum": 100,
+            "description": (
+                "The most pages of 100 awards that are fetched, largest awards first. "
+                "complete is false in the response when more awards matched the filters."
+            ),
+        },
+        "output_format": output_format_object,
+    },
+}
@@ -1,9 +1,13 @@
+from functools import partial
 from typing import Any
 
 from mcp.shared.exceptions import McpError
 from mcp.types import INVALID_PARAMS, ErrorData, Tool
 
+from utils.cursor import decode_cursor, encode_cursor, get_query_hash
 from utils.http import HttpClient
+from utils.recipient_index import get_award_recipients, recipient_index
+from utils.reshape import get_transform
 
 from .spending_by_award_schemas import (
     input_schema,
@@ -30,6 +34,28 @@ tool_spending_by_award = Tool(
 endpoint = "/api/v2/search/spending_by_award/"
 
 
+# Adds a cursor for the next page to page_metadata, then applies the output_format and select
+def add_cursor(body, sort=None, order=None, query=None, transform=None):
+    page_metadata = body.get("page_metadata") if isinstance(body, dict) else None
+    if (
+        isinstance(page_metadata, dict)
+        and page_metadata.get("hasNext")
+        and page_metadata.get("last_record_unique_id") is not None
+    ):
+        page_metadata["cursor"] = encode_cursor(
+            {
+                "last_record_unique_id": page_metadata["last_record_unique_id"],
+                "last_record_sort_value": page_metadata.get("last_record_sort_value"),
+                "sort": sort,
+                "order": order,
+                "query": query,
+            }
+        )
+    if transform is not None:
+        return transform(body)
+    return body
+
+
 async def call_tool_spending_by_award(arguments: dict[str, Any]):
     filters = arguments.get("filters")
     fields = arguments.get("fields")
@@ -39,6 +65,9 @@ async def call_tool_spending_by_award(arguments: dict[str, Any]):
     sort = arguments.get("sort")
     subawards = arguments.get("subawards")
     spending_level = arguments.get("spending_level")
+    cursor = arguments.get("cursor")
+    output_format = arguments.get("output_format")
+    select = arguments.get("select")
 
     if not bool(filters):
         raise McpError(
@@ -64,7 +93,14 @@ async def call_tool_spending_by_award(arguments: dict[str, Any]):
         payload["limit"] = limit
     if order is not None:
         payload["order"] = order
-    if page is not None:
+    # The cursor only applies to a request with the same filters and fields
+    query = get_query_hash({"filters": filters, "fields": fields})
+    if cursor:
+        # Continues after the last record of the previous page instead of skipping to a page
+        values = decode_cursor(cursor, {"sort": sort, "order": order, "query": query})
+        payload["last_record_unique_id"] = values.get("last_record_unique_id")
+        payload["last_record_sort_value"] = values.get("last_record_sort_value")
+    elif page is not None:
         payload["page"] = page
     if sort is not None:
         payload["sort"] = sort
@@ -73,7 +109,20 @@ async def call_tool_spending_by_award(arguments: dict[str, Any]):
     if spending_level is not None:
         payload["spending_level"] = spending_level
 
+    transform = get_transform(output_format, select)
+    # The body is only parsed to add a cursor when paging by cursor or it is reshaped anyway
+    if cursor is not None or transform is not None:
+        transform = partial(add_cursor, sort=sort, order=order, query=query, transform=transform)
+
     post_client = HttpClient(
-        endpoint=endpoint, method="POST", payload=payload, output_schema=output_schema
+        endpoint=endpoint,
+        method="POST",
+        payload=payload,
+        output_schema=output_schema,
+        transform=transform,
+        # Cursor pages are requested one at a time after the previous one, never ahead
+        prefetch=cursor is None,
+        extract=get_award_recipients,
+        observer=recipient_index.add_all,
     )
     return await post_client.send()
@@ -1,8 +1,11 @@
 from copy import deepcopy
 
+from tools.v2.config import output_format_object, select_object
 from tools.v2.search.config import advanced_filter_object
+from utils.startup_profile import startup_profiler
 
-award_advanced_filter_object = deepcopy(advanced_filter_object)
+with startup_profiler.section("schema", "award_advanced_filter_object"):
+    award_advanced_filter_object = deepcopy(advanced_filter_object)
 award_advanced_filter_object["required"] = ["award_type_codes"]
 
 spending_by_award_fields_enum = [
@@ -124,6 +127,14 @@ input_schema = {
             "enum": spending_by_award_response_properties,
         },
         "page": {"type": "string"},
+        "cursor": {
+            "type": "string",
+            "description": (
+                "The page_metadata.cursor of the previous page, or an empty string for the first "
+                "page. Use this instead of page to go through many pages, deep pages are slow. "
+                "The filters, fields, sort and order must be the same as the previous page."
+            ),
+        },
         "subawards": {
             "type": "boolean",
             "description": "True when you want to group by Subawards instead of Awards",
@@ -138,6 +149,8 @@ input_schema = {
             "enum": ["awards", "subawards"],
             "default": "awards",
         },
+        "output_format": output_format_object,
+        "select": select_object,
     },
 }
 
@@ -220,6 +233,8 @@ output_schema = {
             "properties": {
                 "page": {"type": "number"},
                 "hasNext": {"type": "boolean"},
+                "last_record_unique_id": {"type": ["number", "string", "null"]},
+                "last_record_sort_value": {"type": ["number", "string", "null"]},
             },
         },
         "messages": {
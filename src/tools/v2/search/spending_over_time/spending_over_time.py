@@ -1,9 +1,22 @@
+import asyncio
+from datetime import date, timedelta
 from typing import Any
 
 from mcp.shared.exceptions import McpError
-from mcp.types import INVALID_PARAMS, ErrorData, Tool
+from mcp.types import INVALID_PARAMS, ErrorData, TextContent, Tool
 
+from utils.aggregate import is_number
+from utils.cache import closed_period_cache_policy
+from utils.dates import (
+    date_to_fy,
+    fiscal_year_windows,
+    fy_fq_end_date,
+    is_closed_fy,
+    last_closed_fy_fq,
+)
 from utils.http import HttpClient
+from utils.serialization import dumps
+from utils.timeseries import get_filter_hash, timeseries_store
 
 from .spending_over_time_schemas import (
     input_schema,
@@ -22,12 +35,162 @@ tool_spending_over_time = Tool(
 
 endpoint = "/api/v2/search/spending_over_time/"
 
+# Fiscal year windows requested at the same time when split_by_fiscal_year is true
+window_concurrency = 4
+
+# The time_period of a result has some of these keys depending on the group
+time_period_keys = ["calendar_year", "fiscal_year", "quarter", "month"]
+
+
+# Returns the start and end date of the time_period or None if it is not a single date range
+def get_date_range(filters):
+    time_period = filters.get("time_period")
+    if not isinstance(time_period, list) or len(time_period) != 1:
+        return None
+
+    try:
+        start = date.fromisoformat(time_period[0]["start_date"])
+        end = date.fromisoformat(time_period[0]["end_date"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="time_period start_date and end_date must be in the format YYYY-MM-DD.",
+            )
+        ) from e
+    return start, end
+
+
+# Returns the (fiscal_year, start, end) windows requested for the dates from start to end
+def get_windows(start, end, split):
+    if split:
+        return fiscal_year_windows(start, end)
+    return [(date_to_fy(end), start, end)]
+
+
+def get_period_key(time_period):
+    return tuple(int(time_period.get(key, 0)) for key in time_period_keys)
+
+
+# Joins the results of each window into one series in ascending order.
+# A calendar year spans two fiscal years so its amounts are added together
+def stitch_results(responses):
+    rows = {}
+    for response in responses:
+        for row in response.get("results", []):
+            key = get_period_key(row.get("time_period", {}))
+            if key not in rows:
+                rows[key] = dict(row)
+                continue
+            stitched = rows[key]
+            for field, value in row.items():
+                if not is_number(value):
+                    continue
+                if is_number(stitched.get(field)):
+                    stitched[field] += value
+                else:
+                    stitched[field] = value
+    return [rows[key] for key in sorted(rows)]
+
+
+async def fetch_window(payload, window, semaphore):
+    fiscal_year, start, end = window
+    period = payload["filters"]["time_period"][0]
+    window_period = {**period, "start_date": start.isoformat(), "end_date": end.isoformat()}
+    post_client = HttpClient(
+        endpoint=endpoint,
+        method="POST",
+        payload={**payload, "filters": {**payload["filters"], "time_period": [window_period]}},
+        # Only the still open fiscal year has to be fetched again on repeat queries
+        cache_policy=closed_period_cache_policy if is_closed_fy(fiscal_year) else None,
+    )
+    async with semaphore:
+        return await post_client.send_json()
+
+
+async def fetch_windows(payload, windows):
+    semaphore = asyncio.Semaphore(window_concurrency)
+    return await asyncio.gather(*[fetch_window(payload, window, semaphore) for window in windows])
+
+
+def create_response(payload, responses, results, note):
+    messages = []
+    for response in responses:
+        for message in response.get("messages", []):
+            if message not in messages:
+                messages.append(message)
+    messages.append(note)
+
+    spending_level = payload.get("spending_level")
+    if len(responses) > 0:
+        spending_level = responses[0].get("spending_level", spending_level)
+    response = {
+        "group": payload["group"],
+        "spending_level": spending_level,
+        "results": results,
+        "messages": messages,
+    }
+    return [TextContent(type="text", text=dumps(response))]
+
+
+async def split_spending_over_time(payload, windows):
+    responses = await fetch_windows(payload, windows)
+    return create_response(
+        payload,
+        responses,
+        stitch_results(responses),
+        f"The time_period was split into {len(windows)} fiscal year windows.",
+    )
+
+
+async def incremental_spending_over_time(payload, start, end, split):
+    """
+    Serves the periods up to the last closed fiscal quarter from the time series store
+    and only fetches the periods after it.
+    A time_period that has closed entirely is stored through its end_date and served
+    from the store without a request once it has been fetched.
+    Returns None when the time_period starts after the last closed fiscal quarter.
+    """
+    last_closed = fy_fq_end_date(*last_closed_fy_fq())
+    if start > last_closed:
+        return None
+
+    group = payload["group"]
+    # A closed time_period never grows, so its end_date is part of the series
+    closed_range = end <= last_closed
+    filter_hash = get_filter_hash(payload, include_end_date=closed_range)
+    stored_through, stored_results = timeseries_store.get(filter_hash, group)
+    if stored_through is None or stored_through < start:
+        stored_through, stored_results = start - timedelta(days=1), []
+    closed_through = max(end if closed_range else last_closed, stored_through)
+
+    # Quarters that closed since the series was stored, then the periods that are still open
+    backfill = []
+    if stored_through < closed_through:
+        backfill = get_windows(stored_through + timedelta(days=1), closed_through, split)
+    recent = []
+    if closed_through < end:
+        recent = get_windows(closed_through + timedelta(days=1), end, split)
+    responses = await fetch_windows(payload, backfill + recent)
+
+    closed_results = stitch_results([{"results": stored_results}, *responses[: len(backfill)]])
+    if len(backfill) > 0:
+        timeseries_store.put(filter_hash, group, closed_through, closed_results)
+
+    return create_response(
+        payload,
+        responses,
+        stitch_results([{"results": closed_results}, *responses[len(backfill) :]]),
+        f"Periods through {closed_through} have closed and were kept in the local store.",
+    )
+
 
 async def call_tool_spending_over_time(arguments: dict[str, Any]):
     group = arguments.get("group")
     filters = arguments.get("filters")
     subawards = arguments.get("subawards")
     spending_level = arguments.get("spending_level")
+    split_by_fiscal_year = arguments.get("split_by_fiscal_year", False)
 
     if not group:
         raise McpError(
@@ -55,6 +218,17 @@ async def call_tool_spending_over_time(arguments: dict[str, Any]):
     if spending_level is not None:
         payload["spending_level"] = spending_level
 
+    date_range = get_date_range(filters)
+    if date_range is not None and timeseries_store.enabled:
+        response = await incremental_spending_over_time(payload, *date_range, split_by_fiscal_year)
+        if response is not None:
+            return response
+
+    if date_range is not None and split_by_fiscal_year:
+        windows = fiscal_year_windows(*date_range)
+        if len(windows) > 1:
+            return await split_spending_over_time(payload, windows)
+
     post_client = HttpClient(
         endpoint=endpoint,
         method="POST",
@@ -30,6 +30,15 @@ input_schema = {
             ),
             "default": "transactions",
         },
+        "split_by_fiscal_year": {
+            "type": "boolean",
+            "description": (
+                "True to split a time_period of more than one fiscal year into one request "
+                "per fiscal year, which is faster for long time periods. "
+                "Requires a single time_period with a start_date and end_date."
+            ),
+            "default": False,
+        },
     },
 }
 
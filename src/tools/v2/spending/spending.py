@@ -1,18 +1,23 @@
+import asyncio
 from sys import maxsize as MAX_INT
 from typing import Any
 
 from mcp.shared.exceptions import McpError
-from mcp.types import INVALID_PARAMS, ErrorData, Tool
+from mcp.types import INVALID_PARAMS, ErrorData, TextContent, Tool
 
+from utils.cache import closed_period_cache_policy, reference_cache_policy
 from utils.dates import (
+    is_closed_fy,
     is_outdated_fy_fq,
     latest_fy_fq_with_data,
     period_to_quarter,
 )
 from utils.http import HttpClient
+from utils.serialization import dumps
 
 from .spending_schemas import (
     input_schema,
+    max_drilldown_requests,
     output_schema,
 )
 
@@ -32,10 +37,142 @@ tool_spending = Tool(
 
 endpoint = "/api/v2/spending/"
 
+# The level the Spending Explorer drills down to from each type
+# A result becomes a filter on its type, for example an agency id filters the federal accounts
+child_types = {
+    "budget_function": "budget_subfunction",
+    "budget_subfunction": "federal_account",
+    "agency": "federal_account",
+    "federal_account": "object_class",
+    "program_activity": "object_class",
+    "object_class": "recipient",
+    "recipient": "award",
+}
+
+node_concurrency = 8
+
+# The field of a result that becomes the filter on its type, and the type that filter expects.
+# Codes such as budget function 050 keep their leading zeros, ids are integers
+level_filters = {
+    "budget_function": ("code", str),
+    "budget_subfunction": ("code", str),
+    "agency": ("id", int),
+    "federal_account": ("id", int),
+    "program_activity": ("id", int),
+    "object_class": ("code", str),
+    "recipient": ("id", int),
+}
+
+
+def get_child_type(spending_type, filters):
+    child_type = child_types.get(spending_type)
+    # Skip levels that are already filtered on, their results would be the single filtered item
+    while child_type is not None and filters.get(child_type) is not None:
+        child_type = child_types.get(child_type)
+    return child_type
+
+
+def get_filter_value(spending_type, row):
+    """Returns the value that filters the children of row, None when it can not be filtered on."""
+    field, value_type = level_filters.get(spending_type, ("id", str))
+    value = row.get(field)
+    if value is None:
+        value = row.get("id")
+    if value_type is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        # Recipients without an id are returned with a name or hash instead
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+        return None
+    if isinstance(value, str) and value != "":
+        return value
+    return None
+
+
+def get_node_cache_policy(filters):
+    try:
+        fiscal_year = int(filters.get("fy"))
+    except (TypeError, ValueError):
+        return reference_cache_policy
+    return closed_period_cache_policy if is_closed_fy(fiscal_year) else reference_cache_policy
+
+
+async def fetch_node(spending_type, filters, semaphore):
+    post_client = HttpClient(
+        endpoint=endpoint,
+        method="POST",
+        payload={"type": spending_type, "filters": filters},
+        output_schema=output_schema,
+        # Each node is cached on its own so drilling into a sibling reuses its parents
+        cache_policy=get_node_cache_policy(filters),
+    )
+    async with semaphore:
+        # A node larger than MCP_MAX_RESPONSE_BYTES keeps its complete rows and a truncated summary
+        return await post_client.send_json(salvage_truncated=True)
+
+
+def prune(body, top_n):
+    """Keeps the top_n results by amount and sums up the rest."""
+    results = sorted(body.get("results", []), key=lambda row: row.get("amount") or 0, reverse=True)
+    node = {**body, "results": results[:top_n]}
+    rest = results[top_n:]
+    if len(rest) > 0:
+        node["pruned"] = {"count": len(rest), "amount": sum(row.get("amount") or 0 for row in rest)}
+    return node
+
+
+async def expand(node, spending_type, filters, depth, top_n, semaphore):
+    """Adds the children of each result in node down to depth levels."""
+    child_type = get_child_type(spending_type, filters)
+    rows = [row for row in node["results"] if row.get("id") is not None]
+    if depth < 1 or child_type is None or len(rows) == 0:
+        return
+
+    expandable = []
+    for row in rows:
+        value = get_filter_value(spending_type, row)
+        if value is None:
+            # Sending an invalid filter upstream would only fail for this node
+            row["children"] = {
+                "type": child_type,
+                "error": f"The {spending_type} {row.get('name')} can not be drilled into.",
+            }
+        else:
+            expandable.append((row, {**filters, spending_type: value}))
+
+    responses = await asyncio.gather(
+        *[fetch_node(child_type, child_filter, semaphore) for _, child_filter in expandable],
+        return_exceptions=True,
+    )
+
+    expansions = []
+    for (row, child_filter), response in zip(expandable, responses):
+        # One node that fails should not fail the whole tree
+        if isinstance(response, McpError):
+            row["children"] = {"type": child_type, "error": response.error.message}
+            continue
+        if isinstance(response, BaseException):
+            raise response
+        child = prune(response, top_n)
+        row["children"] = {"type": child_type, **child}
+        expansions.append(expand(child, child_type, child_filter, depth - 1, top_n, semaphore))
+    await asyncio.gather(*expansions)
+
+
+async def drill_down(spending_type, filters, depth, top_n):
+    semaphore = asyncio.Semaphore(node_concurrency)
+    root = prune(await fetch_node(spending_type, filters, semaphore), top_n)
+    await expand(root, spending_type, filters, depth, top_n, semaphore)
+    response = {"type": spending_type, "depth": depth, "top_n": top_n, **root}
+    return [TextContent(type="text", text=dumps(response))]
+
 
 async def call_tool_spending(arguments: dict[str, Any]):
     spending_type = arguments.get("type")
     filters = arguments.get("filters")
+    depth = int(arguments.get("depth", 0))
+    top_n = int(arguments.get("top_n", 5))
 
     if spending_type is None:
         raise McpError(
@@ -44,6 +181,24 @@ async def call_tool_spending(arguments: dict[str, Any]):
                 message="type must be provided.",
             )
         )
+    if depth < 0 or top_n < 1:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="depth must be 0 or more and top_n must be 1 or more.",
+            )
+        )
+    if sum(top_n**level for level in range(1, depth + 1)) > max_drilldown_requests:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message=(
+                    f"A depth of {depth} with top_n {top_n} would take more than "
+                    f"{max_drilldown_requests} requests."
+                ),
+                data="Lower the depth or top_n, then drill into the children of interest.",
+            )
+        )
 
     # Data is not reported until 45 days after the quarter closes
     # Adjust cur fq/fy to reflect most recent fy/fq that has data
@@ -100,6 +255,9 @@ async def call_tool_spending(arguments: dict[str, Any]):
         )
         pass
 
+    if depth > 0:
+        return await drill_down(spending_type, filters, depth, top_n)
+
     payload = {
         "type": spending_type,
         "filters": filters,
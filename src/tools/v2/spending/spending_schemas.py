@@ -1,5 +1,8 @@
 from fiscalyear import FiscalYear
 
+# Drilling down sends a request for each node below the top level
+max_drilldown_requests = 100
+
 input_schema = {
     "type": "object",
     # Filters is required, omitting bc LLM struggled setting FY & FQ/Period
@@ -61,6 +64,31 @@ input_schema = {
                 "program_activity": {"type": "number"},
             },
         },
+        "depth": {
+            "type": "number",
+            "default": 0,
+            "minimum": 0,
+            "maximum": 3,
+            "description": (
+                "How many levels to drill down in one call. "
+                "For example with type agency and depth 2, the top federal accounts of each "
+                "agency and the top object classes of each federal account are returned "
+                "in children. The levels are budget_function, budget_subfunction, "
+                "federal_account, object_class, recipient, award and agency, "
+                "federal_account, object_class, recipient, award."
+            ),
+        },
+        "top_n": {
+            "type": "number",
+            "default": 5,
+            "minimum": 1,
+            "maximum": 10,
+            "description": (
+                "Only used with depth. How many of the largest results are kept at each level, "
+                "the rest are summed up in pruned. "
+                f"At most {max_drilldown_requests} nodes can be drilled into."
+            ),
+        },
     },
 }
 
@@ -1,12 +1,17 @@
+import asyncio
 from typing import Any
 
 from mcp.shared.exceptions import McpError
-from mcp.types import INVALID_PARAMS, ErrorData, Tool
+from mcp.types import INVALID_PARAMS, ErrorData, TextContent, Tool
 
 from utils.http import HttpClient
+from utils.reshape import get_transform
+from utils.serialization import dumps
 
 from .subawards_schemas import (
     input_schema,
+    max_award_ids,
+    max_pages_per_award,
     output_schema,
 )
 
@@ -19,6 +24,65 @@ tool_subawards = Tool(
 
 endpoint = "/api/v2/subawards/"
 
+award_concurrency = 8
+
+
+async def fetch_award_subawards(payload, max_pages, transform, semaphore):
+    """
+    Pages through the subawards of one award, keeping the first row seen for each id and
+    subaward_number. Rows without either are all kept since they cannot be told apart.
+    """
+    rows = []
+    seen = set()
+    page = payload["page"]
+    has_next = True
+    pages_fetched = 0
+    group = {"award_id": payload["award_id"]}
+    async with semaphore:
+        try:
+            while has_next and pages_fetched < max_pages:
+                post_client = HttpClient(
+                    endpoint=endpoint,
+                    method="POST",
+                    payload={**payload, "page": page},
+                    output_schema=output_schema,
+                )
+                body = await post_client.send_json()
+                for row in body.get("results", []):
+                    key = (row.get("id"), row.get("subaward_number"))
+                    if key != (None, None):
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    rows.append(row)
+                has_next = bool(body.get("page_metadata", {}).get("hasNext"))
+                pages_fetched += 1
+                page += 1
+        except McpError as e:
+            # One award that fails should not fail the others
+            group["error"] = e.error.message
+
+    group["pages_fetched"] = pages_fetched
+    # False when max_pages was reached before all the subawards were fetched
+    group["complete"] = not has_next
+    body = {"results": rows}
+    if transform is not None:
+        body = transform(body)
+    return {**group, **body}
+
+
+async def bulk_subawards(payload, award_ids, max_pages, transform):
+    semaphore = asyncio.Semaphore(award_concurrency)
+    groups = await asyncio.gather(
+        *[
+            fetch_award_subawards(
+                {**payload, "award_id": award_id}, max_pages, transform, semaphore
+            )
+            for award_id in award_ids
+        ]
+    )
+    return [TextContent(type="text", text=dumps({"awards": groups}))]
+
 
 async def call_tool_subawards(arguments: dict[str, Any]):
     page = arguments.get("page")
@@ -26,6 +90,15 @@ async def call_tool_subawards(arguments: dict[str, Any]):
     sort = arguments.get("sort")
     order = arguments.get("order")
     award_id = arguments.get("award_id")
+    award_ids = arguments.get("award_ids")
+    all_pages = arguments.get("all_pages", False)
+    max_pages = arguments.get("max_pages", max_pages_per_award)
+    output_format = arguments.get("output_format")
+    select = arguments.get("select")
+
+    # Bulk requests start from the first page of each award unless told otherwise
+    if page is None and award_ids is not None:
+        page = 1
 
     if page is None:
         raise McpError(
@@ -60,6 +133,34 @@ async def call_tool_subawards(arguments: dict[str, Any]):
     if limit is not None:
         payload["limit"] = limit
 
+    if award_ids is not None:
+        # The same award asked for twice is only fetched once
+        award_ids = list(dict.fromkeys(award_ids))
+        if len(award_ids) == 0 or len(award_ids) > max_award_ids:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"award_ids must contain between 1 and {max_award_ids} award ids.",
+                )
+            )
+        try:
+            max_pages = int(max_pages)
+        except (TypeError, ValueError):
+            max_pages = 0
+        if max_pages < 1:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="max_pages must be a whole number of 1 or more.",
+                )
+            )
+        return await bulk_subawards(
+            payload,
+            award_ids,
+            max_pages if all_pages else 1,
+            get_transform(output_format, select),
+        )
+
     if award_id is not None:
         payload["award_id"] = award_id
 
@@ -68,5 +169,7 @@ async def call_tool_subawards(arguments: dict[str, Any]):
         method="POST",
         payload=payload,
         output_schema=output_schema,
+        transform=get_transform(output_format, select),
+        prefetch=True,
     )
     return await post_client.send()
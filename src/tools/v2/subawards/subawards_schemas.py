@@ -1,9 +1,18 @@
+from tools.v2.config import output_format_object, select_object
+
+max_award_ids = 100
+max_pages_per_award = 10
+
 input_schema = {
     "type": "object",
-    "required": ["page", "sort", "order"],
+    "required": ["sort", "order"],
     "additionalProperties": False,
     "properties": {
-        "page": {"type": "number", "default": 1},
+        "page": {
+            "type": "number",
+            "default": 1,
+            "description": "Required unless award_ids is given, then it defaults to 1.",
+        },
         "limit": {"type": "number", "default": 10},
         "sort": {
             "type": "string",
@@ -26,6 +35,39 @@ input_schema = {
                 "Surrogate award ids retained for backward compatibility but are deprecated."
             ),
         },
+        "award_ids": {
+            "type": "array",
+            "items": {"type": "string"},
+            "minItems": 1,
+            "maxItems": max_award_ids,
+            "description": (
+                "Fetches the subawards of several awards at once instead of award_id. "
+                "The results are grouped by award in awards, each with its award_id, results, "
+                "pages_fetched and complete. "
+                "For example the generated_internal_id of the top awards from spending_by_award."
+            ),
+        },
+        "all_pages": {
+            "type": "boolean",
+            "default": False,
+            "description": (
+                "Only used with award_ids. "
+                "Fetches every page of subawards for each award, up to max_pages, "
+                "instead of only the requested page."
+            ),
+        },
+        "max_pages": {
+            "type": "number",
+            "default": max_pages_per_award,
+            "minimum": 1,
+            "maximum": 50,
+            "description": (
+                "Only used with award_ids and all_pages. The most pages fetched for each award, "
+                "complete is false for an award that has more."
+            ),
+        },
+        "output_format": output_format_object,
+        "select": select_object,
     },
 }
 
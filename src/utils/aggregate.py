@@ -0,0 +1,102 @@
+import heapq
+from itertools import count
+
+from utils.serialization import dumps
+
+"""
+A small group by that rows are streamed through one at a time.
+Only one entry per group is kept in memory, plus the top k rows of each group.
+So the memory used depends on the number of groups, not the number of rows.
+"""
+
+aggregate_functions = ["sum", "count", "min", "max"]
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Fields such as def_codes or Recipient Location are lists and objects, which cannot be dict keys
+def freeze(value):
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    return value
+
+
+class GroupBy:
+    def __init__(self, group_by: list[str], value_field: str, top_k: int = 0, top_k_fields=None):
+        if not isinstance(group_by, list) or len(group_by) == 0:
+            raise ValueError(f"Expected a non empty list for group_by but received {group_by=}.")
+
+        self.group_by = group_by
+        self.value_field = value_field
+        self.top_k = top_k
+        # The fields kept for each of the top k rows, by default the whole row
+        self.top_k_fields = top_k_fields
+        self.groups = {}
+        self.rows = 0
+        # Breaks ties in the heap so rows themselves are never compared
+        self.sequence = count()
+
+    def add(self, row: dict):
+        self.rows += 1
+        values = tuple(row.get(field) for field in self.group_by)
+        key = tuple(freeze(value) for value in values)
+        group = self.groups.get(key)
+        if group is None:
+            # The values as they were in the row are returned, not the frozen key
+            group = {"values": values, "count": 0, "sum": 0, "min": None, "max": None, "top": []}
+            self.groups[key] = group
+
+        group["count"] += 1
+        value = row.get(self.value_field)
+        if not is_number(value):
+            return
+
+        group["sum"] += value
+        if group["min"] is None or value < group["min"]:
+            group["min"] = value
+        if group["max"] is None or value > group["max"]:
+            group["max"] = value
+
+        if self.top_k > 0:
+            # Min heap of size top_k, the smallest of the top rows is replaced first
+            item = (value, next(self.sequence), self.get_top_row(row))
+            if len(group["top"]) < self.top_k:
+                heapq.heappush(group["top"], item)
+            elif value > group["top"][0][0]:
+                heapq.heapreplace(group["top"], item)
+
+    def add_rows(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def get_top_row(self, row: dict):
+        if self.top_k_fields is None:
+            return row
+        return {field: row.get(field) for field in self.top_k_fields if field in row}
+
+    def results(self, sort="sum", order="desc", limit=None):
+        results = []
+        for group in self.groups.values():
+            result = dict(zip(self.group_by, group["values"]))
+            result["count"] = group["count"]
+            result["sum"] = group["sum"]
+            result["min"] = group["min"]
+            result["max"] = group["max"]
+            if self.top_k > 0:
+                top = sorted(group["top"], key=lambda item: item[0], reverse=True)
+                result["top"] = [row for _, _, row in top]
+            results.append(result)
+
+        if sort not in aggregate_functions:
+            sort = "sum"
+
+        # min and max are None when a group never had a numeric value, keep those last
+        missing = [result for result in results if result[sort] is None]
+        results = [result for result in results if result[sort] is not None]
+        results.sort(key=lambda result: result[sort], reverse=order != "asc")
+        results += missing
+        if limit is not None:
+            results = results[:limit]
+        return results
@@ -0,0 +1,335 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+import zlib
+
+from httpx import Request, Response
+
+from utils.disk_cache import DiskCache
+
+"""
+An in memory cache of responses from the USA Spending API.
+Entries younger than the soft TTL are served as is.
+Entries between the soft and hard TTL are served as is while they are refreshed in the background.
+Entries older than the hard TTL are dropped so the request waits on the USA Spending API.
+
+Memory is bounded by the size of the bodies, MCP_CACHE_MAX_BYTES, rather than a count of entries,
+so a few large pages of awards do not push out many small reference responses.
+Entries are evicted with Greedy Dual Size Frequency, which keeps the small and often used ones.
+Bodies of at least MCP_CACHE_COMPRESS_THRESHOLD bytes are kept zlib compressed.
+Evicted entries go to the disk tier in utils/disk_cache.py when it is turned on.
+"""
+
+CACHE_MAX_BYTES = int(os.getenv("MCP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_COMPRESS_THRESHOLD = int(os.getenv("MCP_CACHE_COMPRESS_THRESHOLD", str(16 * 1024)))
+
+
+class CachePolicy:
+    def __init__(self, soft_ttl: float, hard_ttl: float):
+        if soft_ttl > hard_ttl:
+            raise ValueError(f"Expected soft_ttl <= hard_ttl but received {soft_ttl=} {hard_ttl=}.")
+
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+
+
+# Reference data such as budget functions only changes when new data is published
+reference_cache_policy = CachePolicy(soft_ttl=60 * 60, hard_ttl=24 * 60 * 60)
+
+# Results for fiscal periods that have closed are only revised in rare cases
+closed_period_cache_policy = CachePolicy(soft_ttl=24 * 60 * 60, hard_ttl=7 * 24 * 60 * 60)
+
+# Background refreshes are not part of a tool call so they need their own deadline
+refresh_timeout = 120
+
+# Seconds a rejected request is answered with the same error without asking again, 0 turns it off
+NEGATIVE_CACHE_TTL = float(os.getenv("MCP_NEGATIVE_CACHE_TTL", "60"))
+# Statuses the USA Spending API returns for the same request every time, such as a bad filter.
+# Rate limits and timeouts are left out since a retry can succeed
+negative_cache_statuses = [400, 404, 405, 410, 422]
+
+
+def get_request(response: Response) -> Request | None:
+    try:
+        return response.request
+    except RuntimeError:
+        return None
+
+
+def log_disk_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Unable to write to the disk cache due to {future.exception()=}")
+
+
+class CacheEntry:
+    def __init__(
+        self,
+        response: Response,
+        stored_at: float,
+        compress_threshold: int = 0,
+        policy: CachePolicy | None = None,
+    ):
+        self.stored_at = stored_at
+        # The policy the entry was fetched with, used to pick entries for snapshots
+        self.policy = policy
+        # How often the entry was used and its eviction priority, see ResponseCache.prioritize
+        self.hits = 1
+        self.priority = 0.0
+        self.sequence = 0
+        self.status_code = response.status_code
+        self.headers = response.headers.multi_items()
+        self.request = get_request(response)
+        self.extensions = response.extensions
+        self.compressed = None
+        self.cached_response = response
+
+        content = response.content
+        self.size = len(content)
+        if compress_threshold > 0 and len(content) >= compress_threshold:
+            compressed = zlib.compress(content)
+            if len(compressed) < len(content):
+                self.compressed = compressed
+                self.cached_response = None
+                self.size = len(compressed)
+
+    @property
+    def content(self) -> bytes:
+        if self.compressed is not None:
+            return zlib.decompress(self.compressed)
+        return self.cached_response.content
+
+    @property
+    def response(self) -> Response:
+        if self.cached_response is not None:
+            return self.cached_response
+        return Response(
+            status_code=self.status_code,
+            headers=self.headers,
+            content=self.content,
+            request=self.request,
+            extensions=self.extensions,
+        )
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_bytes: int = CACHE_MAX_BYTES,
+        compress_threshold: int = CACHE_COMPRESS_THRESHOLD,
+        disk: DiskCache | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self.disk = disk if disk is not None else DiskCache()
+        # The memory tier
+        self.entries = {}
+        self.bytes = 0
+        # Eviction candidates as (priority, sequence, key), lowest priority first.
+        # An entry that was used again gets a new sequence so its old candidate is skipped
+        self.candidates = []
+        self.sequences = itertools.count()
+        # Raised to the priority of each evicted entry so entries that were used long ago age out
+        self.inflation = 0.0
+        # Keep a reference to background refreshes so they are not garbage collected
+        # and so the same key is not refreshed twice at the same time
+        self.refreshing = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries or (self.disk.enabled and self.disk.contains(key))
+
+    def prioritize(self, key: str, entry: CacheEntry):
+        """Greedy Dual Size Frequency, every request costs the same so smaller entries win."""
+        entry.priority = self.inflation + entry.hits / max(entry.size, 1)
+        entry.sequence = next(self.sequences)
+        heapq.heappush(self.candidates, (entry.priority, entry.sequence, key))
+        # Drop the candidates of entries that were used again once they pile up
+        if len(self.candidates) > 4 * len(self.entries) + 64:
+            self.candidates = [
+                (entry.priority, entry.sequence, key) for key, entry in self.entries.items()
+            ]
+            heapq.heapify(self.candidates)
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Returns the entry in the memory tier, see promote for the disk tier."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.hits += 1
+            self.prioritize(key, entry)
+        return entry
+
+    async def promote(self, key: str) -> CacheEntry | None:
+        """Moves an entry from the disk tier back into memory, read on the disk thread."""
+        if not self.disk.enabled:
+            return None
+        try:
+            stored = await asyncio.wrap_future(self.disk.submit(self.disk.get, key))
+        except Exception as e:
+            print(f"Unable to read {key} from the disk cache due to {e=}")
+            return None
+        if stored is None:
+            return None
+        stored_at, status_code, headers, content, truncated = stored
+        # Keys start with the method and url, see get_cache_key
+        parts = key.split(" ", 2)
+        response = Response(
+            status_code=status_code,
+            headers=headers,
+            content=content,
+            request=Request(method=parts[0], url=parts[1]) if len(parts) > 1 else None,
+            extensions={"truncated": truncated},
+        )
+        # Wall clock time on disk, monotonic time in memory
+        self.put(key, response, time.monotonic() - (time.time() - stored_at))
+        return self.entries.get(key)
+
+    def set(self, key: str, response: Response, policy: CachePolicy | None = None):
+        self.put(key, response, time.monotonic(), policy)
+
+    def put(
+        self, key: str, response: Response, stored_at: float, policy: CachePolicy | None = None
+    ):
+        self.remove(key)
+        entry = CacheEntry(response, stored_at, self.compress_threshold, policy)
+        if entry.size > self.max_bytes:
+            self.spill(key, entry)
+            return
+        self.entries[key] = entry
+        self.bytes += entry.size
+        self.prioritize(key, entry)
+        self.evict()
+
+    def evict(self):
+        while self.bytes > self.max_bytes and len(self.candidates) > 0:
+            priority, sequence, key = heapq.heappop(self.candidates)
+            entry = self.entries.get(key)
+            if entry is None or entry.sequence != sequence:
+                continue
+            self.inflation = priority
+            self.remove(key)
+            self.spill(key, entry)
+
+    def spill(self, key: str, entry: CacheEntry):
+        if not self.disk.enabled:
+            return
+        # A body compressed in memory is written as is, the rest is compressed on the disk thread
+        compressed = entry.compressed is not None
+        future = self.disk.submit(
+            self.disk.set,
+            key,
+            time.time() - entry.age(),
+            entry.status_code,
+            entry.headers,
+            entry.compressed if compressed else entry.content,
+            bool(entry.extensions.get("truncated")),
+            compressed,
+        )
+        future.add_done_callback(log_disk_error)
+
+    def remove(self, key: str):
+        """Removes key from the memory tier only."""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def delete(self, key: str):
+        self.remove(key)
+        if self.disk.enabled:
+            self.disk.submit(self.disk.delete, key).add_done_callback(log_disk_error)
+
+    def clear(self):
+        self.entries.clear()
+        self.candidates.clear()
+        self.bytes = 0
+        self.inflation = 0.0
+        if self.disk.enabled:
+            # Waits so writes still queued do not land after the clear
+            self.disk.submit(self.disk.clear).result()
+
+    def revalidate(self, key: str, request, policy: CachePolicy | None = None):
+        """
+        Refresh the entry in the background using the request coroutine function.
+        The stale entry stays in place if the refresh fails.
+        """
+        if key in self.refreshing:
+            return
+
+        async def refresh():
+            try:
+                response = await asyncio.wait_for(request(), timeout=refresh_timeout)
+                if response.is_success:
+                    self.set(key, response, policy)
+                else:
+                    print(f"Background refresh of {key} returned {response.status_code}")
+            except Exception as e:
+                print(f"Background refresh of {key} failed due to {e=} with {type(e)=}")
+            finally:
+                self.refreshing.pop(key, None)
+
+        self.refreshing[key] = asyncio.get_running_loop().create_task(refresh())
+
+    async def fetch(self, key: str, policy: CachePolicy, request) -> Response:
+        """Returns the cached response for key or awaits the request coroutine function."""
+        entry = self.get(key)
+        if entry is None:
+            entry = await self.promote(key)
+        if entry is not None:
+            age = entry.age()
+            if age < policy.soft_ttl:
+                return entry.response
+            if age < policy.hard_ttl:
+                self.revalidate(key, request, policy)
+                return entry.response
+            self.delete(key)
+
+        response = await request()
+        if response.is_success:
+            self.set(key, response, policy)
+        return response
+
+
+class NegativeCache:
+    """
+    Agents often resend a request the USA Spending API rejected, such as mixed award type groups.
+    The rejection is kept for a short TTL so the retries fail right away.
+    """
+
+    def __init__(self, ttl: float = NEGATIVE_CACHE_TTL, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def get(self, key: str) -> Response | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.age() >= self.ttl:
+            del self.entries[key]
+            return None
+        return entry.response
+
+    def set(self, key: str, response: Response):
+        if self.ttl <= 0 or response.status_code not in negative_cache_statuses:
+            return
+        self.entries.pop(key, None)
+        self.entries[key] = CacheEntry(response, time.monotonic())
+        # The oldest rejection is dropped first
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def clear(self):
+        self.entries.clear()
+
+
+def get_cache_key(method: str, url: str, payload=None) -> str:
+    # Sort the keys so the same payload always results in the same key
+    return f"{method} {url} {json.dumps(payload, sort_keys=True, separators=(',', ':'))}"
+
+
+response_cache = ResponseCache()
+negative_cache = NegativeCache()
@@ -0,0 +1,66 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, ErrorData
+
+from utils.serialization import dumps, loads
+
+"""
+Opaque cursors for keyset pagination.
+Deep page numbers get slower upstream since every earlier page is skipped over.
+The USA Spending API can instead continue after the last record of the previous page,
+the cursor holds that record along with the sort and a hash of the query it belongs to.
+"""
+
+
+def get_query_hash(query: dict) -> str:
+    """Returns a short hash of query, such as the filters and fields of a request."""
+    text = json.dumps(query, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def encode_cursor(values: dict) -> str:
+    return base64.urlsafe_b64encode(dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, expected: dict) -> dict:
+    """
+    Returns the values in cursor.
+    The keys in expected, such as the sort, order and query hash,
+    must match the request the cursor is used in.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, dict):
+            raise ValueError("The cursor is not an object.")
+    except (binascii.Error, ValueError, AttributeError) as e:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="cursor is not valid.",
+                data="Use the page_metadata.cursor of the previous page as is.",
+            )
+        ) from e
+
+    for key, value in expected.items():
+        if key == "query" and values.get(key) != value:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="cursor was created for a request with different filters or fields.",
+                    data="Use the same filters and fields as the request that returned the cursor.",
+                )
+            )
+        if values.get(key) != value:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"cursor was created with {key}={values.get(key)} not {key}={value}.",
+                    data="Use the same sort and order as the request that returned the cursor.",
+                )
+            )
+    return values
@@ -1,4 +1,5 @@
-from datetime import date
+import calendar
+from datetime import date, timedelta
 
 from fiscalyear import FiscalDate, FiscalQuarter
 
@@ -29,6 +30,19 @@ def latest_fy_fq_with_data(lag=45):
     return fq.fiscal_year, fq.fiscal_quarter
 
 
+# The most recent FY/FQ whose data is complete, which is the quarter before latest_fy_fq_with_data
+# since that quarter can still be receiving data
+def last_closed_fy_fq(lag=45):
+    fy, fq = latest_fy_fq_with_data(lag=lag)
+    closed = FiscalQuarter(fy, fq).prev_fiscal_quarter
+    return closed.fiscal_year, closed.fiscal_quarter
+
+
+def fy_fq_end_date(fy, fq):
+    end = FiscalQuarter(fy, fq).end
+    return date(end.year, end.month, end.day)
+
+
 # Helper function to return T/F if there is a more recent fy fq
 def is_outdated_fy_fq(lower_fy, lower_fq, upper_fy, upper_fq):
     try:
@@ -47,6 +61,43 @@ def is_outdated_fy_fq(lower_fy, lower_fq, upper_fy, upper_fq):
     return None
 
 
+def date_to_fy(day: date) -> int:
+    return day.year + 1 if day.month >= 10 else day.year
+
+
+# Splits the dates from start to end into one window per fiscal year
+# Returns a list of (fiscal_year, window_start, window_end), the first and last may be partial
+def fiscal_year_windows(start: date, end: date):
+    windows = []
+    for fy in range(date_to_fy(start), date_to_fy(end) + 1):
+        window_start = max(start, date(fy - 1, 10, 1))
+        window_end = min(end, date(fy, 9, 30))
+        if window_start <= window_end:
+            windows.append((fy, window_start, window_end))
+    return windows
+
+
+# Fiscal periods are months, period 1 is October and period 12 is September
+def fiscal_period_end_date(fiscal_year, fiscal_period):
+    year = fiscal_year - 1 if fiscal_period <= 3 else fiscal_year
+    month = (fiscal_period + 8) % 12 + 1
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+# The USA Spending API publishes periods 1 and 2 together as period 2
+def next_fiscal_period(fiscal_year, fiscal_period):
+    if fiscal_period >= 12:
+        return fiscal_year + 1, 2
+    return fiscal_year, max(fiscal_period + 1, 2)
+
+
+# A fiscal year is closed once the data for its last quarter has been published,
+# which is about 45 days after September 30.
+# Results for a closed fiscal year are not expected to change
+def is_closed_fy(fiscal_year, lag=45):
+    return date.today() > date(fiscal_year, 9, 30) + timedelta(days=lag)
+
+
 # Many of these functions depend on quarter
 # Sometimes a period can be provided
 # Find out which period the quarter is in
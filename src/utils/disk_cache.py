@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+
+"""
+The second tier of the response cache, see utils/cache.py.
+Entries evicted from memory are written to a SQLite file in MCP_CACHE_DIR so they can still be
+served without a request to the USA Spending API. Bodies are stored zlib compressed and the
+least recently used entries are dropped once the file holds more than MCP_CACHE_DISK_MAX_BYTES.
+The disk tier is off unless MCP_CACHE_DIR is set.
+Compression and writes run in order on one thread of their own, see submit,
+so evicting an entry from memory does not block the event loop.
+"""
+
+CACHE_DIR = os.getenv("MCP_CACHE_DIR", "")
+CACHE_DISK_MAX_BYTES = int(os.getenv("MCP_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+schema = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    truncated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at);
+"""
+
+
+class DiskCache:
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_DISK_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.connection = None
+        # The total size of the entries, kept up to date instead of summed on every write
+        self.bytes = 0
+        # The connection is shared by the disk thread and membership tests on the event loop
+        self.lock = threading.RLock()
+        self.executor = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def connect(self) -> sqlite3.Connection:
+        with self.lock:
+            if self.connection is None:
+                os.makedirs(self.directory, exist_ok=True)
+                connection = sqlite3.connect(
+                    os.path.join(self.directory, "responses.db"), check_same_thread=False
+                )
+                connection.executescript(schema)
+                # Files written before the truncated column was added
+                columns = [row[1] for row in connection.execute("PRAGMA table_info(entries)")]
+                if "truncated" not in columns:
+                    with connection:
+                        connection.execute(
+                            "ALTER TABLE entries ADD COLUMN truncated INTEGER NOT NULL DEFAULT 0"
+                        )
+                (self.bytes,) = connection.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+                self.connection = connection
+            return self.connection
+
+    def submit(self, function, *args) -> Future:
+        """Runs function(*args) on the disk thread, after everything submitted before it."""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+            return self.executor.submit(function, *args)
+
+    def flush(self):
+        """Waits until everything submitted so far has been written."""
+        self.submit(lambda: None).result()
+
+    def contains(self, key: str) -> bool:
+        with self.lock:
+            (exists,) = (
+                self.connect()
+                .execute("SELECT EXISTS(SELECT 1 FROM entries WHERE key = ?)", (key,))
+                .fetchone()
+            )
+        return bool(exists)
+
+    def get(self, key: str) -> tuple[float, int, list, bytes, bool] | None:
+        """
+        Returns the wall clock time the entry was stored, its status, headers, body and whether
+        the body was cut off at MCP_MAX_RESPONSE_BYTES.
+        """
+        with self.lock:
+            connection = self.connect()
+            row = connection.execute(
+                "SELECT stored_at, status_code, headers, content, truncated "
+                "FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            with connection:
+                connection.execute(
+                    "UPDATE entries SET used_at = ? WHERE key = ?", (time.time(), key)
+                )
+        stored_at, status_code, headers, content, truncated = row
+        return (
+            stored_at,
+            status_code,
+            json.loads(headers),
+            zlib.decompress(content),
+            bool(truncated),
+        )
+
+    def set(
+        self,
+        key: str,
+        stored_at: float,
+        status_code: int,
+        headers: list,
+        content: bytes,
+        truncated: bool = False,
+        compressed: bool = False,
+    ):
+        """Stores the body, which is zlib compressed first unless compressed is true."""
+        if not compressed:
+            content = zlib.compress(content)
+        if len(content) > self.max_bytes:
+            return
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                self.bytes -= self.get_size(connection, key)
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries"
+                    " (key, stored_at, used_at, status_code, headers, content, size, truncated)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        stored_at,
+                        time.time(),
+                        status_code,
+                        json.dumps(headers),
+                        content,
+                        len(content),
+                        int(truncated),
+                    ),
+                )
+                self.bytes += len(content)
+                self.evict(connection)
+
+    def get_size(self, connection: sqlite3.Connection, key: str) -> int:
+        row = connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def evict(self, connection: sqlite3.Connection):
+        if self.bytes <= self.max_bytes:
+            return
+        for key, entry_size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY used_at"
+        ).fetchall():
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.bytes -= entry_size
+            if self.bytes <= self.max_bytes:
+                return
+
+    def delete(self, key: str):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                self.bytes -= self.get_size(connection, key)
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute("DELETE FROM entries")
+                self.bytes = 0
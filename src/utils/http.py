@@ -1,6 +1,10 @@
+import asyncio
+import os
+import random
 import urllib.parse
+from typing import Any
 
-from httpx import AsyncClient, Request, Response
+from httpx import AsyncClient, Request, Response, Timeout
 from jsonschema import ValidationError, validate
 from mcp.shared.exceptions import McpError
 from mcp.types import (
@@ -9,12 +13,42 @@ from mcp.types import (
     TextContent,
 )
 
+from utils.cache import CachePolicy, get_cache_key, negative_cache, response_cache
+from utils.offload import defer, offload
+from utils.prefetch import page_cache_policy, prefetcher
+from utils.serialization import dumps, loads
+from utils.truncate import salvage
+
 api_url = "https://api.usaspending.gov"
-client = AsyncClient(timeout=None)
+# Reads are not limited since some queries take minutes to aggregate upstream.
+# Instead each tool call has a deadline and is cancelled if the client goes away, see server.py
+client = AsyncClient(timeout=Timeout(None, connect=10.0))
+# Share of responses that are validated against the output schema, 1 validates all of them.
+# Validation only logs a warning so it is not worth parsing every large response on the hot path
+VALIDATION_SAMPLE_RATE = float(os.getenv("MCP_VALIDATION_SAMPLE_RATE", "0.1"))
+# Bodies are read up to this many bytes, larger results are cut down to the complete rows read.
+# This keeps a broad query from using up the context of the model, roughly 4 bytes per token
+MAX_RESPONSE_BYTES = int(os.getenv("MCP_MAX_RESPONSE_BYTES", str(512 * 1024)))
+
+# The body is decoded while it is read so these no longer describe it
+decoded_headers = ["content-encoding", "content-length", "transfer-encoding"]
 
 
 class HttpClient:
-    def __init__(self, endpoint: str, method: str, params=None, payload=None, output_schema=None):
+    def __init__(
+        self,
+        endpoint: str,
+        method: str,
+        params=None,
+        payload=None,
+        output_schema=None,
+        transform=None,
+        cache_policy: CachePolicy | None = None,
+        max_bytes: int | None = None,
+        prefetch: bool = False,
+        extract=None,
+        observer=None,
+    ):
         # Meant to catch mistakes, request to api_url alone would return no real results
         if not isinstance(endpoint, str):
             raise TypeError(f"Expected str for endpoint but received {type(endpoint)=}.")
@@ -28,6 +62,29 @@ class HttpClient:
         self.params = params
         self.payload = payload
         self.output_schema = output_schema
+        # Optional callable that reshapes the parsed response payload, see utils/reshape.py
+        self.transform = transform
+        # Responses are only cached for endpoints that opt in, see utils/cache.py
+        self.cache_policy = cache_policy
+        # Overrides MAX_RESPONSE_BYTES for tools that return larger or smaller results
+        self.max_bytes = max_bytes
+        # Paginated tools set this so the next page is fetched ahead of time, see utils/prefetch.py
+        self.prefetch = prefetch
+        # Optional function given the parsed payload of every complete successful response
+        # before it is transformed. It runs where the payload is parsed, so it must be picklable
+        self.extract = extract
+        # Optional callable given what extract returned, run on the event loop.
+        # Used to index what has been seen, see utils/recipient_index.py
+        self.observer = observer
+
+    def __getstate__(self):
+        # The observer holds state such as the recipient index that must not go to a process pool
+        state = self.__dict__.copy()
+        state["observer"] = None
+        return state
+
+    def should_validate(self) -> bool:
+        return self.output_schema is not None and random.random() < VALIDATION_SAMPLE_RATE
 
     def validate_response(self, response: Response) -> bool | None:
         """
@@ -43,7 +100,21 @@ class HttpClient:
             return None
 
         try:
-            payload = response.json()
+            payload = loads(response.content)
+        except Exception as e:
+            print(
+                "Warning the response did not contain the expected information. "
+                f"{e=} and {type(e)=}"
+            )
+            return False
+        return self.validate_payload(payload)
+
+    def validate_payload(self, payload) -> bool | None:
+        """Same as validate_response for a payload that has already been parsed."""
+        if self.output_schema is None:
+            return None
+
+        try:
             validate(instance=payload, schema=self.output_schema)
             return True
         except ValidationError as e:
@@ -59,46 +130,108 @@ class HttpClient:
             pass
         return False
 
+    def transform_response(self, response: Response) -> str:
+        """
+        Applies the transform to the parsed JSON and returns the minified result.
+        If the response is not JSON the text is returned untouched.
+        The parsed JSON is validated before it is transformed, so it is only parsed once.
+        """
+        if self.transform is None:
+            return response.text
+        return self.read_payload(response)[0]
+
+    def read_payload(self, response: Response) -> tuple[str, Any]:
+        """
+        Returns the text for the client and what extract returned for the parsed JSON.
+        The payload is validated and extracted from before the transform, which may change it.
+        """
+        try:
+            payload = loads(response.content)
+        except Exception as e:
+            print(f"Unable to parse the response as JSON so it will not be transformed {e=}")
+            return response.text, None
+
+        if self.should_validate():
+            self.validate_payload(payload)
+
+        extracted = None
+        if self.extract is not None:
+            try:
+                extracted = self.extract(payload)
+            except Exception as e:
+                print(f"Unable to extract from the response of {self.get_url()} due to {e=}")
+
+        if self.transform is None:
+            return response.text, extracted
+        return dumps(self.transform(payload)), extracted
+
+    def handle_observed_response(self, response: Response) -> tuple[list[TextContent], Any]:
+        """Same as handle_response for a successful response, along with what extract returned."""
+        text, extracted = self.read_payload(response)
+        return [TextContent(type="text", text=text)], extracted
+
+    def raise_status_error(self, response: Response):
+        print(
+            f"Non 2xx status code received {response.status_code} "
+            f"with response payload {response.text}"
+        )
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=(
+                    f"Received non 2xx response status code {response.status_code} "
+                    "from the USASpending API."
+                ),
+                data=(
+                    f"The {response.request.method} request to {str(response.request.url)} "
+                    f"with response payload {self.payload} "
+                    f"failed with HTTP status code {response.status_code} "
+                    f"and response payload {response.text}",
+                ),
+            )
+        )
+
     def handle_response(self, response: Response) -> list[TextContent]:
         if response.status_code >= 200 and response.status_code < 300:
-            print(response.text)
-            self.validate_response(response)
+            if self.transform is None and self.should_validate():
+                self.validate_response(response)
             return [
                 TextContent(
                     type="text",
-                    text=response.text,
+                    text=self.transform_response(response),
                 )
             ]
         else:
-            print(
-                f"Non 2xx status code received {response.status_code} "
-                f"with response payload {response.text}"
-            )
-            raise McpError(
-                ErrorData(
-                    code=INTERNAL_ERROR,
-                    message=(
-                        f"Received non 2xx response status code {response.status_code} "
-                        "from the USASpending API."
-                    ),
-                    data=(
-                        f"The {response.request.method} request to {str(response.request.url)} "
-                        f"with response payload {self.payload} "
-                        f"failed with HTTP status code {response.status_code} "
-                        f"and response payload {response.text}",
-                    ),
-                )
-            )
+            self.raise_status_error(response)
 
-    async def send(self):
+    def handle_truncated_response(self, response: Response) -> list[TextContent]:
+        """Returns the complete rows of a response that was cut off along with a summary."""
+        body = salvage(response.content, self.get_max_bytes())
+        summary = body.pop("truncated")
+        if self.transform is not None:
+            body = self.transform(body)
+        if isinstance(body, dict):
+            body["truncated"] = summary
+        return [TextContent(type="text", text=dumps(body))]
+
+    def get_max_bytes(self) -> int:
+        return self.max_bytes or MAX_RESPONSE_BYTES
+
+    def get_url(self) -> str:
         url = f"{api_url}{self.endpoint}"
         if self.params is not None:
             url = url + urllib.parse.urlencode(self.params)
+        return url
 
+    async def request(self) -> Response:
+        url = self.get_url()
         try:
             request = Request(method=self.method, url=url, json=self.payload)
-            response = await client.send(request)
-            return self.handle_response(response)
+            response = await client.send(request, stream=True)
+            try:
+                return await self.read_response(request, response)
+            finally:
+                await response.aclose()
         except Exception as e:
             print(f"Request to {url} failed due to {e=} with {type(e)=}")
             raise McpError(
@@ -108,3 +241,148 @@ class HttpClient:
                     data=(f"The request to {url} failed due to exception {e=} with {type(e)=}"),
                 )
             ) from e
+
+    async def read_response(self, request: Request, response: Response) -> Response:
+        """
+        Reads the body up to the byte cap, the rest of the body is never downloaded.
+        A response that was cut off has the truncated extension set.
+        """
+        max_bytes = self.get_max_bytes()
+        chunks = []
+        size = 0
+        truncated = False
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                truncated = True
+                break
+
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in decoded_headers
+        ]
+        return Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=b"".join(chunks),
+            request=request,
+            extensions={"truncated": truncated},
+        )
+
+    def get_cache_policy(self) -> CachePolicy | None:
+        # Pages are briefly cached while prefetching so the prefetched page can be served
+        if self.cache_policy is None and self.prefetch and prefetcher.enabled:
+            return page_cache_policy
+        return self.cache_policy
+
+    async def get_response(self) -> Response:
+        key = get_cache_key(self.method, self.get_url(), self.payload)
+        rejected = negative_cache.get(key)
+        if rejected is not None:
+            return rejected
+
+        cache_policy = self.get_cache_policy()
+        if cache_policy is None:
+            response = await self.request()
+        else:
+            await prefetcher.wait(key)
+            response = await response_cache.fetch(key, cache_policy, self.request)
+            prefetcher.consume(key)
+
+        negative_cache.set(key, response)
+        return response
+
+    def observe(self, extracted):
+        # Indexing is best effort, the response is returned either way
+        if self.observer is None:
+            return
+        try:
+            self.observer(extracted)
+        except Exception as e:
+            print(f"Unable to observe the response from {self.get_url()} due to {e=}")
+
+    def observe_response(self, response: Response, loop: asyncio.AbstractEventLoop):
+        """
+        Parses a response that was passed through to the client and hands what extract returned
+        to the observer on the event loop, which owns state such as the recipient index.
+        """
+        _, extracted = self.read_payload(response)
+        if extracted is not None:
+            try:
+                loop.call_soon_threadsafe(self.observe, extracted)
+            except RuntimeError:
+                # The event loop closed while the response was parsed
+                pass
+
+    async def send(self):
+        response = await self.get_response()
+        # Checked here since McpError does not survive the trip back from a process pool
+        if not response.is_success:
+            self.raise_status_error(response)
+
+        if response.extensions.get("truncated"):
+            return await offload(len(response.content), self.handle_truncated_response, response)
+
+        if self.prefetch:
+            prefetcher.prefetch_next_page(self, response)
+
+        if self.transform is None:
+            # Nothing to reshape, so the decoded body is returned without parsing it.
+            # It is indexed and a sample validated in the background once the client has it
+            if self.extract is not None:
+                defer(self.observe_response, response, asyncio.get_running_loop())
+            elif self.should_validate():
+                defer(self.validate_response, response)
+            return [TextContent(type="text", text=response.text)]
+
+        if self.extract is not None:
+            # The payload is parsed once for the transform and the observer
+            content, extracted = await offload(
+                len(response.content), self.handle_observed_response, response
+            )
+            if extracted is not None:
+                self.observe(extracted)
+            return content
+
+        # Parsing, validating and reshaping a large response would block the event loop
+        return await offload(len(response.content), self.handle_response, response)
+
+    async def send_json(self, salvage_truncated: bool = False):
+        """
+        Same as send except the parsed JSON payload is returned instead of TextContent.
+        Used by tools that combine several requests into one result.
+        A response that was cut off raises unless salvage_truncated is true,
+        then its complete rows are returned with a truncated summary.
+        """
+        response = await self.get_response()
+        if not response.is_success:
+            self.raise_status_error(response)
+        if response.extensions.get("truncated") and salvage_truncated:
+            return await offload(
+                len(response.content), salvage, response.content, self.get_max_bytes()
+            )
+        if response.extensions.get("truncated"):
+            raise McpError(
+                ErrorData(
+                    code=INTERNAL_ERROR,
+                    message=(
+                        f"The response from the USA Spending API was larger than "
+                        f"{self.get_max_bytes()} bytes."
+                    ),
+                    data=f"The request to {self.get_url()} with payload {self.payload}",
+                )
+            )
+
+        try:
+            return await offload(len(response.content), loads, response.content)
+        except Exception as e:
+            print(f"Unable to parse the response from {self.get_url()} as JSON {e=}")
+            raise McpError(
+                ErrorData(
+                    code=INTERNAL_ERROR,
+                    message="The USA Spending API did not return a JSON response.",
+                    data=f"The request to {self.get_url()} returned {response.text}",
+                )
+            ) from e
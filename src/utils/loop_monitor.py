@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+"""
+Measures how late the event loop runs its callbacks.
+A heartbeat task sleeps for a fixed interval and records how much later than expected it woke up.
+While the loop is blocked, a watchdog thread samples the stack of the loop thread,
+so a stall above the threshold is reported along with the code that caused it.
+For example a jsonschema.validate of a large response or the sync httpx.get of toptier_agencies.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeats
+LOOP_MONITOR_INTERVAL = float(os.getenv("MCP_LOOP_MONITOR_INTERVAL", "0.1"))
+# Seconds of lag before a stall is reported
+LOOP_LAG_THRESHOLD = float(os.getenv("MCP_LOOP_LAG_THRESHOLD", "0.1"))
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        threshold: float = LOOP_LAG_THRESHOLD,
+        max_samples: int = 1000,
+        max_stalls: int = 20,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = deque(maxlen=max_samples)
+        self.stalls = deque(maxlen=max_stalls)
+        self.beats = 0
+        self.stall_count = 0
+        self.max_lag = 0.0
+
+        self.task = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.loop_thread_id = None
+        self.last_beat = None
+        # The stack sampled by the watchdog during the current stall
+        self.stack = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+
+    def start(self):
+        """Starts the heartbeat on the running event loop and the watchdog thread."""
+        if self.running:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.get_running_loop().create_task(self.beat())
+        self.thread = threading.Thread(target=self.watch, name="loop-monitor", daemon=True)
+        self.thread.start()
+
+    async def stop(self):
+        if not self.running:
+            return
+        self.stopped.set()
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.thread.join()
+        self.task = None
+        self.thread = None
+
+    async def beat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.record(max(0.0, now - expected), now)
+
+    def record(self, lag: float, now: float):
+        with self.lock:
+            self.last_beat = now
+            stack = self.stack
+            self.stack = None
+
+        self.beats += 1
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag < self.threshold:
+            return
+
+        self.stall_count += 1
+        self.stalls.append(
+            {
+                "lag_ms": round(lag * 1000, 1),
+                "at": time.time(),
+                "stack": stack,
+            }
+        )
+        logger.warning(
+            f"Event loop was blocked for {lag * 1000:.1f} ms\n{stack or 'No stack sampled.'}"
+        )
+
+    def watch(self):
+        # Check a few times per threshold so the stack is sampled while the loop is still blocked
+        while not self.stopped.wait(self.threshold / 4):
+            with self.lock:
+                if self.stack is not None:
+                    continue
+                if time.monotonic() - self.last_beat < self.interval + self.threshold:
+                    continue
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    self.stack = "".join(traceback.format_stack(frame))
+
+    def metrics(self) -> dict:
+        samples = sorted(self.samples)
+        if samples:
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            mean = sum(samples) / len(samples)
+        else:
+            p99 = mean = 0.0
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "beats": self.beats,
+            "lag_ms": {
+                "last": round(self.samples[-1] * 1000, 3) if samples else 0.0,
+                "mean": round(mean * 1000, 3),
+                "p99": round(p99 * 1000, 3),
+                "max": round(self.max_lag * 1000, 3),
+            },
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+
+loop_monitor = LoopMonitor()
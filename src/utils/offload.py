@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+"""
+Runs CPU heavy work such as parsing, validating and reshaping a large response
+outside of the event loop, so one large response does not delay every other session.
+Work on bodies smaller than the threshold runs inline since handing it to a worker costs more.
+
+A thread pool is used by default. The GIL is still held while a thread parses,
+but the event loop gets to run every switch interval instead of waiting for the whole parse.
+A process pool avoids the GIL at the cost of pickling the response to the worker and back.
+
+Work nobody waits on, such as validating a response that was already returned, runs in a
+separate single thread so it never queues ahead of a parse a client is waiting for.
+At most MCP_BACKGROUND_QUEUE_SIZE of these are held at once, more are dropped.
+"""
+
+offload_executors = ["thread", "process"]
+
+# Responses at least this many bytes are handled by the worker pool
+OFFLOAD_THRESHOLD = int(os.getenv("MCP_OFFLOAD_THRESHOLD", str(256 * 1024)))
+OFFLOAD_EXECUTOR = os.getenv("MCP_OFFLOAD_EXECUTOR", "thread")
+OFFLOAD_WORKERS = int(os.getenv("MCP_OFFLOAD_WORKERS", str(min(4, os.cpu_count() or 1))))
+BACKGROUND_QUEUE_SIZE = int(os.getenv("MCP_BACKGROUND_QUEUE_SIZE", "16"))
+
+executor: Executor | None = None
+background_executor: ThreadPoolExecutor | None = None
+# Deferred work submitted and not yet finished, guarded by background_lock
+background_pending = 0
+background_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def get_executor() -> Executor:
+    """Creates the pool on first use so the server does not start idle processes."""
+    global executor
+    if executor is None:
+        if OFFLOAD_EXECUTOR not in offload_executors:
+            raise ValueError(
+                f"Expected MCP_OFFLOAD_EXECUTOR to be one of {offload_executors} "
+                f"but received {OFFLOAD_EXECUTOR}."
+            )
+        if OFFLOAD_EXECUTOR == "process":
+            executor = ProcessPoolExecutor(max_workers=OFFLOAD_WORKERS)
+        else:
+            executor = ThreadPoolExecutor(max_workers=OFFLOAD_WORKERS, thread_name_prefix="offload")
+    return executor
+
+
+def shutdown_executor():
+    global executor, background_executor, background_pending
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+    if background_executor is not None:
+        background_executor.shutdown(wait=False, cancel_futures=True)
+        background_executor = None
+    with background_lock:
+        background_pending = 0
+
+
+def finish_deferred(future):
+    global background_pending
+    with background_lock:
+        background_pending = max(background_pending - 1, 0)
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Deferred work failed {future.exception()=}")
+
+
+def defer(function, *args):
+    """
+    Runs function(*args) in the background thread without waiting on the result.
+    Returns None when BACKGROUND_QUEUE_SIZE calls are already waiting, the call is dropped.
+    """
+    global background_executor, background_pending
+    with background_lock:
+        if background_pending >= BACKGROUND_QUEUE_SIZE:
+            logger.warning(f"Dropped deferred {function=} since the background queue is full")
+            return None
+        background_pending += 1
+        if background_executor is None:
+            background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="background")
+        future = background_executor.submit(function, *args)
+    future.add_done_callback(finish_deferred)
+    return future
+
+
+async def offload(size: int, function, *args):
+    """
+    Returns function(*args), run in the worker pool when size is at least OFFLOAD_THRESHOLD.
+    With a process pool the function and its arguments must be picklable.
+    """
+    if size < OFFLOAD_THRESHOLD:
+        return function(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(function, *args))
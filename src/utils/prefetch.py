@@ -0,0 +1,122 @@
+import asyncio
+import copy
+import os
+import re
+import time
+
+from utils.cache import CachePolicy, get_cache_key, refresh_timeout, response_cache
+
+"""
+Agents usually ask for page N + 1 right after page N of recipient, subawards,
+federal_accounts and spending_by_award. When prefetching is turned on with MCP_PREFETCH_PAGES=1,
+page N + 1 is requested in the background once page N is served and stored in the response cache,
+so the follow up tool call does not wait on the USA Spending API.
+Prefetches are limited to MCP_PREFETCH_CONCURRENCY at a time and MCP_PREFETCH_MAX_BYTES
+of pages that have not been asked for yet. Pages nobody asks for are dropped after the page TTL.
+"""
+
+PREFETCH_PAGES = os.getenv("MCP_PREFETCH_PAGES", "").lower() in ["1", "true"]
+PREFETCH_CONCURRENCY = int(os.getenv("MCP_PREFETCH_CONCURRENCY", "4"))
+PREFETCH_MAX_BYTES = int(os.getenv("MCP_PREFETCH_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Paginated results change as new awards are loaded so they are only kept briefly
+page_cache_policy = CachePolicy(soft_ttl=5 * 60, hard_ttl=5 * 60)
+
+# The page metadata is found with a regex so page N does not have to be parsed
+has_next_pattern = re.compile(rb'"hasNext"\s*:\s*(true|false)')
+# recipient only returns the total number of results
+total_pattern = re.compile(rb'"total"\s*:\s*(\d+)')
+limit_pattern = re.compile(rb'"limit"\s*:\s*(\d+)')
+
+
+def has_next_page(content: bytes, page: int) -> bool:
+    match = has_next_pattern.search(content)
+    if match is not None:
+        return match.group(1) == b"true"
+
+    total = total_pattern.search(content)
+    limit = limit_pattern.search(content)
+    if total is not None and limit is not None:
+        return page * int(limit.group(1)) < int(total.group(1))
+    return False
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        enabled: bool = PREFETCH_PAGES,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        max_bytes: int = PREFETCH_MAX_BYTES,
+    ):
+        self.enabled = enabled
+        self.concurrency = concurrency
+        self.max_bytes = max_bytes
+        # Keep a reference to running prefetches so they are not garbage collected
+        self.tasks = {}
+        # The size and time of the pages prefetched but not asked for yet
+        self.prefetched = {}
+
+    def prune(self):
+        """Drops the prefetched pages nobody asked for within the page TTL."""
+        now = time.monotonic()
+        for key, (_, stored_at) in list(self.prefetched.items()):
+            if now - stored_at >= page_cache_policy.hard_ttl:
+                del self.prefetched[key]
+                response_cache.delete(key)
+
+    def prefetched_bytes(self) -> int:
+        self.prune()
+        return sum(size for size, _ in self.prefetched.values())
+
+    async def wait(self, key: str):
+        """Waits on the prefetch of key if it is still running, so the page is not sent twice."""
+        task = self.tasks.get(key)
+        if task is not None:
+            # Shielded so a cancelled tool call does not cancel the prefetch for everyone else
+            await asyncio.shield(task)
+
+    def consume(self, key: str):
+        """Called when a page is served, a prefetched page then counts as a normal cache entry."""
+        self.prefetched.pop(key, None)
+
+    def prefetch_next_page(self, http_client, response):
+        """Starts fetching the page after the one in response unless it is over budget."""
+        if not self.enabled or http_client.method != "POST":
+            return
+
+        payload = http_client.payload or {}
+        # The next keyset page depends on the last record, which would mean parsing the page
+        if "last_record_unique_id" in payload:
+            return
+        page = int(payload.get("page", 1))
+        if not has_next_page(response.content, page):
+            return
+
+        next_client = copy.copy(http_client)
+        next_client.payload = {**payload, "page": page + 1}
+        key = get_cache_key(next_client.method, next_client.get_url(), next_client.payload)
+        if key in self.tasks or key in response_cache:
+            return
+        if len(self.tasks) >= self.concurrency or self.prefetched_bytes() >= self.max_bytes:
+            return
+
+        async def prefetch():
+            try:
+                next_response = await asyncio.wait_for(next_client.request(), refresh_timeout)
+                size = len(next_response.content)
+                if (
+                    next_response.is_success
+                    and not next_response.extensions.get("truncated")
+                    and self.prefetched_bytes() + size <= self.max_bytes
+                ):
+                    response_cache.set(key, next_response)
+                    self.prefetched[key] = (size, time.monotonic())
+            except Exception as e:
+                print(f"Prefetch of {key} failed due to {e=} with {type(e)=}")
+            finally:
+                self.tasks.pop(key, None)
+
+        self.tasks[key] = asyncio.get_running_loop().create_task(prefetch())
+
+
+prefetcher = Prefetcher()
@@ -0,0 +1,198 @@
+import bisect
+import difflib
+import os
+import re
+
+"""
+An in process index of the recipients seen in recipient and spending_by_award responses.
+Agents often try several spellings of a company name before they find the right UEI,
+so names are looked up here first by exact name, then by prefix, then by a fuzzy match
+among the names that start with the same letter.
+Names are normalized so LOCKHEED MARTIN CORP and Lockheed Martin Corporation are the same.
+At most MCP_RECIPIENT_INDEX_SIZE recipients are kept, the least recently seen are dropped first.
+"""
+
+RECIPIENT_INDEX_SIZE = int(os.getenv("MCP_RECIPIENT_INDEX_SIZE", "50000"))
+
+# Suffixes that do not tell two recipients apart
+name_suffixes = {
+    "CO",
+    "COMPANY",
+    "CORP",
+    "CORPORATION",
+    "INC",
+    "INCORPORATED",
+    "LLC",
+    "LLP",
+    "LP",
+    "LTD",
+    "THE",
+}
+non_word = re.compile(r"[^A-Z0-9]+")
+
+recipient_levels = ["P", "C", "R"]
+
+# Close spellings are only looked for among this many names around the query, see search
+max_fuzzy_candidates = 2000
+
+
+def normalize_name(name: str) -> str:
+    words = non_word.sub(" ", name.upper()).split()
+    kept = [word for word in words if word not in name_suffixes]
+    # A name made only of suffixes, such as THE COMPANY, is kept as is
+    return " ".join(kept or words)
+
+
+# The recipient_id of the USA Spending API ends with the recipient level, for example abc-123-C
+def get_recipient_level(recipient_id) -> str | None:
+    if isinstance(recipient_id, str) and recipient_id[-2:-1] == "-":
+        level = recipient_id[-1]
+        if level in recipient_levels:
+            return level
+    return None
+
+
+# Called with the parsed payload wherever it is parsed, including a process pool,
+# so these only pull out the recipients and the index is updated on the event loop
+def get_recipients(body) -> list[dict]:
+    """Returns the recipients in the results of a recipient response."""
+    return [
+        {
+            "name": row.get("name"),
+            "uei": row.get("uei"),
+            "duns": row.get("duns"),
+            "recipient_id": row.get("id"),
+            "recipient_level": row.get("recipient_level"),
+        }
+        for row in (body.get("results") if isinstance(body, dict) else None) or []
+        if isinstance(row, dict)
+    ]
+
+
+def get_award_recipients(body) -> list[dict]:
+    """Returns the recipients in the results of a spending_by_award response."""
+    return [
+        {
+            "name": row.get("Recipient Name"),
+            "uei": row.get("Recipient UEI"),
+            "duns": row.get("Recipient DUNS Number"),
+            "recipient_id": row.get("recipient_id"),
+        }
+        for row in (body.get("results") if isinstance(body, dict) else None) or []
+        if isinstance(row, dict)
+    ]
+
+
+class RecipientIndex:
+    def __init__(self, max_entries: int = RECIPIENT_INDEX_SIZE):
+        self.max_entries = max_entries
+        # Recipients keyed by recipient_id, or UEI and DUNS when there is no id, oldest first
+        self.entries = {}
+        # The keys of the recipients with each normalized name
+        self.names = {}
+        # Normalized names in order, for prefix lookups
+        self.sorted_names = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.names.clear()
+        self.sorted_names.clear()
+
+    def add(self, name, uei=None, duns=None, recipient_id=None, recipient_level=None):
+        if not isinstance(name, str) or normalize_name(name) == "":
+            return
+        key = recipient_id or (uei, duns, name)
+        if key in self.entries:
+            self.remove(key)
+
+        normalized = normalize_name(name)
+        self.entries[key] = {
+            "name": name,
+            "uei": uei,
+            "duns": duns,
+            "id": recipient_id,
+            "recipient_level": recipient_level or get_recipient_level(recipient_id),
+            "normalized": normalized,
+        }
+        if normalized not in self.names:
+            self.names[normalized] = []
+            bisect.insort(self.sorted_names, normalized)
+        self.names[normalized].append(key)
+
+        while len(self.entries) > self.max_entries:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        entry = self.entries.pop(key)
+        keys = self.names[entry["normalized"]]
+        keys.remove(key)
+        if len(keys) == 0:
+            del self.names[entry["normalized"]]
+            index = bisect.bisect_left(self.sorted_names, entry["normalized"])
+            del self.sorted_names[index]
+
+    def add_all(self, recipients: list[dict]):
+        for recipient in recipients:
+            self.add(**recipient)
+
+    def add_recipients(self, body):
+        """Adds the results of a recipient response."""
+        self.add_all(get_recipients(body))
+
+    def add_awards(self, body):
+        """Adds the recipients of a spending_by_award response."""
+        self.add_all(get_award_recipients(body))
+
+    def get_prefix_names(self, prefix: str, limit: int) -> list[str]:
+        names = []
+        index = bisect.bisect_left(self.sorted_names, prefix)
+        while index < len(self.sorted_names) and len(names) < limit:
+            name = self.sorted_names[index]
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+            index += 1
+        return names
+
+    def get_fuzzy_candidates(self, normalized: str) -> list[str]:
+        """
+        Returns up to max_fuzzy_candidates names that start with the same letter as normalized,
+        taken from around where it sorts. Comparing against every name blocks the event loop.
+        """
+        start = bisect.bisect_left(self.sorted_names, normalized[0])
+        end = bisect.bisect_left(self.sorted_names, chr(ord(normalized[0]) + 1))
+        index = bisect.bisect_left(self.sorted_names, normalized, start, end)
+        low = max(start, min(index - max_fuzzy_candidates // 2, end - max_fuzzy_candidates))
+        return self.sorted_names[low : min(end, low + max_fuzzy_candidates)]
+
+    def search(self, query: str, limit: int = 10, cutoff: float = 0.8) -> list[dict]:
+        """
+        Returns up to limit recipients whose name matches query.
+        Exact matches come first, then names that start with query, then close spellings.
+        """
+        normalized = normalize_name(query)
+        if normalized == "":
+            return []
+
+        matches = {}
+        if normalized in self.names:
+            matches[normalized] = "exact"
+        for name in self.get_prefix_names(normalized, limit):
+            matches.setdefault(name, "prefix")
+        if len(matches) < limit:
+            candidates = self.get_fuzzy_candidates(normalized)
+            for name in difflib.get_close_matches(normalized, candidates, limit, cutoff):
+                matches.setdefault(name, "fuzzy")
+
+        results = []
+        for name, match in matches.items():
+            for key in self.names[name]:
+                entry = {k: v for k, v in self.entries[key].items() if k != "normalized"}
+                results.append({**entry, "match": match})
+        return results[:limit]
+
+
+recipient_index = RecipientIndex()
@@ -0,0 +1,145 @@
+import csv
+import io
+from functools import partial
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, ErrorData
+
+from utils.serialization import dumps
+
+"""
+Helpers to reshape the JSON returned by the USA Spending API before it is sent to the client.
+The list endpoints return row oriented results, so every field name is repeated in every row.
+For a page of 100 awards the field names can easily be the majority of the payload.
+The columnar and csv output formats list each field name once.
+A select list of dotted paths can also be used to drop fields and nulls nobody asked for.
+"""
+
+output_formats = ["json", "columnar", "csv"]
+
+
+# Field names in the order they were first seen
+# Rows do not always share the same keys so take the union of all of them
+def get_columns(rows):
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def to_columnar(rows):
+    columns = get_columns(rows)
+    return {
+        "columns": columns,
+        "rows": [[row.get(column) for column in columns] for row in rows],
+    }
+
+
+# Nested values such as Recipient Location are kept as JSON inside the cell
+def to_csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    return value
+
+
+def to_csv(rows):
+    columns = get_columns(rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([to_csv_cell(row.get(column)) for column in columns])
+    return buffer.getvalue()
+
+
+# Turn dotted paths into a tree where None means keep everything below that key
+# For example ["results.Award ID", "page_metadata"] -> {"results": {"Award ID": None}, ...}
+def parse_select(select):
+    tree = {}
+    for path in select:
+        *parents, leaf = [key for key in path.split(".") if key]
+        node = tree
+        for key in parents:
+            node = node.setdefault(key, {})
+            # A shorter path already keeps everything below it
+            if node is None:
+                break
+        else:
+            node[leaf] = None
+    return tree
+
+
+# Lists are projected element by element so "results.Award ID" applies to every row
+def project(value, tree):
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def strip_nulls(value):
+    if isinstance(value, dict):
+        return {key: strip_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [strip_nulls(item) for item in value]
+    return value
+
+
+# Only the results are reshaped, metadata such as page_metadata is left as is
+def reshape_results(body, output_format="json"):
+    if output_format == "json" or not isinstance(body, dict):
+        return body
+
+    rows = body.get("results")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        print(f"Unable to reshape results to {output_format} since they are not a list of objects")
+        return body
+
+    if output_format == "columnar":
+        body["results"] = to_columnar(rows)
+    elif output_format == "csv":
+        body["results"] = to_csv(rows)
+    return body
+
+
+def reshape(body, select=None, output_format="json"):
+    if select is not None:
+        body = strip_nulls(project(body, select))
+    return reshape_results(body, output_format)
+
+
+# Returns the transform used by HttpClient or None when the response can be passed through
+def get_transform(output_format=None, select=None):
+    if output_format is not None and output_format not in output_formats:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message=f"output_format must be one of {output_formats}.",
+            )
+        )
+
+    if select is not None and (
+        not isinstance(select, list)
+        or not all(isinstance(path, str) and path.strip(".") != "" for path in select)
+    ):
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message="select must be a list of dotted paths such as results.Award ID.",
+            )
+        )
+
+    if not select and (output_format is None or output_format == "json"):
+        return None
+
+    return partial(
+        reshape,
+        select=parse_select(select) if select else None,
+        output_format=output_format or "json",
+    )
@@ -0,0 +1,42 @@
+import json
+import os
+
+"""
+Encodes and decodes JSON for the whole server.
+orjson is used when it is installed since it is several times faster than the json module
+on the large responses returned by the USA Spending API. Install it with pip install orjson.
+Otherwise, or when MCP_JSON_BACKEND=json, the json module is used.
+Both backends return minified JSON with non ASCII characters left as is,
+numbers such as floats may still be written differently.
+"""
+
+JSON_BACKEND = os.getenv("MCP_JSON_BACKEND", "orjson")
+if JSON_BACKEND not in ["orjson", "json"]:
+    raise ValueError(f"Expected MCP_JSON_BACKEND to be orjson or json but received {JSON_BACKEND}.")
+
+orjson = None
+if JSON_BACKEND == "orjson":
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+
+backend = "orjson" if orjson is not None else "json"
+
+
+def dumps(value) -> str:
+    """Returns value as minified JSON."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            # orjson is stricter, for example integers larger than 64 bits or non str keys
+            pass
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: str | bytes):
+    """Parses JSON from str or bytes, raises a ValueError if data is not valid JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from httpx import Response
+
+from utils.cache import CachePolicy, ResponseCache, reference_cache_policy, response_cache
+from utils.serialization import dumps, loads
+
+"""
+Every deploy starts with an empty response cache, so the first requests for reference data
+and closed fiscal periods all wait on the USA Spending API.
+When MCP_CACHE_SNAPSHOT is set to a file path, the long lived entries that were used the most
+are written there on shutdown and loaded back on startup, see lifespan in server.py.
+Entries that expired while the server was down are skipped when the snapshot is loaded.
+
+A snapshot can also be built ahead of a deploy from a replay log of tool calls.
+Set MCP_REPLAY_LOG to a file path to record the tool calls the server receives, then run
+usaspending-mcp-snapshot replay.jsonl --output snapshot.jsonl.gz
+"""
+
+CACHE_SNAPSHOT = os.getenv("MCP_CACHE_SNAPSHOT", "")
+CACHE_SNAPSHOT_MAX_BYTES = int(os.getenv("MCP_CACHE_SNAPSHOT_MAX_BYTES", str(32 * 1024 * 1024)))
+REPLAY_LOG = os.getenv("MCP_REPLAY_LOG", "")
+
+snapshot_version = 1
+# Only entries kept at least as long as reference data are worth carrying across a restart
+snapshot_min_hard_ttl = reference_cache_policy.hard_ttl
+
+
+def get_hot_entries(cache: ResponseCache, max_bytes: int) -> list:
+    """Returns the (key, entry) of the long lived entries that were used the most."""
+    candidates = [
+        (key, entry)
+        for key, entry in cache.entries.items()
+        if entry.policy is not None
+        and entry.policy.hard_ttl >= snapshot_min_hard_ttl
+        and entry.age() < entry.policy.hard_ttl
+    ]
+    candidates.sort(key=lambda item: item[1].hits, reverse=True)
+
+    hot = []
+    size = 0
+    for key, entry in candidates:
+        if size + entry.size > max_bytes:
+            continue
+        hot.append((key, entry))
+        size += entry.size
+    return hot
+
+
+def write_snapshot(
+    path: str, cache: ResponseCache = response_cache, max_bytes: int = CACHE_SNAPSHOT_MAX_BYTES
+) -> int:
+    """Writes the hot entries of cache to path as gzipped JSON lines, returns how many."""
+    hot = get_hot_entries(cache, max_bytes)
+    now = time.time()
+    temporary = f"{path}.tmp"
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(temporary, "wt", encoding="utf-8") as file:
+        file.write(dumps({"version": snapshot_version, "created_at": now}) + "\n")
+        for key, entry in hot:
+            line = {
+                "key": key,
+                # Wall clock time since monotonic time does not carry across processes
+                "stored_at": now - entry.age(),
+                "soft_ttl": entry.policy.soft_ttl,
+                "hard_ttl": entry.policy.hard_ttl,
+                "status_code": entry.status_code,
+                "headers": entry.headers,
+                "content": base64.b64encode(entry.content).decode(),
+                "truncated": bool(entry.extensions.get("truncated")),
+            }
+            file.write(dumps(line) + "\n")
+    # A crash while writing leaves the previous snapshot in place
+    os.replace(temporary, path)
+    return len(hot)
+
+
+def load_snapshot(path: str, cache: ResponseCache = response_cache) -> int:
+    """Loads the entries in the snapshot at path that have not expired, returns how many."""
+    if not os.path.exists(path):
+        return 0
+
+    loaded = 0
+    now = time.time()
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = loads(file.readline())
+        if header.get("version") != snapshot_version:
+            print(f"Skipping the cache snapshot {path} with version {header.get('version')}")
+            return 0
+        for line in file:
+            entry = loads(line)
+            age = now - entry["stored_at"]
+            if age >= entry["hard_ttl"]:
+                continue
+            response = Response(
+                status_code=entry["status_code"],
+                headers=entry["headers"],
+                content=base64.b64decode(entry["content"]),
+                extensions={"truncated": entry.get("truncated", False)},
+            )
+            cache.put(
+                entry["key"],
+                response,
+                time.monotonic() - age,
+                CachePolicy(entry["soft_ttl"], entry["hard_ttl"]),
+            )
+            loaded += 1
+    return loaded
+
+
+class ReplayLog:
+    """
+    Appends tool calls to a file from a background thread,
+    so recording a call does not block the event loop on disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lines = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def write(self, line: str):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="replay-log", daemon=True)
+                self.thread.start()
+        self.lines.put(line)
+
+    def run(self):
+        try:
+            with open(self.path, "a", encoding="utf-8") as file:
+                while True:
+                    line = self.lines.get()
+                    if line is None:
+                        return
+                    file.write(line)
+                    # Flush once the calls that arrived together are written
+                    if self.lines.empty():
+                        file.flush()
+        except OSError as e:
+            print(f"Unable to write to the replay log {self.path} due to {e=}")
+
+    def close(self):
+        """Writes the calls still queued and stops the thread."""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.lines.put(None)
+            thread.join()
+
+
+replay_logs = {}
+
+
+def record_call(name: str, arguments: dict, path: str = REPLAY_LOG):
+    """Queues the tool call for the replay log when MCP_REPLAY_LOG is set."""
+    if not path:
+        return
+    if path not in replay_logs:
+        replay_logs[path] = ReplayLog(path)
+    replay_logs[path].write(json.dumps({"tool": name, "arguments": arguments}) + "\n")
+
+
+def close_replay_logs():
+    for replay_log in replay_logs.values():
+        replay_log.close()
+
+
+async def replay(replay_log: str, dispatch) -> tuple[int, int]:
+    """Sends every tool call in replay_log through dispatch, returns the calls made and failed."""
+    calls = 0
+    failures = 0
+    with open(replay_log, encoding="utf-8") as file:
+        for line in file:
+            if line.strip() == "":
+                continue
+            call = json.loads(line)
+            calls += 1
+            # One at a time so building a snapshot does not flood the USA Spending API
+            try:
+                await dispatch(call["tool"], call.get("arguments") or {})
+            except Exception as e:
+                failures += 1
+                print(f"Replaying {call['tool']} failed due to {e=}", file=sys.stderr)
+    return calls, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="usaspending-mcp-snapshot",
+        description="Builds a warm cache snapshot by replaying a log of tool calls.",
+    )
+    parser.add_argument("replay_log", help="JSON lines of {tool, arguments}, see MCP_REPLAY_LOG")
+    parser.add_argument(
+        "--output",
+        default=CACHE_SNAPSHOT or "cache-snapshot.jsonl.gz",
+        help="Where the snapshot is written, MCP_CACHE_SNAPSHOT by default",
+    )
+    args = parser.parse_args(argv)
+
+    # Imported here since the server loads every tool
+    from server import dispatch_tool
+
+    calls, failures = asyncio.run(replay(args.replay_log, dispatch_tool))
+    entries = write_snapshot(args.output)
+    print(
+        f"Replayed {calls} tool calls, {failures} failed, wrote {entries} entries to {args.output}"
+    )
+    return 0 if calls == 0 or failures < calls else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
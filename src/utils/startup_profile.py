@@ -0,0 +1,104 @@
+import builtins
+import contextlib
+import importlib.util
+import os
+import sys
+import time
+
+"""
+Profiles the cold start of the MCP server.
+Enable it with MCP_SERVER_PROFILE_STARTUP=1 or the --profile-startup flag.
+It records how long each module takes to import, how long datasets take to load,
+and how long schemas take to build, then prints a report sorted by the slowest first.
+The report is printed once the server is ready to accept requests.
+"""
+
+
+def is_requested() -> bool:
+    return os.getenv("MCP_SERVER_PROFILE_STARTUP", "").lower() in ["1", "true"] or (
+        "--profile-startup" in sys.argv
+    )
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.started_at = None
+        self.original_import = None
+        # Each record is [category, name, total seconds, self seconds]
+        self.records = []
+        # The records of the sections currently running, used to work out self time
+        self.stack = []
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started_at = time.perf_counter()
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.profiled_import
+
+    def disable(self):
+        self.enabled = False
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+
+    def profiled_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only the first import of a module costs anything, skip the rest quickly
+        try:
+            resolved = name
+            if level > 0:
+                package = (globals or {}).get("__package__") or ""
+                resolved = importlib.util.resolve_name("." * level + name, package)
+        except Exception:
+            resolved = name
+        if resolved in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        with self.section("import", resolved):
+            return self.original_import(name, globals, locals, fromlist, level)
+
+    @contextlib.contextmanager
+    def section(self, category: str, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        record = [category, name, 0.0, 0.0]
+        self.stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stack.pop()
+            record[2] = elapsed
+            record[3] += elapsed
+            # Time spent in this section is not self time of the parent
+            if self.stack:
+                self.stack[-1][3] -= elapsed
+            self.records.append(record)
+
+    def report(self, limit: int = 30) -> str:
+        # Nothing is reported once the profiler is disabled, so the report is printed only once
+        if not self.enabled:
+            return ""
+        elapsed = time.perf_counter() - self.started_at
+        totals = {}
+        for category, _, _, self_time in self.records:
+            totals[category] = totals.get(category, 0.0) + self_time
+
+        lines = [f"Startup profile, ready after {elapsed * 1000:.1f} ms"]
+        for category, total in sorted(totals.items(), key=lambda item: -item[1]):
+            lines.append(f"  {category:<10}{total * 1000:>10.1f} ms")
+        lines.append(f"  {'other':<10}{(elapsed - sum(totals.values())) * 1000:>10.1f} ms")
+
+        lines.append(f"{'category':<10}{'self ms':>10}{'total ms':>10}  name")
+        records = sorted(self.records, key=lambda record: -record[3])
+        for category, name, total, self_time in records[:limit]:
+            lines.append(f"{category:<10}{self_time * 1000:>10.1f}{total * 1000:>10.1f}  {name}")
+        return "\n".join(lines)
+
+
+startup_profiler = StartupProfiler()
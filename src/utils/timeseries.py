@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import date
+
+"""
+A local SQLite store of spending_over_time series.
+Amounts for fiscal quarters that have closed do not change, so once a series has been fetched
+only the periods after the last closed quarter need to be requested again.
+Each series is keyed by a hash of its canonical filters and its group,
+and every period is stored with its aggregated_amount, total_outlays and the full result.
+Set MCP_TIMESERIES_DB to a file path to keep the store across restarts, it is in memory by default.
+An empty MCP_TIMESERIES_DB turns the store off.
+At most MCP_TIMESERIES_MAX_SERIES series are kept, the least recently used are dropped first.
+"""
+
+TIMESERIES_DB = os.getenv("MCP_TIMESERIES_DB", ":memory:")
+TIMESERIES_MAX_SERIES = int(os.getenv("MCP_TIMESERIES_MAX_SERIES", "1000"))
+
+schema = """
+CREATE TABLE IF NOT EXISTS series (
+    filter_hash TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    closed_through TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (filter_hash, grp)
+);
+CREATE TABLE IF NOT EXISTS periods (
+    filter_hash TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    time_period TEXT NOT NULL,
+    aggregated_amount REAL,
+    total_outlays REAL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (filter_hash, grp, position)
+);
+"""
+
+
+def get_filter_hash(payload: dict, include_end_date: bool = False) -> str:
+    """
+    Hashes everything that determines the amounts of a series except the group,
+    and the end_date unless include_end_date is true.
+    Sorting the keys makes the hash the same however the filters were written.
+    """
+    canonical = {key: value for key, value in payload.items() if key != "group"}
+    filters = dict(canonical.get("filters", {}))
+    filters["time_period"] = [
+        {key: value for key, value in period.items() if include_end_date or key != "end_date"}
+        for period in filters.get("time_period", [])
+    ]
+    canonical["filters"] = filters
+    text = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class TimeSeriesStore:
+    def __init__(self, path: str = TIMESERIES_DB, max_series: int = TIMESERIES_MAX_SERIES):
+        self.path = path
+        self.max_series = max_series
+        self.connection = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            if self.path != ":memory:" and os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.executescript(schema)
+        return self.connection
+
+    def get(self, filter_hash: str, group: str) -> tuple[date | None, list]:
+        """Returns the date the series is stored through and its results in order."""
+        connection = self.connect()
+        row = connection.execute(
+            "SELECT closed_through FROM series WHERE filter_hash = ? AND grp = ?",
+            (filter_hash, group),
+        ).fetchone()
+        if row is None:
+            return None, []
+
+        with connection:
+            connection.execute(
+                "UPDATE series SET updated_at = ? WHERE filter_hash = ? AND grp = ?",
+                (time.time(), filter_hash, group),
+            )
+        results = connection.execute(
+            "SELECT result FROM periods WHERE filter_hash = ? AND grp = ? ORDER BY position",
+            (filter_hash, group),
+        ).fetchall()
+        return date.fromisoformat(row[0]), [json.loads(result) for (result,) in results]
+
+    def put(self, filter_hash: str, group: str, closed_through: date, results: list):
+        """Replaces the stored series with results, which cover the dates up to closed_through."""
+        connection = self.connect()
+        with connection:
+            connection.execute(
+                "DELETE FROM periods WHERE filter_hash = ? AND grp = ?", (filter_hash, group)
+            )
+            connection.executemany(
+                "INSERT INTO periods VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        filter_hash,
+                        group,
+                        position,
+                        json.dumps(result.get("time_period"), sort_keys=True),
+                        result.get("aggregated_amount"),
+                        result.get("total_outlays"),
+                        json.dumps(result),
+                    )
+                    for position, result in enumerate(results)
+                ],
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)",
+                (filter_hash, group, closed_through.isoformat(), time.time()),
+            )
+            self.evict(connection)
+
+    def evict(self, connection: sqlite3.Connection):
+        """Drops the least recently used series over max_series."""
+        stale = connection.execute(
+            "SELECT filter_hash, grp FROM series ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+            (self.max_series,),
+        ).fetchall()
+        for filter_hash, group in stale:
+            connection.execute(
+                "DELETE FROM periods WHERE filter_hash = ? AND grp = ?", (filter_hash, group)
+            )
+            connection.execute(
+                "DELETE FROM series WHERE filter_hash = ? AND grp = ?", (filter_hash, group)
+            )
+
+    def clear(self):
+        connection = self.connect()
+        with connection:
+            connection.execute("DELETE FROM periods")
+            connection.execute("DELETE FROM series")
+
+
+timeseries_store = TimeSeriesStore()
@@ -0,0 +1,124 @@
+import json
+import re
+
+from utils.aggregate import is_number
+
+"""
+Salvages a JSON response that was cut off at the byte cap, see MAX_RESPONSE_BYTES in utils/http.py.
+The USA Spending API returns objects with a results list, such as
+{"limit": 100, "results": [{...}, {...}, ...], "page_metadata": {...}}.
+The prefix that was read is decoded one value at a time, so every complete row
+before the cut is kept and the partial row is dropped.
+A summary of what was kept and a hint on how to get the rest is added to the result.
+"""
+
+decoder = json.JSONDecoder()
+whitespace = re.compile(r"[ \t\n\r]*")
+
+# Numeric fields with these words in their name are totaled in the summary, ids are not
+total_field_words = ["amount", "outlay", "obligat", "budget"]
+
+
+def skip_whitespace(text: str, index: int) -> int:
+    return whitespace.match(text, index).end()
+
+
+def decode_value(text: str, index: int, closing: str):
+    """
+    Returns the value at index and the index after it.
+    The value only counts as complete when it is followed by a comma or the closing bracket,
+    otherwise a number such as 12 could be the start of 1234 that was cut off.
+    """
+    value, end = decoder.raw_decode(text, index)
+    end = skip_whitespace(text, end)
+    if end >= len(text) or text[end] not in f",{closing}":
+        raise ValueError("The value was cut off.")
+    return value, end
+
+
+def decode_rows(text: str, index: int) -> tuple[list, int, bool]:
+    """Decodes the array starting after the [ at index, returns the rows, end and if it closed."""
+    rows = []
+    while True:
+        index = skip_whitespace(text, index)
+        if text.startswith("]", index):
+            return rows, index + 1, True
+        try:
+            row, index = decode_value(text, index, "]")
+        except ValueError:
+            return rows, index, False
+        rows.append(row)
+        if text.startswith(",", index):
+            index += 1
+
+
+def decode_prefix(text: str) -> tuple[dict, bool]:
+    """Returns the complete keys of the object in text and if the results were cut off."""
+    body = {}
+    index = skip_whitespace(text, 0)
+    if not text.startswith("{", index):
+        return body, True
+    index += 1
+
+    while True:
+        index = skip_whitespace(text, index)
+        if text.startswith("}", index):
+            return body, False
+        try:
+            key, index = decoder.raw_decode(text, index)
+            index = skip_whitespace(text, index)
+            if not text.startswith(":", index):
+                return body, True
+            index = skip_whitespace(text, index + 1)
+            if key == "results" and text.startswith("[", index):
+                rows, index, complete = decode_rows(text, index + 1)
+                body["results"] = rows
+                if not complete:
+                    return body, True
+                index = skip_whitespace(text, index)
+            else:
+                body[key], index = decode_value(text, index, "}")
+        except ValueError:
+            return body, True
+        if not text.startswith(",", index):
+            return body, False
+        index += 1
+
+
+def get_totals(rows: list) -> dict:
+    totals = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        for field, value in row.items():
+            if is_number(value) and any(word in field.lower() for word in total_field_words):
+                totals[field] = totals.get(field, 0) + value
+    return totals
+
+
+def salvage(content: bytes, max_bytes: int) -> dict:
+    """Returns the complete rows within the first max_bytes of content with a summary."""
+    # A character split by the cut can only be part of the row that is dropped anyway
+    text = content[:max_bytes].decode("utf-8", errors="ignore")
+    body, _ = decode_prefix(text)
+    rows = body.get("results", [])
+    if not isinstance(rows, list):
+        rows = []
+
+    body["truncated"] = {
+        "max_bytes": max_bytes,
+        "rows_returned": len(rows),
+        "totals": get_totals(rows),
+        "hint": (
+            f"The response was larger than {max_bytes} bytes so it was cut off after "
+            f"{len(rows)} complete results and any fields after results, such as "
+            "page_metadata, are missing. "
+            + (
+                f"Request limit={len(rows)} and page through the rest, "
+                if len(rows) > 0
+                else "Request a smaller limit, "
+            )
+            + "select fewer fields, or narrow the filters."
+        ),
+    }
+    return body
@@ -0,0 +1,36 @@
+import pytest
+
+from tools.v2.references.total_budgetary_resources.total_budgetary_resources import (
+    budgetary_resources_history,
+)
+from utils.cache import negative_cache, response_cache
+from utils.recipient_index import recipient_index
+from utils.timeseries import timeseries_store
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Responses cached by one test should not be returned in another test."""
+    response_cache.clear()
+    negative_cache.clear()
+    budgetary_resources_history.clear()
+    yield
+    response_cache.clear()
+    negative_cache.clear()
+    budgetary_resources_history.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_timeseries_store():
+    """Series stored by one test should not be served in another test."""
+    timeseries_store.clear()
+    yield
+    timeseries_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_recipient_index():
+    """Recipients seen by one test should not be found in another test."""
+    recipient_index.clear()
+    yield
+    recipient_index.clear()
@@ -0,0 +1,96 @@
+import pytest
+
+from utils.aggregate import GroupBy
+
+rows = [
+    {"Award ID": "1", "Recipient Name": "A", "State": "VA", "Award Amount": 10},
+    {"Award ID": "2", "Recipient Name": "B", "State": "VA", "Award Amount": 30},
+    {"Award ID": "3", "Recipient Name": "A", "State": "MD", "Award Amount": 5},
+    {"Award ID": "4", "Recipient Name": "A", "State": "VA", "Award Amount": 50},
+    {"Award ID": "5", "Recipient Name": "C", "State": "VA", "Award Amount": None},
+]
+
+
+class TestGroupBy:
+    def test_requires_group_by(self):
+        with pytest.raises(ValueError) as err:
+            GroupBy([], "Award Amount")
+        assert "Expected a non empty list for group_by" in str(err.value)
+
+    def test_aggregates(self):
+        aggregator = GroupBy(["Recipient Name"], "Award Amount")
+        aggregator.add_rows(rows)
+        assert aggregator.rows == 5
+        assert aggregator.results() == [
+            {"Recipient Name": "A", "count": 3, "sum": 65, "min": 5, "max": 50},
+            {"Recipient Name": "B", "count": 1, "sum": 30, "min": 30, "max": 30},
+            {"Recipient Name": "C", "count": 1, "sum": 0, "min": None, "max": None},
+        ]
+
+    def test_multiple_group_by_fields(self):
+        aggregator = GroupBy(["Recipient Name", "State"], "Award Amount")
+        aggregator.add_rows(rows)
+        results = aggregator.results(sort="count")
+        assert results[0] == {
+            "Recipient Name": "A",
+            "State": "VA",
+            "count": 2,
+            "sum": 60,
+            "min": 10,
+            "max": 50,
+        }
+        assert len(results) == 4
+
+    def test_top_k(self):
+        aggregator = GroupBy(["State"], "Award Amount", top_k=2, top_k_fields=["Award ID"])
+        aggregator.add_rows(rows)
+        results = aggregator.results()
+        assert results[0]["State"] == "VA"
+        assert results[0]["top"] == [{"Award ID": "4"}, {"Award ID": "2"}]
+        assert results[1]["top"] == [{"Award ID": "3"}]
+
+    def test_missing_values_sorted_last(self):
+        aggregator = GroupBy(["Recipient Name"], "Award Amount")
+        aggregator.add_rows(rows)
+        results = aggregator.results(sort="min", order="asc")
+        assert [result["Recipient Name"] for result in results] == ["A", "B", "C"]
+
+    def test_limit(self):
+        aggregator = GroupBy(["Recipient Name"], "Award Amount")
+        aggregator.add_rows(rows)
+        assert len(aggregator.results(limit=1)) == 1
+
+    def test_one_entry_per_group(self):
+        aggregator = GroupBy(["State"], "Award Amount", top_k=1)
+        aggregator.add_rows(rows * 1000)
+        assert len(aggregator.groups) == 2
+        assert all(len(group["top"]) == 1 for group in aggregator.groups.values())
+
+    def test_group_by_list_and_object_fields(self):
+        location = {"state_code": "VA", "city_name": "RESTON"}
+        aggregator = GroupBy(["def_codes", "Recipient Location"], "Award Amount")
+        aggregator.add_rows(
+            [
+                {"def_codes": ["L", "M"], "Recipient Location": location, "Award Amount": 10},
+                {"def_codes": ["L", "M"], "Recipient Location": dict(location), "Award Amount": 5},
+                {"def_codes": ["N"], "Recipient Location": location, "Award Amount": 1},
+            ]
+        )
+        assert aggregator.results() == [
+            {
+                "def_codes": ["L", "M"],
+                "Recipient Location": location,
+                "count": 2,
+                "sum": 15,
+                "min": 5,
+                "max": 10,
+            },
+            {
+                "def_codes": ["N"],
+                "Recipient Location": location,
+                "count": 1,
+                "sum": 1,
+                "min": 1,
+                "max": 1,
+            },
+        ]
@@ -0,0 +1,328 @@
+# Unit tests for the stale-while-revalidate response cache
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import Request, Response
+from mcp.shared.exceptions import McpError
+
+from utils.cache import (
+    CachePolicy,
+    NegativeCache,
+    ResponseCache,
+    get_cache_key,
+    negative_cache,
+    response_cache,
+)
+from utils.disk_cache import DiskCache
+from utils.http import HttpClient
+
+policy = CachePolicy(soft_ttl=60, hard_ttl=600)
+
+
+def age_entry(cache, key, seconds):
+    cache.get(key).stored_at -= seconds
+
+
+class TestCachePolicy:
+    def test_soft_ttl_greater_than_hard_ttl(self):
+        with pytest.raises(ValueError) as err:
+            CachePolicy(soft_ttl=10, hard_ttl=1)
+        assert "Expected soft_ttl <= hard_ttl" in str(err.value)
+
+
+class TestGetCacheKey:
+    def test_payload_key_order_does_not_matter(self):
+        first = get_cache_key("POST", "/", {"a": 1, "b": {"c": 2, "d": 3}})
+        second = get_cache_key("POST", "/", {"b": {"d": 3, "c": 2}, "a": 1})
+        assert first == second
+
+    def test_method_and_url_are_part_of_key(self):
+        assert get_cache_key("GET", "/a") != get_cache_key("GET", "/b")
+        assert get_cache_key("GET", "/a") != get_cache_key("POST", "/a")
+
+
+class TestResponseCache:
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self):
+        cache = ResponseCache()
+        request = AsyncMock(return_value=Response(status_code=200, text="ok"))
+        first = await cache.fetch("key", policy, request)
+        second = await cache.fetch("key", policy, request)
+        request.assert_awaited_once()
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        cache = ResponseCache()
+        request = AsyncMock(return_value=Response(status_code=500))
+        await cache.fetch("key", policy, request)
+        await cache.fetch("key", policy, request)
+        assert request.await_count == 2
+        assert cache.get("key") is None
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_is_served_and_refreshed(self):
+        cache = ResponseCache()
+        stale = Response(status_code=200, text="stale")
+        fresh = Response(status_code=200, text="fresh")
+        request = AsyncMock(side_effect=[stale, fresh])
+        await cache.fetch("key", policy, request)
+        age_entry(cache, "key", 120)
+
+        response = await cache.fetch("key", policy, request)
+        assert response is stale
+        assert "key" in cache.refreshing
+        await cache.refreshing["key"]
+        assert request.await_count == 2
+        assert cache.get("key").response is fresh
+        assert cache.get("key").age() < policy.soft_ttl
+        assert "key" not in cache.refreshing
+
+    @pytest.mark.asyncio
+    async def test_one_refresh_per_key(self):
+        cache = ResponseCache()
+        request = AsyncMock(return_value=Response(status_code=200, text="ok"))
+        await cache.fetch("key", policy, request)
+        age_entry(cache, "key", 120)
+        await cache.fetch("key", policy, request)
+        await cache.fetch("key", policy, request)
+        await asyncio.gather(*cache.refreshing.values())
+        assert request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_entry(self):
+        cache = ResponseCache()
+        stale = Response(status_code=200, text="stale")
+        request = AsyncMock(side_effect=[stale, Exception("boom")])
+        await cache.fetch("key", policy, request)
+        age_entry(cache, "key", 120)
+        await cache.fetch("key", policy, request)
+        await cache.refreshing["key"]
+        assert cache.get("key").response is stale
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_waits_on_request(self):
+        cache = ResponseCache()
+        expired = Response(status_code=200, text="expired")
+        fresh = Response(status_code=200, text="fresh")
+        request = AsyncMock(side_effect=[expired, fresh])
+        await cache.fetch("key", policy, request)
+        age_entry(cache, "key", 6000)
+        response = await cache.fetch("key", policy, request)
+        assert response is fresh
+        assert cache.refreshing == {}
+
+
+class TestHttpClientCache:
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_cache_policy(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={"x": 1})
+        get_client = HttpClient(method="GET", endpoint="/", cache_policy=policy)
+        await get_client.send()
+        res = await get_client.send()
+        mock_send.assert_called_once()
+        assert res[0].text == '{"x":1}'
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_no_cache_policy(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={"x": 1})
+        get_client = HttpClient(method="GET", endpoint="/")
+        await get_client.send()
+        await get_client.send()
+        assert mock_send.call_count == 2
+        assert response_cache.entries == {}
+
+
+class TestNegativeCache:
+    def test_rejection_kept_until_ttl(self):
+        cache = NegativeCache(ttl=60)
+        rejected = Response(status_code=422, text="bad filters")
+        cache.set("key", rejected)
+        assert cache.get("key") is rejected
+        cache.entries["key"].stored_at -= 60
+        assert cache.get("key") is None
+        assert cache.entries == {}
+
+    def test_retryable_statuses_not_kept(self):
+        cache = NegativeCache(ttl=60)
+        for status_code in [200, 408, 429, 500, 503]:
+            cache.set(str(status_code), Response(status_code=status_code))
+        assert cache.entries == {}
+
+    def test_disabled(self):
+        cache = NegativeCache(ttl=0)
+        cache.set("key", Response(status_code=400))
+        assert cache.get("key") is None
+
+    def test_oldest_dropped(self):
+        cache = NegativeCache(ttl=60, max_entries=2)
+        for key in ["a", "b", "c"]:
+            cache.set(key, Response(status_code=400))
+        assert list(cache.entries) == ["b", "c"]
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_rejected_request_not_resent(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=422, text="bad filters", request=Request(method="POST", url="/")
+        )
+        for _ in range(2):
+            post_client = HttpClient(method="POST", endpoint="/", payload={"a": 1, "b": 2})
+            with pytest.raises(McpError) as err:
+                await post_client.send()
+            assert "Received non 2xx response status code 422" in str(err.value)
+        mock_send.assert_called_once()
+
+        # A different payload is still sent
+        post_client = HttpClient(method="POST", endpoint="/", payload={"a": 1})
+        with pytest.raises(McpError):
+            await post_client.send()
+        assert mock_send.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_rate_limited_request_resent(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=429, text="slow down", request=Request(method="GET", url="/")
+        )
+        get_client = HttpClient(method="GET", endpoint="/")
+        for _ in range(2):
+            with pytest.raises(McpError):
+                await get_client.send()
+        assert mock_send.call_count == 2
+        assert negative_cache.entries == {}
+
+
+class TestTieredCache:
+    def test_large_entries_compressed(self):
+        cache = ResponseCache(compress_threshold=100)
+        body = {"results": [{"Award ID": "ABC", "Award Amount": 1.5}] * 50}
+        cache.set("large", Response(status_code=200, json=body))
+        cache.set("small", Response(status_code=200, json={"x": 1}))
+
+        large = cache.get("large")
+        assert large.compressed is not None
+        assert large.size < len(large.content)
+        assert json.loads(large.response.content) == body
+        assert cache.get("small").compressed is None
+        assert cache.bytes == large.size + len(b'{"x":1}')
+
+    def test_size_aware_eviction(self):
+        cache = ResponseCache(max_bytes=1000, compress_threshold=0)
+        for key in ["a", "b", "c"]:
+            cache.set(key, Response(status_code=200, content=b"x" * 100))
+        cache.get("a")
+        # The large entry is evicted before the small ones that fit along with it
+        cache.set("large", Response(status_code=200, content=b"x" * 700))
+        cache.set("d", Response(status_code=200, content=b"x" * 100))
+        assert sorted(cache.entries) == ["a", "b", "c", "d"]
+        assert cache.bytes == 400
+
+        # Entries larger than the whole cache are not kept
+        cache.set("huge", Response(status_code=200, content=b"x" * 1001))
+        assert "huge" not in cache.entries
+
+    def test_least_used_small_entry_evicted(self):
+        cache = ResponseCache(max_bytes=300, compress_threshold=0)
+        for key in ["a", "b", "c"]:
+            cache.set(key, Response(status_code=200, content=b"x" * 100))
+        cache.get("a")
+        cache.get("c")
+        cache.set("d", Response(status_code=200, content=b"x" * 100))
+        assert sorted(cache.entries) == ["a", "c", "d"]
+
+    @pytest.mark.asyncio
+    async def test_evicted_entries_served_from_disk(self, tmp_path):
+        cache = ResponseCache(
+            max_bytes=150, compress_threshold=0, disk=DiskCache(str(tmp_path), 10_000)
+        )
+        key = get_cache_key("GET", "https://api.usaspending.gov/a")
+        cache.set(key, Response(status_code=200, json={"x": "a" * 100}))
+        cache.entries[key].stored_at -= 30
+        cache.set("other", Response(status_code=200, content=b"x" * 100))
+        assert key not in cache.entries
+        # Spilled on the disk thread
+        cache.disk.flush()
+        assert key in cache
+        assert cache.get(key) is None
+
+        entry = await cache.promote(key)
+        assert json.loads(entry.response.content) == {"x": "a" * 100}
+        assert entry.response.headers["content-type"] == "application/json"
+        assert entry.response.request.url == "https://api.usaspending.gov/a"
+        # The age is kept across tiers so the entry expires when it would have in memory
+        assert 29 < entry.age() < 60
+
+        cache.delete(key)
+        cache.disk.flush()
+        assert key not in cache
+        (size,) = cache.disk.connect().execute("SELECT SUM(size) FROM entries").fetchone()
+        assert cache.disk.bytes == size
+
+    @pytest.mark.asyncio
+    async def test_truncated_flag_kept_on_disk(self, tmp_path):
+        cache = ResponseCache(
+            max_bytes=150, compress_threshold=0, disk=DiskCache(str(tmp_path), 10_000)
+        )
+        key = get_cache_key("GET", "https://api.usaspending.gov/a")
+        cache.set(
+            key,
+            Response(
+                status_code=200, content=b'{"x": "' + b"a" * 100, extensions={"truncated": True}
+            ),
+        )
+        cache.set("other", Response(status_code=200, content=b"x" * 100))
+        assert key not in cache.entries
+
+        entry = await cache.promote(key)
+        assert key in cache.entries
+        assert entry.response.extensions["truncated"] is True
+
+    def test_disk_least_recently_used_dropped(self, tmp_path):
+        disk = DiskCache(str(tmp_path), max_bytes=100)
+        content = bytes(range(40))
+        for key in ["a", "b", "c"]:
+            disk.set(key, time.time(), 200, [], content)
+        assert disk.get("a") is None
+        assert disk.get("c")[3] == content
+        # The running total matches what is on disk
+        (size,) = disk.connect().execute("SELECT SUM(size) FROM entries").fetchone()
+        assert disk.bytes == size
+        reopened = DiskCache(str(tmp_path), max_bytes=100)
+        reopened.connect()
+        assert reopened.bytes == size
+        assert disk.contains("c")
+        assert not disk.contains("a")
+
+    @pytest.mark.asyncio
+    async def test_fetch_promotes_compressed_entry(self, tmp_path):
+        cache = ResponseCache(
+            max_bytes=1000, compress_threshold=10, disk=DiskCache(str(tmp_path), 10_000)
+        )
+        key = get_cache_key("GET", "https://api.usaspending.gov/a")
+        body = {"x": [0] * 200}
+        cache.set(key, Response(status_code=200, json=body))
+        entry = cache.entries[key]
+        assert entry.compressed is not None
+        # Evicted as is, the compressed body is written without compressing it again
+        cache.remove(key)
+        cache.spill(key, entry)
+
+        request = AsyncMock()
+        response = await cache.fetch(key, policy, request)
+        request.assert_not_called()
+        assert json.loads(response.content) == body
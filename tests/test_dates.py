@@ -1,11 +1,19 @@
+from datetime import date
 from unittest.mock import patch
 
 from fiscalyear import FiscalQuarter
 from freezegun import freeze_time
 
 from utils.dates import (
+    date_to_fy,
+    fiscal_period_end_date,
+    fiscal_year_windows,
+    fy_fq_end_date,
+    is_closed_fy,
     is_outdated_fy_fq,
+    last_closed_fy_fq,
     latest_fy_fq_with_data,
+    next_fiscal_period,
     period_to_quarter,
 )
 
@@ -85,3 +93,63 @@ class TestPeriodToQuarter:
         for i in [0, 13, -100, 100]:
             quarter = period_to_quarter(i)
             assert quarter is None
+
+
+class TestFiscalYearWindows:
+    def test_date_to_fy(self):
+        assert date_to_fy(date(2023, 9, 30)) == 2023
+        assert date_to_fy(date(2023, 10, 1)) == 2024
+
+    def test_partial_first_and_last_window(self):
+        windows = fiscal_year_windows(date(2021, 3, 15), date(2023, 11, 2))
+        assert windows == [
+            (2021, date(2021, 3, 15), date(2021, 9, 30)),
+            (2022, date(2021, 10, 1), date(2022, 9, 30)),
+            (2023, date(2022, 10, 1), date(2023, 9, 30)),
+            (2024, date(2023, 10, 1), date(2023, 11, 2)),
+        ]
+
+    def test_single_fiscal_year(self):
+        windows = fiscal_year_windows(date(2022, 10, 1), date(2023, 9, 30))
+        assert windows == [(2023, date(2022, 10, 1), date(2023, 9, 30))]
+
+    def test_end_before_start(self):
+        assert fiscal_year_windows(date(2023, 1, 1), date(2022, 1, 1)) == []
+
+
+class TestIsClosedFy:
+    @freeze_time("2025-11-10")
+    def test_last_quarter_not_published(self):
+        assert is_closed_fy(2024) is True
+        assert is_closed_fy(2025) is False
+
+    @freeze_time("2025-11-20")
+    def test_last_quarter_published(self):
+        assert is_closed_fy(2025) is True
+        assert is_closed_fy(2026) is False
+
+
+class TestLastClosedFyFq:
+    @freeze_time("2024-03-01")
+    def test_quarter_before_latest_with_data(self):
+        assert latest_fy_fq_with_data() == (2024, 2)
+        assert last_closed_fy_fq() == (2024, 1)
+        assert fy_fq_end_date(2024, 1) == date(2023, 12, 31)
+
+    @freeze_time("2024-01-20")
+    def test_across_fiscal_years(self):
+        assert last_closed_fy_fq() == (2023, 3)
+        assert fy_fq_end_date(2023, 3) == date(2023, 6, 30)
+
+
+class TestFiscalPeriods:
+    def test_fiscal_period_end_date(self):
+        assert fiscal_period_end_date(2024, 1) == date(2023, 10, 31)
+        assert fiscal_period_end_date(2024, 3) == date(2023, 12, 31)
+        assert fiscal_period_end_date(2024, 5) == date(2024, 2, 29)
+        assert fiscal_period_end_date(2024, 12) == date(2024, 9, 30)
+
+    def test_next_fiscal_period(self):
+        assert next_fiscal_period(2024, 1) == (2024, 2)
+        assert next_fiscal_period(2024, 6) == (2024, 7)
+        assert next_fiscal_period(2024, 12) == (2025, 2)
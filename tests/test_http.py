@@ -1,7 +1,9 @@
 # Unit tests to test HttpClient
 
+import asyncio
 import json
-from unittest.mock import patch
+import pickle
+from unittest.mock import MagicMock, patch
 
 import pytest
 from httpx import Request, Response, TimeoutException
@@ -12,6 +14,9 @@ from mcp.types import (
 from validation import Validation
 
 from utils.http import HttpClient
+from utils.recipient_index import get_award_recipients
+from utils.reshape import get_transform
+from utils.serialization import loads
 
 
 class TestHttpClientInit:
@@ -55,7 +60,19 @@ class TestHttpClientInit:
         """
         http_client = HttpClient(endpoint="", method="")
         instance_vars = vars(http_client)
-        expected_vars = ["endpoint", "method", "params", "payload", "output_schema"]
+        expected_vars = [
+            "endpoint",
+            "method",
+            "params",
+            "payload",
+            "output_schema",
+            "transform",
+            "cache_policy",
+            "max_bytes",
+            "prefetch",
+            "extract",
+            "observer",
+        ]
         assert len(instance_vars) == len(expected_vars)
         assert sorted(instance_vars) == sorted(expected_vars)
 
@@ -64,7 +81,9 @@ class TestHttpClientInit:
         mandatory_vars = ["endpoint", "method"]
         http_client_vars = vars(http_client)
         for var in http_client_vars:
-            if var not in mandatory_vars:
+            if var == "prefetch":
+                assert http_client_vars[var] is False
+            elif var not in mandatory_vars:
                 assert http_client_vars[var] is None
 
 
@@ -128,6 +147,21 @@ class TestValidateResponse:
         assert result is False
 
 
+class TestValidatePayload:
+    def test_no_response_schema(self):
+        http_client = HttpClient(endpoint="", method="")
+        assert http_client.validate_payload({"x": 69}) is None
+
+    def test_valid_payload(self):
+        http_client = HttpClient(
+            endpoint="",
+            method="",
+            output_schema={"type": "object", "properties": {"x": {"type": "number"}}},
+        )
+        assert http_client.validate_payload({"x": 69}) is True
+        assert http_client.validate_payload({"x": "69"}) is False
+
+
 class TestHandleResponse(Validation):
     def test_2xx_status_code_response(self):
         http_client = HttpClient(endpoint="", method="")
@@ -161,6 +195,145 @@ class TestHandleResponse(Validation):
         assert "Received non 2xx response status code 500" in str(err.value)
 
 
+class TestTransformResponse:
+    def test_no_transform(self):
+        http_client = HttpClient(endpoint="", method="")
+        text = http_client.transform_response(Response(status_code=200, json={"x": 1}))
+        assert text == '{"x":1}'
+
+    def test_transform_is_applied(self):
+        http_client = HttpClient(endpoint="", method="", transform=lambda body: body["x"])
+        text = http_client.transform_response(Response(status_code=200, json={"x": [1, 2]}))
+        assert text == "[1,2]"
+
+    def test_non_json_response(self):
+        http_client = HttpClient(endpoint="", method="", transform=lambda body: body["x"])
+        text = http_client.transform_response(Response(status_code=200, text="hello world"))
+        assert text == "hello world"
+
+
+class TestPassThrough(Validation):
+    @pytest.mark.asyncio
+    @patch("utils.http.VALIDATION_SAMPLE_RATE", 1)
+    @patch("utils.http.defer")
+    @patch("utils.http.client.send")
+    async def test_body_passed_through_and_checked_later(self, mock_send, mock_defer):
+        text = '{"x": 1,  "y": [1, 2]}'
+        mock_send.return_value = Response(status_code=200, text=text)
+        get_client = HttpClient(method="GET", endpoint="/", output_schema={"type": "object"})
+        res = await get_client.send()
+        # The upstream body is returned as is, not parsed and serialized again
+        self.validate_text_content(res, text=text)
+        mock_defer.assert_called_once()
+        function, response = mock_defer.call_args.args
+        assert function == get_client.validate_response
+        assert response.text == text
+
+    @pytest.mark.asyncio
+    @patch("utils.http.VALIDATION_SAMPLE_RATE", 0)
+    @patch("utils.http.defer")
+    @patch("utils.http.client.send")
+    async def test_validation_sampled_out(self, mock_send, mock_defer):
+        mock_send.return_value = Response(status_code=200, json={"x": 1})
+        get_client = HttpClient(method="GET", endpoint="/", output_schema={"type": "object"})
+        await get_client.send()
+        mock_defer.assert_not_called()
+
+    @patch("utils.http.VALIDATION_SAMPLE_RATE", 1)
+    def test_transform_validates_before_transforming(self):
+        def transform(body):
+            body["x"] = "transformed"
+            return body
+
+        http_client = HttpClient(
+            endpoint="", method="", output_schema={"type": "object"}, transform=transform
+        )
+        validated = []
+        http_client.validate_payload = lambda payload: validated.append(dict(payload))
+        text = http_client.transform_response(Response(status_code=200, json={"x": 1}))
+        assert validated == [{"x": 1}]
+        assert text == '{"x":"transformed"}'
+
+
+class TestObserver(Validation):
+    @pytest.mark.asyncio
+    @patch("utils.http.defer")
+    @patch("utils.http.loads", wraps=loads)
+    @patch("utils.http.client.send")
+    async def test_plain_path_not_parsed(self, mock_send, mock_loads, mock_defer):
+        text = '{"results": [1]}'
+        mock_send.return_value = Response(status_code=200, text=text)
+        observer = MagicMock()
+        get_client = HttpClient(
+            method="GET", endpoint="/", extract=lambda body: body["results"], observer=observer
+        )
+        res = await get_client.send()
+        # The body is returned as is and only parsed once deferred work runs
+        self.validate_text_content(res, text=text)
+        mock_loads.assert_not_called()
+        observer.assert_not_called()
+
+        function, response, loop = mock_defer.call_args.args
+        assert function == get_client.observe_response
+        function(response, loop)
+        mock_loads.assert_called_once()
+        await asyncio.sleep(0)
+        observer.assert_called_once_with([1])
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_observer_called_from_background(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={"results": [1]})
+        observed = asyncio.Event()
+        get_client = HttpClient(
+            method="GET",
+            endpoint="/",
+            extract=lambda body: body["results"],
+            observer=lambda extracted: observed.set(),
+        )
+        await get_client.send()
+        await asyncio.wait_for(observed.wait(), 5)
+
+    @pytest.mark.asyncio
+    @patch("utils.http.loads", wraps=loads)
+    @patch("utils.http.client.send")
+    async def test_extracted_before_transform(self, mock_send, mock_loads):
+        mock_send.return_value = Response(status_code=200, json={"results": [{"x": 1}]})
+        observer = MagicMock()
+        get_client = HttpClient(
+            method="GET",
+            endpoint="/",
+            transform=get_transform("columnar"),
+            extract=lambda body: body["results"],
+            observer=observer,
+        )
+        res = await get_client.send()
+        assert json.loads(res[0].text) == {"results": {"columns": ["x"], "rows": [[1]]}}
+        observer.assert_called_once_with([{"x": 1}])
+        # Parsed once for both the client and the observer
+        mock_loads.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_observer_failure_ignored(self, mock_send):
+        mock_send.return_value = Response(status_code=200, text="not json")
+        observer = MagicMock()
+        get_client = HttpClient(
+            method="GET", endpoint="/", transform=lambda body: body, extract=list, observer=observer
+        )
+        res = await get_client.send()
+        self.validate_text_content(res, text="not json")
+        observer.assert_not_called()
+
+    def test_observer_not_pickled(self):
+        get_client = HttpClient(
+            method="GET", endpoint="/", extract=get_award_recipients, observer=MagicMock()
+        )
+        restored = pickle.loads(pickle.dumps(get_client))
+        assert restored.observer is None
+        assert restored.extract is get_award_recipients
+
+
 class TestSuccessfulSends(Validation):
     @pytest.mark.asyncio
     @patch(
@@ -258,3 +431,42 @@ class TestUnsuccessfulSends:
             await get_client.send()
         mock_send.assert_called_once()
         assert err.value.error.code == INTERNAL_ERROR
+
+
+class TestSendJson:
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_200_json_response(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={"yo": "whatup"})
+        get_client = HttpClient(method="GET", endpoint="/")
+        res = await get_client.send_json()
+        mock_send.assert_called_once()
+        assert res == {"yo": "whatup"}
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_200_text_response(self, mock_send):
+        mock_send.return_value = Response(status_code=200, text="ok")
+        get_client = HttpClient(method="GET", endpoint="/")
+        with pytest.raises(McpError) as err:
+            await get_client.send_json()
+        assert err.value.error.code == INTERNAL_ERROR
+        assert "did not return a JSON response" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_400_response(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=400, text="Bad Request", request=Request(method="", url="")
+        )
+        get_client = HttpClient(method="GET", endpoint="/")
+        with pytest.raises(McpError) as err:
+            await get_client.send_json()
+        assert err.value.error.code == INTERNAL_ERROR
+        assert "Received non 2xx response status code 400" in err.value.error.message
@@ -0,0 +1,54 @@
+# Unit tests for the event loop lag monitor
+
+import asyncio
+import time
+
+import pytest
+
+from utils.loop_monitor import LoopMonitor
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    @pytest.mark.asyncio
+    async def test_records_lag(self):
+        monitor = LoopMonitor(interval=0.01, threshold=1)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        metrics = monitor.metrics()
+        assert metrics["running"] is False
+        assert metrics["beats"] > 0
+        assert metrics["stalls"] == 0
+        assert metrics["lag_ms"]["max"] < 1000
+
+    @pytest.mark.asyncio
+    async def test_stall_sampled_stack(self):
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        metrics = monitor.metrics()
+        assert metrics["stalls"] == 1
+        stall = metrics["recent_stalls"][0]
+        assert stall["lag_ms"] >= 200
+        # The stack points at the code that blocked the loop
+        assert "block_the_loop" in stall["stack"]
+
+    @pytest.mark.asyncio
+    async def test_start_twice(self):
+        monitor = LoopMonitor(interval=0.01, threshold=1)
+        monitor.start()
+        task = monitor.task
+        monitor.start()
+        assert monitor.task is task
+        await monitor.stop()
+        await monitor.stop()
+        assert monitor.running is False
@@ -0,0 +1,107 @@
+# Unit tests for offloading CPU heavy work to a worker pool
+
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from httpx import Request, Response
+from mcp.shared.exceptions import McpError
+from validation import Validation
+
+import utils.offload
+from utils.http import HttpClient
+from utils.offload import defer, get_executor, offload, shutdown_executor
+from utils.reshape import get_transform
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    shutdown_executor()
+    yield
+    shutdown_executor()
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+class TestOffload:
+    @pytest.mark.asyncio
+    @patch("utils.offload.OFFLOAD_THRESHOLD", 100)
+    async def test_small_work_runs_inline(self):
+        assert await offload(99, current_thread_name) == threading.current_thread().name
+        assert utils.offload.executor is None
+
+    @pytest.mark.asyncio
+    @patch("utils.offload.OFFLOAD_THRESHOLD", 100)
+    async def test_large_work_runs_in_thread_pool(self):
+        assert (await offload(100, current_thread_name)).startswith("offload")
+
+    @pytest.mark.asyncio
+    @patch("utils.offload.OFFLOAD_THRESHOLD", 0)
+    @patch("utils.offload.OFFLOAD_EXECUTOR", "process")
+    async def test_large_work_runs_in_process_pool(self):
+        assert await offload(1, current_thread_name) == "MainThread"
+        assert await offload(1, sorted, [3, 1, 2]) == [1, 2, 3]
+
+    def test_defer_runs_in_background_thread(self):
+        future = defer(current_thread_name)
+        assert future.result(timeout=5).startswith("background")
+
+    @patch("utils.offload.BACKGROUND_QUEUE_SIZE", 2)
+    def test_defer_drops_work_when_full(self):
+        release = threading.Event()
+        futures = [defer(release.wait, 5) for _ in range(3)]
+        assert futures[2] is None
+        release.set()
+        assert all(future.result(timeout=5) for future in futures[:2])
+        # Room is made once deferred work finishes
+        assert defer(current_thread_name).result(timeout=5).startswith("background")
+
+    @patch("utils.offload.OFFLOAD_EXECUTOR", "fibers")
+    def test_unknown_executor(self):
+        with pytest.raises(ValueError) as err:
+            get_executor()
+        assert "MCP_OFFLOAD_EXECUTOR" in str(err.value)
+
+
+class TestOffloadedSend(Validation):
+    @pytest.mark.asyncio
+    @patch("utils.offload.OFFLOAD_THRESHOLD", 0)
+    @patch("utils.offload.OFFLOAD_EXECUTOR", "process")
+    @patch("utils.http.client.send")
+    async def test_transform_in_process_pool(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=200, json={"results": [{"x": 1, "y": None}, {"x": 2, "y": 3}]}
+        )
+        get_client = HttpClient(
+            method="GET",
+            endpoint="/",
+            output_schema={"type": "object"},
+            transform=get_transform("columnar", ["results.x"]),
+        )
+        res = await get_client.send()
+        self.validate_text_content(res, validate_text=False)
+        assert json.loads(res[0].text) == {"results": {"columns": ["x"], "rows": [[1], [2]]}}
+
+    @pytest.mark.asyncio
+    @patch("utils.offload.OFFLOAD_THRESHOLD", 0)
+    @patch("utils.offload.OFFLOAD_EXECUTOR", "process")
+    @patch("utils.http.client.send")
+    async def test_status_error_raised_before_offload(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=422, text="bad filters", request=Request(method="GET", url="/")
+        )
+        get_client = HttpClient(method="GET", endpoint="/")
+        with pytest.raises(McpError) as err:
+            await get_client.send()
+        assert "Received non 2xx response status code 422" in str(err.value)
+
+    @pytest.mark.asyncio
+    @patch("utils.offload.OFFLOAD_THRESHOLD", 0)
+    @patch("utils.http.client.send")
+    async def test_send_json_in_thread_pool(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={"results": [1, 2]})
+        get_client = HttpClient(method="GET", endpoint="/")
+        assert await get_client.send_json() == {"results": [1, 2]}
@@ -0,0 +1,140 @@
+# Unit tests for prefetching the next page of paginated tools
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from httpx import Response
+
+from utils.cache import response_cache
+from utils.http import HttpClient
+from utils.prefetch import Prefetcher, has_next_page, page_cache_policy
+
+
+def page_response(request, **kwargs):
+    page = json.loads(request.content)["page"]
+    body = {"results": [{"page": page}], "page_metadata": {"page": page, "hasNext": page < 3}}
+    return Response(status_code=200, json=body)
+
+
+async def send_page(page):
+    post_client = HttpClient(
+        endpoint="/api/v2/subawards/", method="POST", payload={"page": page}, prefetch=True
+    )
+    return await post_client.send()
+
+
+async def wait_for_prefetches(prefetcher):
+    await asyncio.gather(*prefetcher.tasks.values())
+
+
+class TestHasNextPage:
+    def test_has_next(self):
+        assert has_next_page(b'{"page_metadata":{"page":1,"hasNext": true}}', 1) is True
+        assert has_next_page(b'{"page_metadata":{"page":1,"hasNext":false}}', 1) is False
+
+    def test_total(self):
+        content = b'{"page_metadata":{"page":2,"limit":10,"total":25}}'
+        assert has_next_page(content, 2) is True
+        assert has_next_page(content, 3) is False
+
+    def test_no_page_metadata(self):
+        assert has_next_page(b'{"results":[]}', 1) is False
+
+
+class TestPrefetcher:
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_next_page_served_from_cache(self, mock_send):
+        mock_send.side_effect = page_response
+        prefetcher = Prefetcher(enabled=True)
+        with patch("utils.http.prefetcher", prefetcher):
+            await send_page(1)
+            await wait_for_prefetches(prefetcher)
+            assert mock_send.call_count == 2
+            assert len(prefetcher.prefetched) == 1
+
+            res = await send_page(2)
+            assert json.loads(res[0].text)["results"] == [{"page": 2}]
+            # Serving page 2 prefetched page 3
+            await wait_for_prefetches(prefetcher)
+            assert mock_send.call_count == 3
+            assert len(prefetcher.prefetched) == 1
+
+            # There is no page 4
+            await send_page(3)
+            await wait_for_prefetches(prefetcher)
+            assert mock_send.call_count == 3
+            assert prefetcher.prefetched == {}
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_page_asked_for_while_prefetching(self, mock_send):
+        release = asyncio.Event()
+
+        async def slow_page_response(request, **kwargs):
+            if json.loads(request.content)["page"] == 2:
+                await release.wait()
+            return page_response(request)
+
+        mock_send.side_effect = slow_page_response
+        prefetcher = Prefetcher(enabled=True)
+        with patch("utils.http.prefetcher", prefetcher):
+            await send_page(1)
+            assert len(prefetcher.tasks) == 1
+            page = asyncio.create_task(send_page(2))
+            await asyncio.sleep(0)
+            release.set()
+            res = await page
+            assert json.loads(res[0].text)["results"] == [{"page": 2}]
+            await wait_for_prefetches(prefetcher)
+        # Pages 1, 2 and the prefetch of page 3, page 2 was not sent twice
+        assert mock_send.call_count == 3
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_disabled(self, mock_send):
+        mock_send.side_effect = page_response
+        with patch("utils.http.prefetcher", Prefetcher(enabled=False)):
+            await send_page(1)
+            await send_page(2)
+        assert mock_send.call_count == 2
+        assert response_cache.entries == {}
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_concurrency_budget(self, mock_send):
+        mock_send.side_effect = page_response
+        prefetcher = Prefetcher(enabled=True, concurrency=0)
+        with patch("utils.http.prefetcher", prefetcher):
+            await send_page(1)
+        assert prefetcher.tasks == {}
+        assert mock_send.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_memory_budget(self, mock_send):
+        mock_send.side_effect = page_response
+        prefetcher = Prefetcher(enabled=True, max_bytes=10)
+        with patch("utils.http.prefetcher", prefetcher):
+            await send_page(1)
+            await wait_for_prefetches(prefetcher)
+        # The page was fetched but it did not fit in the budget
+        assert mock_send.call_count == 2
+        assert prefetcher.prefetched == {}
+        assert len(response_cache.entries) == 1
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_unused_pages_are_pruned(self, mock_send):
+        mock_send.side_effect = page_response
+        prefetcher = Prefetcher(enabled=True)
+        with patch("utils.http.prefetcher", prefetcher):
+            await send_page(1)
+            await wait_for_prefetches(prefetcher)
+        key = next(iter(prefetcher.prefetched))
+        size, stored_at = prefetcher.prefetched[key]
+        prefetcher.prefetched[key] = (size, stored_at - page_cache_policy.hard_ttl)
+        assert prefetcher.prefetched_bytes() == 0
+        assert response_cache.get(key) is None
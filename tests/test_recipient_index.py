@@ -0,0 +1,93 @@
+# Unit tests for the in process index of recipient names
+
+from unittest.mock import patch
+
+from utils.recipient_index import RecipientIndex, get_recipient_level, normalize_name
+
+
+class TestNormalizeName:
+    def test_suffixes_and_punctuation(self):
+        assert normalize_name("Lockheed Martin Corp.") == "LOCKHEED MARTIN"
+        assert normalize_name("LOCKHEED MARTIN CORPORATION") == "LOCKHEED MARTIN"
+        assert normalize_name("AT&T, Inc") == "AT T"
+
+    def test_only_suffixes(self):
+        assert normalize_name("The Company") == "THE COMPANY"
+
+    def test_recipient_level(self):
+        assert get_recipient_level("0a1b-2c3d-C") == "C"
+        assert get_recipient_level("0a1b-2c3d") is None
+        assert get_recipient_level(None) is None
+
+
+class TestRecipientIndex:
+    def index(self):
+        index = RecipientIndex()
+        index.add_recipients(
+            {
+                "results": [
+                    {
+                        "name": "LOCKHEED MARTIN CORPORATION",
+                        "uei": "UEI1",
+                        "duns": "1",
+                        "id": "a-P",
+                        "recipient_level": "P",
+                    },
+                    {
+                        "name": "LOCKHEED MARTIN AERONAUTICS",
+                        "uei": "UEI2",
+                        "duns": "2",
+                        "id": "b-C",
+                        "recipient_level": "C",
+                    },
+                ]
+            }
+        )
+        index.add_awards(
+            {
+                "results": [
+                    {"Recipient Name": "RAYTHEON COMPANY", "recipient_id": "c-R"},
+                    {"Recipient Name": None, "recipient_id": "d-R"},
+                ]
+            }
+        )
+        return index
+
+    def test_exact_match_first(self):
+        results = self.index().search("Lockheed Martin Corp")
+        assert [(row["uei"], row["match"]) for row in results] == [
+            ("UEI1", "exact"),
+            ("UEI2", "prefix"),
+        ]
+
+    def test_prefix(self):
+        results = self.index().search("lockheed")
+        assert [row["id"] for row in results] == ["a-P", "b-C"]
+        assert all(row["match"] == "prefix" for row in results)
+
+    def test_fuzzy(self):
+        results = self.index().search("Raythoen Co")
+        assert [(row["id"], row["recipient_level"], row["match"]) for row in results] == [
+            ("c-R", "R", "fuzzy")
+        ]
+        assert self.index().search("Boeing") == []
+
+    def test_evicts_least_recently_seen(self):
+        index = RecipientIndex(max_entries=2)
+        index.add("A Corp", recipient_id="a-R")
+        index.add("B Corp", recipient_id="b-R")
+        index.add("A Corp", recipient_id="a-R")
+        index.add("C Corp", recipient_id="c-R")
+        assert len(index) == 2
+        assert index.search("B") == []
+        assert index.sorted_names == ["A", "C"]
+
+    @patch("utils.recipient_index.max_fuzzy_candidates", 4)
+    def test_fuzzy_candidates_capped(self):
+        index = RecipientIndex()
+        for name in ["ALPHA", "BETA", "BRAVO", "BRAVOS", "BRIDGE", "BRICK", "BROOK", "CHARLIE"]:
+            index.add(name)
+        # Names with the same first letter, around where the query would sort
+        assert index.get_fuzzy_candidates("BRIAR") == ["BRAVO", "BRAVOS", "BRICK", "BRIDGE"]
+        assert index.get_fuzzy_candidates("ALFA") == ["ALPHA"]
+        assert index.get_fuzzy_candidates("ZULU") == []
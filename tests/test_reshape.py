@@ -0,0 +1,153 @@
+import json
+
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS
+
+from utils.reshape import (
+    get_columns,
+    get_transform,
+    parse_select,
+    project,
+    reshape,
+    reshape_results,
+    strip_nulls,
+    to_columnar,
+    to_csv,
+)
+
+rows = [
+    {"Award ID": "A1", "Award Amount": 100, "Recipient Location": {"state_code": "VA"}},
+    {"Award ID": "A2", "Award Amount": None, "Description": "Trucks, large"},
+]
+
+
+class TestGetColumns:
+    def test_union_of_keys_in_order(self):
+        columns = get_columns(rows)
+        assert columns == ["Award ID", "Award Amount", "Recipient Location", "Description"]
+
+    def test_no_rows(self):
+        assert get_columns([]) == []
+
+
+class TestToColumnar:
+    def test_missing_keys_are_none(self):
+        columnar = to_columnar(rows)
+        assert columnar["columns"] == get_columns(rows)
+        assert columnar["rows"][0] == ["A1", 100, {"state_code": "VA"}, None]
+        assert columnar["rows"][1] == ["A2", None, None, "Trucks, large"]
+
+    def test_smaller_than_rows(self):
+        many_rows = rows * 50
+        columnar = to_columnar(many_rows)
+        assert len(json.dumps(columnar)) < len(json.dumps(many_rows))
+
+
+class TestToCsv:
+    def test_header_and_rows(self):
+        lines = to_csv(rows).splitlines()
+        assert lines[0] == "Award ID,Award Amount,Recipient Location,Description"
+        assert lines[1] == 'A1,100,"{""state_code"":""VA""}",'
+        assert lines[2] == 'A2,,,"Trucks, large"'
+
+
+class TestReshapeResults:
+    def test_json_is_untouched(self):
+        body = {"results": rows}
+        assert reshape_results(body, "json") is body
+
+    def test_metadata_is_kept(self):
+        body = {"results": rows, "page_metadata": {"page": 1, "hasNext": True}}
+        reshaped = reshape_results(body, "columnar")
+        assert reshaped["page_metadata"] == {"page": 1, "hasNext": True}
+        assert reshaped["results"]["columns"] == get_columns(rows)
+
+    def test_csv_results(self):
+        reshaped = reshape_results({"results": rows}, "csv")
+        assert isinstance(reshaped["results"], str)
+
+    def test_non_list_results(self):
+        body = {"results": {"x": 1}}
+        assert reshape_results(body, "columnar") == {"results": {"x": 1}}
+
+    def test_non_object_rows(self):
+        body = {"results": [1, 2]}
+        assert reshape_results(body, "csv") == {"results": [1, 2]}
+
+    def test_no_results(self):
+        assert reshape_results({}, "columnar") == {}
+        assert reshape_results("text", "columnar") == "text"
+
+
+class TestParseSelect:
+    def test_nested_paths(self):
+        tree = parse_select(["results.Award ID", "results.Recipient Location.state_code"])
+        assert tree == {"results": {"Award ID": None, "Recipient Location": {"state_code": None}}}
+
+    def test_shorter_path_keeps_everything(self):
+        assert parse_select(["results", "results.Award ID"]) == {"results": None}
+        assert parse_select(["results.Award ID", "results"]) == {"results": None}
+
+
+class TestProject:
+    body = {
+        "results": rows,
+        "page_metadata": {"page": 1, "hasNext": False},
+        "messages": ["For searches, time period start and end dates are currently limited"],
+    }
+
+    def test_project_rows(self):
+        projected = project(self.body, parse_select(["results.Award ID", "page_metadata.page"]))
+        assert projected == {
+            "results": [{"Award ID": "A1"}, {"Award ID": "A2"}],
+            "page_metadata": {"page": 1},
+        }
+
+    def test_missing_paths_are_ignored(self):
+        assert project(self.body, parse_select(["results.x", "y"])) == {"results": [{}, {}]}
+
+    def test_strip_nulls(self):
+        assert strip_nulls({"a": None, "b": [{"c": None, "d": 1}], "e": {"f": None}}) == {
+            "b": [{"d": 1}],
+            "e": {},
+        }
+
+    def test_reshape_projects_before_output_format(self):
+        tree = parse_select(["results.Award ID", "results.Award Amount"])
+        reshaped = reshape({"results": rows}, select=tree, output_format="columnar")
+        assert reshaped == {
+            "results": {
+                "columns": ["Award ID", "Award Amount"],
+                "rows": [["A1", 100], ["A2", None]],
+            }
+        }
+
+
+class TestGetTransform:
+    def test_json_has_no_transform(self):
+        assert get_transform() is None
+        assert get_transform("json") is None
+
+    def test_invalid_output_format(self):
+        with pytest.raises(McpError) as err:
+            get_transform("xml")
+        assert err.value.error.code == INVALID_PARAMS
+        assert "output_format must be one of" in err.value.error.message
+
+    def test_invalid_select(self):
+        for select in ["results", [""], ["."], [1]]:
+            with pytest.raises(McpError) as err:
+                get_transform(select=select)
+            assert err.value.error.code == INVALID_PARAMS
+            assert "select must be a list of dotted paths" in err.value.error.message
+
+    def test_select_transform(self):
+        transform = get_transform(select=["results.Award ID"])
+        assert transform({"results": rows, "messages": []}) == {
+            "results": [{"Award ID": "A1"}, {"Award ID": "A2"}]
+        }
+
+    def test_columnar_transform(self):
+        transform = get_transform("columnar")
+        assert transform({"results": rows})["results"] == to_columnar(rows)
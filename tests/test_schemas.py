@@ -148,6 +148,25 @@ class TestSpendingByAwardSchema:
         Draft202012Validator.check_schema(self.output_schema)
 
 
+class TestAggregateAwardsSchema:
+    from tools.v2.search.spending_by_award.aggregate_awards import input_schema
+
+    def test_input_schema(self):
+        Draft202012Validator.check_schema(self.input_schema)
+
+    def test_input_schema_limit_below_one(self):
+        with pytest.raises(ValidationError) as err:
+            Draft202012Validator(self.input_schema).validate(
+                {
+                    "filters": {"award_type_codes": ["A"]},
+                    "group_by": ["Recipient Name"],
+                    "limit": 0,
+                }
+            )
+        assert "minimum" == err.value.validator
+        assert 1 == err.value.validator_value
+
+
 class TestSpendingOverTimeSchema:
     from tools.v2.search.spending_over_time.spending_over_time import input_schema, output_schema
 
@@ -0,0 +1,54 @@
+# Unit tests for the JSON serialization backends
+
+import importlib
+from unittest.mock import patch
+
+import pytest
+
+import utils.serialization
+from utils.serialization import dumps, loads
+
+payload = {"results": [{"Award ID": "A1", "Award Amount": 1.5, "tags": None, "ok": True}]}
+minified = '{"results":[{"Award ID":"A1","Award Amount":1.5,"tags":null,"ok":true}]}'
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request):
+    if request.param == "json":
+        with patch("utils.serialization.orjson", None):
+            yield request.param
+    else:
+        if utils.serialization.orjson is None:
+            pytest.skip("orjson is not installed")
+        yield request.param
+
+
+class TestSerialization:
+    def test_dumps_is_minified(self, backend):
+        assert dumps(payload) == minified
+
+    def test_loads_str_and_bytes(self, backend):
+        assert loads(minified) == payload
+        assert loads(minified.encode()) == payload
+
+    def test_loads_invalid_json(self, backend):
+        with pytest.raises(ValueError):
+            loads("hello world")
+
+    def test_dumps_falls_back_for_large_integers(self, backend):
+        assert dumps({"x": 2**70}) == f'{{"x":{2**70}}}'
+
+    def test_dumps_keeps_non_ascii(self, backend):
+        assert dumps({"name": "Société Générale"}) == '{"name":"Société Générale"}'
+
+    def test_unknown_backend(self, monkeypatch):
+        monkeypatch.setenv("MCP_JSON_BACKEND", "simplejson")
+        with pytest.raises(ValueError) as err:
+            importlib.reload(utils.serialization)
+        assert "MCP_JSON_BACKEND" in str(err.value)
+        monkeypatch.delenv("MCP_JSON_BACKEND")
+        importlib.reload(utils.serialization)
+
+    def test_dumps_unserializable(self, backend):
+        with pytest.raises(TypeError):
+            dumps({"x": object()})
@@ -0,0 +1,151 @@
+# Unit tests for the deadlines and cancellation of tool calls
+
+import asyncio
+import json
+import logging
+import sys
+from unittest.mock import patch
+
+import anyio
+import pytest
+from httpx import Response
+from mcp.shared.exceptions import McpError
+from mcp.types import INTERNAL_ERROR
+from validation import Validation
+
+import server
+
+
+class TestCallTool(Validation):
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_successful_tool_call(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={})
+        res = await server.call_tool("recipient", {})
+        mock_send.assert_called_once()
+        self.validate_text_content(res, text="{}")
+
+    @pytest.mark.asyncio
+    async def test_unknown_tool(self):
+        with pytest.raises(ValueError) as err:
+            await server.call_tool("unknown", {})
+        assert "Unknown tool: unknown" in str(err.value)
+
+    @pytest.mark.asyncio
+    @patch("server.TOOL_TIMEOUT", 0.01)
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_deadline(self, mock_send):
+        upstream_cancelled = asyncio.Event()
+
+        async def slow_send(request, **kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                upstream_cancelled.set()
+                raise
+
+        mock_send.side_effect = slow_send
+        with pytest.raises(McpError) as err:
+            await server.call_tool("recipient", {})
+        assert err.value.error.code == INTERNAL_ERROR
+        assert "did not finish within 0.01 seconds" in err.value.error.message
+        assert upstream_cancelled.is_set()
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_cancelled_by_request_scope(self, mock_send):
+        upstream_started = asyncio.Event()
+        upstream_cancelled = asyncio.Event()
+
+        async def slow_send(request, **kwargs):
+            upstream_started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                upstream_cancelled.set()
+                raise
+
+        mock_send.side_effect = slow_send
+        cancel_scopes = set()
+        token = server.request_cancel_scopes.set(cancel_scopes)
+        try:
+            task = asyncio.create_task(server.call_tool("recipient", {}))
+            await upstream_started.wait()
+            assert len(cancel_scopes) == 1
+            for cancel_scope in cancel_scopes:
+                cancel_scope.cancel()
+            with pytest.raises(McpError) as err:
+                await task
+        finally:
+            server.request_cancel_scopes.reset(token)
+
+        assert "Request cancelled" in err.value.error.message
+        assert upstream_cancelled.is_set()
+        assert len(cancel_scopes) == 0
+
+
+class TestToolTimeouts:
+    def test_parse_tool_timeouts(self):
+        assert server.parse_tool_timeouts("") == {}
+        assert server.parse_tool_timeouts("aggregate_awards=1800, subawards=0") == {
+            "aggregate_awards": 1800,
+            "subawards": 0,
+        }
+
+    def test_malformed_tool_timeouts_skipped(self, caplog):
+        timeouts = server.parse_tool_timeouts("foo=abc,subawards,=5,aggregate_awards=900")
+        assert timeouts == {"aggregate_awards": 900}
+        assert caplog.text.count("Skipping the MCP_TOOL_TIMEOUTS entry") == 3
+
+    @patch("server.TOOL_TIMEOUT", 60)
+    @patch.dict("server.tool_timeouts", {"aggregate_awards": 900, "subawards": 0})
+    def test_get_tool_timeout(self):
+        assert server.get_tool_timeout("recipient") == 60
+        assert server.get_tool_timeout("aggregate_awards") == 900
+        # 0 means the tool has no deadline
+        assert server.get_tool_timeout("subawards") is None
+
+    def test_aggregating_tools_given_longer(self):
+        for name in server.aggregating_tools:
+            assert server.get_tool_timeout(name) > server.TOOL_TIMEOUT
+
+
+class TestClosedStreamFilter:
+    def record(self, error):
+        try:
+            raise error
+        except BaseException:
+            return logging.LogRecord(
+                "mcp.server.streamable_http_manager",
+                logging.ERROR,
+                __file__,
+                1,
+                "Stateless session crashed",
+                None,
+                sys.exc_info(),
+            )
+
+    def test_closed_stream_logged_at_debug(self):
+        record = self.record(anyio.ClosedResourceError())
+        assert server.ClosedStreamFilter().filter(record) is False
+        assert record.levelno == logging.DEBUG
+
+    def test_other_errors_still_logged(self):
+        record = self.record(ValueError("bad"))
+        assert server.ClosedStreamFilter().filter(record) is True
+        assert record.levelno == logging.ERROR
+
+
+class TestMetrics:
+    @pytest.mark.asyncio
+    async def test_event_loop_metrics(self):
+        response = await server.metrics(None)
+        assert response.status_code == 200
+        body = json.loads(response.body)
+        assert set(body["event_loop"]) >= {"running", "lag_ms", "stalls", "recent_stalls"}
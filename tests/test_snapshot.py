@@ -0,0 +1,101 @@
+# Unit tests for warm cache snapshots
+
+import gzip
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from httpx import Response
+
+from utils.cache import CachePolicy, ResponseCache, closed_period_cache_policy
+from utils.snapshot import (
+    close_replay_logs,
+    load_snapshot,
+    record_call,
+    replay,
+    write_snapshot,
+)
+
+short_policy = CachePolicy(soft_ttl=60, hard_ttl=600)
+
+
+def filled_cache():
+    cache = ResponseCache(compress_threshold=100)
+    cache.set(
+        "GET /a", Response(status_code=200, json={"a": "x" * 200}), closed_period_cache_policy
+    )
+    cache.set("GET /b", Response(status_code=200, json={"b": 1}), closed_period_cache_policy)
+    cache.set("GET /short", Response(status_code=200, json={"c": 1}), short_policy)
+    cache.set("GET /none", Response(status_code=200, json={"d": 1}))
+    return cache
+
+
+class TestSnapshot:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "snapshot.jsonl.gz")
+        cache = filled_cache()
+        cache.entries["GET /b"].stored_at -= 100
+        # Only entries kept at least as long as reference data are written
+        assert write_snapshot(path, cache) == 2
+
+        restored = ResponseCache()
+        assert load_snapshot(path, restored) == 2
+        assert sorted(restored.entries) == ["GET /a", "GET /b"]
+        assert json.loads(restored.get("GET /a").response.content) == {"a": "x" * 200}
+        entry = restored.get("GET /b")
+        assert entry.response.headers["content-type"] == "application/json"
+        assert 99 < entry.age() < 200
+        assert entry.policy.hard_ttl == closed_period_cache_policy.hard_ttl
+
+    def test_most_used_entries_fit(self, tmp_path):
+        path = str(tmp_path / "snapshot.jsonl.gz")
+        cache = filled_cache()
+        for _ in range(3):
+            cache.get("GET /b")
+        assert write_snapshot(path, cache, max_bytes=cache.entries["GET /b"].size) == 1
+        restored = ResponseCache()
+        load_snapshot(path, restored)
+        assert list(restored.entries) == ["GET /b"]
+
+    def test_expired_entries_skipped(self, tmp_path):
+        path = str(tmp_path / "snapshot.jsonl.gz")
+        cache = filled_cache()
+        write_snapshot(path, cache)
+        with gzip.open(path, "rt") as file:
+            lines = file.readlines()
+        entry = json.loads(lines[1])
+        entry["stored_at"] -= closed_period_cache_policy.hard_ttl
+        with gzip.open(path, "wt") as file:
+            file.writelines([lines[0], json.dumps(entry) + "\n", lines[2]])
+
+        restored = ResponseCache()
+        assert load_snapshot(path, restored) == 1
+
+    def test_truncated_entries_stay_truncated(self, tmp_path):
+        path = str(tmp_path / "snapshot.jsonl.gz")
+        cache = ResponseCache()
+        response = Response(status_code=200, content=b'{"a": "x', extensions={"truncated": True})
+        cache.set("GET /a", response, closed_period_cache_policy)
+        assert write_snapshot(path, cache) == 1
+
+        restored = ResponseCache()
+        assert load_snapshot(path, restored) == 1
+        assert restored.get("GET /a").response.extensions["truncated"] is True
+
+    def test_missing_snapshot(self, tmp_path):
+        assert load_snapshot(str(tmp_path / "missing.jsonl.gz"), ResponseCache()) == 0
+
+
+class TestReplay:
+    @pytest.mark.asyncio
+    async def test_replay_log(self, tmp_path):
+        path = str(tmp_path / "replay.jsonl")
+        record_call("recipient", {"keyword": "NASA"}, path)
+        record_call("toptier_agencies", {}, path)
+        record_call("unknown", {}, "")
+        close_replay_logs()
+
+        dispatch = AsyncMock(side_effect=[None, ValueError("Unknown tool")])
+        assert await replay(path, dispatch) == (2, 1)
+        assert dispatch.call_args_list[0].args == ("recipient", {"keyword": "NASA"})
+        assert dispatch.call_args_list[1].args == ("toptier_agencies", {})
@@ -0,0 +1,100 @@
+# Unit tests for the startup profiler
+
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils.startup_profile import StartupProfiler, is_requested
+
+
+@pytest.fixture
+def profiler():
+    profiler = StartupProfiler()
+    yield profiler
+    profiler.disable()
+
+
+class TestIsRequested:
+    def test_not_requested(self, monkeypatch):
+        monkeypatch.delenv("MCP_SERVER_PROFILE_STARTUP", raising=False)
+        with patch.object(sys, "argv", ["server.py"]):
+            assert is_requested() is False
+
+    def test_env_var(self, monkeypatch):
+        monkeypatch.setenv("MCP_SERVER_PROFILE_STARTUP", "1")
+        with patch.object(sys, "argv", ["server.py"]):
+            assert is_requested() is True
+
+    def test_cli_flag(self, monkeypatch):
+        monkeypatch.delenv("MCP_SERVER_PROFILE_STARTUP", raising=False)
+        with patch.object(sys, "argv", ["server.py", "--profile-startup"]):
+            assert is_requested() is True
+
+
+class TestStartupProfiler:
+    def test_section_disabled(self, profiler):
+        with profiler.section("dataset", "agencies.json"):
+            pass
+        assert profiler.records == []
+
+    def test_nested_section_self_time(self, profiler):
+        profiler.enable()
+        with profiler.section("dataset", "outer"):
+            time.sleep(0.01)
+            with profiler.section("schema", "inner"):
+                time.sleep(0.02)
+
+        inner, outer = profiler.records
+        assert inner[:2] == ["schema", "inner"]
+        assert outer[:2] == ["dataset", "outer"]
+        assert outer[2] >= inner[2] + 0.01
+        # Self time of the outer section excludes the inner section
+        assert outer[3] == pytest.approx(outer[2] - inner[2])
+        assert inner[3] == inner[2]
+
+    def test_records_first_import_only(self, profiler):
+        sys.modules.pop("colorsys", None)
+        profiler.enable()
+        __import__("colorsys")
+        __import__("colorsys")
+
+        profiler.disable()
+        names = [name for category, name, _, _ in profiler.records if category == "import"]
+        assert names.count("colorsys") == 1
+
+    def test_disable_restores_import(self, profiler):
+        import builtins
+
+        original_import = builtins.__import__
+        profiler.enable()
+        assert builtins.__import__ != original_import
+        profiler.disable()
+        assert builtins.__import__ == original_import
+
+    def test_report_after_disable(self, profiler):
+        profiler.enable()
+        with profiler.section("dataset", "agencies"):
+            pass
+        profiler.disable()
+        assert profiler.enabled is False
+        assert profiler.report() == ""
+        # Sections are no longer recorded either
+        with profiler.section("dataset", "recipients"):
+            pass
+        assert [name for _, name, _, _ in profiler.records] == ["agencies"]
+
+    def test_report_sorted_by_self_time(self, profiler):
+        profiler.enable()
+        profiler.records = [
+            ["import", "fast", 0.001, 0.001],
+            ["dataset", "slow", 0.5, 0.5],
+            ["schema", "medium", 0.1, 0.1],
+        ]
+        lines = profiler.report().splitlines()
+        names = [
+            line.split()[-1] for line in lines if line.split()[-1] in ["fast", "slow", "medium"]
+        ]
+        assert names == ["slow", "medium", "fast"]
+        assert "dataset" in lines[1]
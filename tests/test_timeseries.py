@@ -0,0 +1,82 @@
+# Unit tests for the local spending_over_time series store
+
+from datetime import date
+from itertools import count
+from unittest.mock import patch
+
+from utils.timeseries import TimeSeriesStore, get_filter_hash
+
+
+class TestFilterHash:
+    def test_ignores_end_date_group_and_key_order(self):
+        payload = {
+            "group": "fiscal_year",
+            "filters": {
+                "agencies": [{"type": "awarding", "tier": "toptier", "name": "NASA"}],
+                "time_period": [{"start_date": "2020-10-01", "end_date": "2024-02-01"}],
+            },
+        }
+        other = {
+            "filters": {
+                "time_period": [{"end_date": "2024-03-01", "start_date": "2020-10-01"}],
+                "agencies": [{"name": "NASA", "tier": "toptier", "type": "awarding"}],
+            },
+            "group": "quarter",
+        }
+        assert get_filter_hash(payload) == get_filter_hash(other)
+
+    def test_include_end_date(self):
+        payload = {"filters": {"time_period": [{"start_date": "2020-10-01", "end_date": "2022"}]}}
+        other = {"filters": {"time_period": [{"start_date": "2020-10-01", "end_date": "2023"}]}}
+        assert get_filter_hash(payload, include_end_date=True) != get_filter_hash(
+            other, include_end_date=True
+        )
+
+    def test_start_date_changes_hash(self):
+        payload = {"filters": {"time_period": [{"start_date": "2020-10-01"}]}}
+        other = {"filters": {"time_period": [{"start_date": "2021-10-01"}]}}
+        assert get_filter_hash(payload) != get_filter_hash(other)
+
+
+class TestTimeSeriesStore:
+    def test_get_put_clear(self):
+        store = TimeSeriesStore(":memory:")
+        assert store.get("hash", "fiscal_year") == (None, [])
+
+        results = [
+            {"time_period": {"fiscal_year": "2022"}, "aggregated_amount": 1.5},
+            {"time_period": {"fiscal_year": "2023"}, "aggregated_amount": None},
+        ]
+        store.put("hash", "fiscal_year", date(2023, 9, 30), results)
+        assert store.get("hash", "fiscal_year") == (date(2023, 9, 30), results)
+        assert store.get("hash", "quarter") == (None, [])
+
+        store.put("hash", "fiscal_year", date(2023, 12, 31), results[:1])
+        assert store.get("hash", "fiscal_year") == (date(2023, 12, 31), results[:1])
+
+        store.clear()
+        assert store.get("hash", "fiscal_year") == (None, [])
+
+    def test_persists_to_file(self, tmp_path):
+        path = str(tmp_path / "series" / "timeseries.db")
+        TimeSeriesStore(path).put("hash", "month", date(2023, 12, 31), [{"aggregated_amount": 2}])
+        assert TimeSeriesStore(path).get("hash", "month") == (
+            date(2023, 12, 31),
+            [{"aggregated_amount": 2}],
+        )
+
+    @patch("utils.timeseries.time.time", side_effect=count())
+    def test_least_recently_used_series_dropped(self, mock_time):
+        store = TimeSeriesStore(":memory:", max_series=2)
+        for filter_hash in ["a", "b"]:
+            store.put(filter_hash, "month", date(2023, 12, 31), [{"aggregated_amount": 1}])
+        store.get("a", "month")
+        store.put("c", "month", date(2023, 12, 31), [{"aggregated_amount": 1}])
+        assert store.get("b", "month") == (None, [])
+        assert store.get("a", "month")[0] is not None
+        assert store.get("c", "month")[0] is not None
+        (periods,) = store.connect().execute("SELECT COUNT(*) FROM periods").fetchone()
+        assert periods == 2
+
+    def test_disabled(self):
+        assert not TimeSeriesStore("").enabled
@@ -1,18 +1,23 @@
 import importlib
+import json
+from datetime import date
 from unittest.mock import patch
 
 import pytest
 from freezegun import freeze_time
-from httpx import Response
+from httpx import Request, Response
 from mcp.shared.exceptions import McpError
 from mcp.types import INVALID_PARAMS
 from validation import Validation
 
 from tools.config import (
+    call_tool_aggregate_awards,
     call_tool_federal_accounts,
     call_tool_list_budget_functions,
     call_tool_major_object_class,
+    call_tool_major_object_class_matrix,
     call_tool_recipient,
+    call_tool_recipient_autocomplete,
     call_tool_spending,
     call_tool_spending_by_award,
     call_tool_spending_over_time,
@@ -20,6 +25,125 @@ from tools.config import (
     call_tool_toptier_agencies,
     call_tool_total_budgetary_resources,
 )
+from utils.cache import response_cache
+from utils.cursor import encode_cursor, get_query_hash
+from utils.dates import date_to_fy
+
+
+class TestAggregateAwards(Validation):
+    filters = {"award_type_codes": ["A", "B", "C", "D"]}
+
+    @pytest.mark.asyncio
+    async def test_no_filters_provided(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_aggregate_awards({"group_by": ["Recipient Name"]})
+        assert err.value.error.code == INVALID_PARAMS
+        assert "filters must be provided" in err.value.error.message
+
+    @pytest.mark.asyncio
+    async def test_no_group_by_provided(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_aggregate_awards({"filters": self.filters})
+        assert err.value.error.code == INVALID_PARAMS
+        assert "group_by must be provided" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_pages_until_no_next_page(self, mock_send):
+        mock_send.side_effect = [
+            Response(
+                status_code=200,
+                json={
+                    "results": [
+                        {"Award ID": "1", "Recipient Name": "A", "Award Amount": 10},
+                        {"Award ID": "2", "Recipient Name": "B", "Award Amount": 5},
+                    ],
+                    "page_metadata": {"page": 1, "hasNext": True},
+                },
+            ),
+            Response(
+                status_code=200,
+                json={
+                    "results": [{"Award ID": "3", "Recipient Name": "B", "Award Amount": 20}],
+                    "page_metadata": {"page": 2, "hasNext": False},
+                },
+            ),
+        ]
+        res = await call_tool_aggregate_awards(
+            {"filters": self.filters, "group_by": ["Recipient Name"], "top_k": 1}
+        )
+        assert mock_send.call_count == 2
+        self.validate_text_content(res, validate_text=False)
+        response = json.loads(res[0].text)
+        assert response["pages_fetched"] == 2
+        assert response["rows_scanned"] == 3
+        assert response["complete"] is True
+        assert response["results"] == [
+            {
+                "Recipient Name": "B",
+                "count": 2,
+                "sum": 25,
+                "min": 5,
+                "max": 20,
+                "top": [{"Award ID": "3", "Award Amount": 20}],
+            },
+            {
+                "Recipient Name": "A",
+                "count": 1,
+                "sum": 10,
+                "min": 10,
+                "max": 10,
+                "top": [{"Award ID": "1", "Award Amount": 10}],
+            },
+        ]
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_stops_at_max_pages(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=200,
+            json={"results": [], "page_metadata": {"page": 1, "hasNext": True}},
+        )
+        res = await call_tool_aggregate_awards(
+            {"filters": self.filters, "group_by": ["Recipient Name"], "max_pages": 1}
+        )
+        mock_send.assert_called_once()
+        response = json.loads(res[0].text)
+        assert response["complete"] is False
+        assert response["results"] == []
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_continues_after_last_record(self, mock_send):
+        mock_send.side_effect = [
+            Response(
+                status_code=200,
+                json={
+                    "results": [{"Award ID": "1", "Recipient Name": "A", "Award Amount": 10}],
+                    "page_metadata": {
+                        "page": 1,
+                        "hasNext": True,
+                        "last_record_unique_id": 1,
+                        "last_record_sort_value": "10",
+                    },
+                },
+            ),
+            Response(
+                status_code=200,
+                json={"results": [], "page_metadata": {"page": 1, "hasNext": False}},
+            ),
+        ]
+        await call_tool_aggregate_awards({"filters": self.filters, "group_by": ["Recipient Name"]})
+        second_payload = json.loads(mock_send.call_args_list[1].args[0].content)
+        assert "page" not in second_payload
+        assert second_payload["last_record_unique_id"] == 1
+        assert second_payload["last_record_sort_value"] == "10"
 
 
 class TestBudgetFunctions(Validation):
@@ -33,6 +157,17 @@ class TestBudgetFunctions(Validation):
         mock_send.assert_called_once()
         self.validate_text_content(res, text="{}")
 
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_response_is_cached(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={})
+        await call_tool_list_budget_functions()
+        res = await call_tool_list_budget_functions()
+        mock_send.assert_called_once()
+        self.validate_text_content(res, text="{}")
+
 
 class TestFederalAccounts(Validation):
     @pytest.mark.asyncio
@@ -80,6 +215,86 @@ class TestMajorObjectClass(Validation):
         self.validate_text_content(res, text="{}")
 
 
+class TestMajorObjectClassMatrix(Validation):
+    @pytest.mark.asyncio
+    async def test_no_fiscal_years_provided(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_major_object_class_matrix({"funding_agency_ids": [1]})
+        assert err.value.error.code == INVALID_PARAMS
+        assert "fiscal_years must be provided" in err.value.error.message
+
+    @pytest.mark.asyncio
+    async def test_too_many_cells(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_major_object_class_matrix(
+                {"fiscal_years": list(range(2017, 2027)), "funding_agency_ids": list(range(6))}
+            )
+        assert err.value.error.code == INVALID_PARAMS
+        assert "At most 50 agency and fiscal year pairs" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_pivoted_table(self, mock_send):
+        def cell_response(request, **kwargs):
+            params = request.url.params
+            if params["funding_agency_id"] == "3":
+                return Response(
+                    status_code=400, text="no data", request=Request(method="GET", url="/")
+                )
+            results = [
+                {
+                    "major_object_class_code": "10",
+                    "major_object_class_name": "Personnel compensation and benefits",
+                    "obligated_amount": params["fiscal_year"],
+                }
+            ]
+            if params["funding_agency_id"] == "2":
+                results.append(
+                    {
+                        "major_object_class_code": "20",
+                        "major_object_class_name": "Contractual services and supplies",
+                        "obligated_amount": "5.5",
+                    }
+                )
+            return Response(status_code=200, json={"results": results})
+
+        mock_send.side_effect = cell_response
+        res = await call_tool_major_object_class_matrix(
+            {
+                "fiscal_years": [2023, 2024],
+                "funding_agency_ids": [2, 3],
+                "output_format": "columnar",
+            }
+        )
+        assert mock_send.call_count == 4
+        response = json.loads(res[0].text)
+        assert response["results"]["columns"] == [
+            "major_object_class_code",
+            "major_object_class_name",
+            "2 FY2023",
+            "2 FY2024",
+            "3 FY2023",
+            "3 FY2024",
+        ]
+        assert response["results"]["rows"] == [
+            ["10", "Personnel compensation and benefits", 2023.0, 2024.0, None, None],
+            ["20", "Contractual services and supplies", 5.5, 5.5, None, None],
+        ]
+        assert response["cells"]["3 FY2024"] == {"funding_agency_id": 3, "fiscal_year": 2024}
+        assert [
+            (error["funding_agency_id"], error["fiscal_year"]) for error in response["errors"]
+        ] == [
+            (3, 2023),
+            (3, 2024),
+        ]
+
+        # Every cell is cached so an overlapping matrix only fetches the new cells
+        await call_tool_major_object_class_matrix(
+            {"fiscal_years": [2024, 2025], "funding_agency_ids": [2]}
+        )
+        assert mock_send.call_count == 5
+
+
 class TestRecipient(Validation):
     @pytest.mark.asyncio
     @patch(
@@ -91,6 +306,74 @@ class TestRecipient(Validation):
         mock_send.assert_called_once()
         self.validate_text_content(res, text="{}")
 
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_select(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=200,
+            json={
+                "page_metadata": {"page": 1, "limit": 1, "total": 2},
+                "results": [{"name": "ACME", "duns": None, "uei": "X1", "amount": 2}],
+            },
+        )
+        res = await call_tool_recipient({"select": ["results.name", "results.duns"]})
+        mock_send.assert_called_once()
+        self.validate_text_content(res, text='{"results":[{"name":"ACME"}]}')
+
+
+class TestRecipientAutocomplete(Validation):
+    recipients = {
+        "page_metadata": {"page": 1, "limit": 10, "total": 1},
+        "results": [
+            {
+                "name": "LOCKHEED MARTIN CORPORATION",
+                "uei": "UEI1",
+                "duns": "1",
+                "id": "a-P",
+                "recipient_level": "P",
+                "amount": 1,
+            }
+        ],
+    }
+
+    @pytest.mark.asyncio
+    async def test_no_name_provided(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_recipient_autocomplete({})
+        assert err.value.error.code == INVALID_PARAMS
+        assert "name must be provided" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_resolved_from_recipients_seen(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json=self.recipients)
+        await call_tool_recipient({"keyword": "lockheed", "output_format": "csv"})
+        mock_send.assert_called_once()
+
+        for name in ["Lockheed Martin Corp", "lockheed", "Lockhead Martin"]:
+            res = await call_tool_recipient_autocomplete({"name": name})
+            response = json.loads(res[0].text)
+            assert response["source"] == "local"
+            assert response["results"][0]["uei"] == "UEI1"
+        mock_send.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_upstream_fallback(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json=self.recipients)
+        res = await call_tool_recipient_autocomplete({"name": "Lockheed Martin"})
+        response = json.loads(res[0].text)
+        assert response["source"] == "usaspending"
+        assert response["results"][0]["id"] == "a-P"
+        assert json.loads(mock_send.call_args.args[0].content)["keyword"] == "Lockheed Martin"
+
+        # The recipients returned upstream are now in the index
+        res = await call_tool_recipient_autocomplete({"name": "Lockheed Martin"})
+        assert json.loads(res[0].text)["source"] == "local"
+        mock_send.assert_called_once()
+
 
 class TestTopTierAgencies(Validation):
     import tools.v2.references.toptier_agencies.toptier_agencies as toptier_agencies_module
@@ -156,7 +439,66 @@ class TestTotalBudgetaryResources(Validation):
         mock_send.return_value = Response(status_code=200, json={})
         res = await call_tool_total_budgetary_resources({})
         mock_send.assert_called_once()
-        self.validate_text_content(res, text="{}")
+        self.validate_text_content(res, text='{"results":[],"messages":[]}')
+
+    history = {
+        "results": [
+            {"fiscal_year": 2024, "fiscal_period": 3, "total_budgetary_resources": 3.0},
+            {"fiscal_year": 2024, "fiscal_period": 2, "total_budgetary_resources": 2.0},
+            {"fiscal_year": 2023, "fiscal_period": 12, "total_budgetary_resources": 12.0},
+        ],
+        "messages": [],
+    }
+
+    @pytest.mark.asyncio
+    @freeze_time("2024-01-15")
+    @patch("utils.http.client.send")
+    async def test_filters_answered_from_history(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json=self.history)
+        res = await call_tool_total_budgetary_resources({"fiscal_year": 2024})
+        assert [row["fiscal_period"] for row in json.loads(res[0].text)["results"]] == [3, 2]
+        res = await call_tool_total_budgetary_resources({"fiscal_year": 2023, "fiscal_period": 12})
+        assert json.loads(res[0].text)["results"] == [self.history["results"][2]]
+        res = await call_tool_total_budgetary_resources({"fiscal_year": 2022})
+        assert json.loads(res[0].text)["results"] == []
+        res = await call_tool_total_budgetary_resources({})
+        assert json.loads(res[0].text) == self.history
+
+        # The whole history is fetched once without filters
+        mock_send.assert_called_once()
+        assert not mock_send.call_args.args[0].url.query
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_refresh_when_next_period_expected(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json=self.history)
+        # Period 4 of FY 2024 ends on 2024-01-31
+        with freeze_time("2024-02-29"):
+            await call_tool_total_budgetary_resources({"fiscal_year": 2024})
+            await call_tool_total_budgetary_resources({"fiscal_year": 2024})
+        assert mock_send.call_count == 1
+
+        with freeze_time("2024-03-02"):
+            await call_tool_total_budgetary_resources({"fiscal_year": 2024})
+        assert mock_send.call_count == 2
+
+    @pytest.mark.asyncio
+    @freeze_time("2024-01-15")
+    @patch("utils.http.client.send")
+    async def test_malformed_rows_skipped(self, mock_send):
+        malformed = [
+            {"fiscal_year": None, "fiscal_period": 1, "total_budgetary_resources": 1.0},
+            {"fiscal_year": 2024, "fiscal_period": "P1", "total_budgetary_resources": 1.0},
+            {"fiscal_year": 2024, "total_budgetary_resources": 1.0},
+        ]
+        mock_send.return_value = Response(
+            status_code=200,
+            json={**self.history, "results": self.history["results"] + malformed},
+        )
+        res = await call_tool_total_budgetary_resources({})
+        assert json.loads(res[0].text) == self.history
+        res = await call_tool_total_budgetary_resources({"fiscal_year": 2024})
+        assert [row["fiscal_period"] for row in json.loads(res[0].text)["results"]] == [3, 2]
 
 
 class TestSpendingByAward(Validation):
@@ -184,6 +526,97 @@ class TestSpendingByAward(Validation):
         mock_send.assert_called_once()
         self.validate_text_content(res, text="{}")
 
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_cursor(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=200,
+            json={
+                "results": [{"Award ID": "A1"}],
+                "page_metadata": {
+                    "page": 1,
+                    "hasNext": True,
+                    "last_record_unique_id": 42,
+                    "last_record_sort_value": "1000.0",
+                },
+            },
+        )
+        arguments = {"filters": {"prop": "val"}, "fields": [], "sort": "Award Amount"}
+        # Without a cursor or a reshape the body is passed through as is
+        res = await call_tool_spending_by_award(arguments)
+        assert "cursor" not in json.loads(res[0].text)["page_metadata"]
+
+        res = await call_tool_spending_by_award({**arguments, "cursor": ""})
+        cursor = json.loads(res[0].text)["page_metadata"]["cursor"]
+
+        await call_tool_spending_by_award({**arguments, "page": "5", "cursor": cursor})
+        payload = json.loads(mock_send.call_args.args[0].content)
+        assert "page" not in payload
+        assert payload["last_record_unique_id"] == 42
+        assert payload["last_record_sort_value"] == "1000.0"
+
+        with pytest.raises(McpError) as err:
+            await call_tool_spending_by_award(
+                {**arguments, "filters": {"prop": "other"}, "cursor": cursor}
+            )
+        assert err.value.error.code == INVALID_PARAMS
+        assert "different filters or fields" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @patch("utils.http.prefetcher.prefetch_next_page")
+    @patch("utils.http.client.send")
+    async def test_cursor_not_prefetched(self, mock_send, mock_prefetch):
+        mock_send.return_value = Response(status_code=200, json={"results": []})
+        arguments = {"filters": {"prop": "val"}, "fields": []}
+        await call_tool_spending_by_award({**arguments, "cursor": ""})
+        mock_prefetch.assert_not_called()
+        await call_tool_spending_by_award(arguments)
+        mock_prefetch.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cursor_with_different_sort(self):
+        cursor = encode_cursor(
+            {
+                "last_record_unique_id": 1,
+                "sort": "Award Amount",
+                "order": None,
+                "query": get_query_hash({"filters": {"prop": "val"}, "fields": []}),
+            }
+        )
+        with pytest.raises(McpError) as err:
+            await call_tool_spending_by_award(
+                {"filters": {"prop": "val"}, "fields": [], "sort": "Award ID", "cursor": cursor}
+            )
+        assert err.value.error.code == INVALID_PARAMS
+        assert "cursor was created with sort=Award Amount" in err.value.error.message
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_spending_by_award(
+                {"filters": {"prop": "val"}, "fields": [], "cursor": "not a cursor!"}
+            )
+        assert err.value.error.code == INVALID_PARAMS
+        assert "cursor is not valid" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_columnar_output_format(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=200, json={"results": [{"Award ID": "A1"}, {"Award ID": "A2"}]}
+        )
+        res = await call_tool_spending_by_award(
+            {"filters": {"prop": "val"}, "fields": [], "output_format": "columnar"}
+        )
+        mock_send.assert_called_once()
+        self.validate_text_content(
+            res, text='{"results":{"columns":["Award ID"],"rows":[["A1"],["A2"]]}}'
+        )
+
 
 class TestSpendingOverTime(Validation):
     @pytest.mark.asyncio
@@ -210,6 +643,183 @@ class TestSpendingOverTime(Validation):
         mock_send.assert_called_once()
         self.validate_text_content(res, text="{}")
 
+    @pytest.mark.asyncio
+    @freeze_time("2024-03-01")
+    @patch("utils.timeseries.timeseries_store.path", "")
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_split_by_fiscal_year(self, mock_send):
+        def window_response(request, **kwargs):
+            period = json.loads(request.content)["filters"]["time_period"][0]
+            # A fiscal year window covers the end of one calendar year and the start of the next
+            years = sorted({period["start_date"][:4], period["end_date"][:4]})
+            return Response(
+                status_code=200,
+                json={
+                    "group": "calendar_year",
+                    "spending_level": "transactions",
+                    "results": [
+                        {
+                            "time_period": {"calendar_year": year},
+                            "aggregated_amount": 1,
+                            "total_outlays": None,
+                        }
+                        for year in reversed(years)
+                    ],
+                    "messages": ["same message"],
+                },
+            )
+
+        mock_send.side_effect = window_response
+        arguments = {
+            "group": "calendar_year",
+            "filters": {
+                "time_period": [
+                    {
+                        "start_date": "2021-10-01",
+                        "end_date": "2024-02-01",
+                        "date_type": "action_date",
+                    }
+                ]
+            },
+            "split_by_fiscal_year": True,
+        }
+        res = await call_tool_spending_over_time(arguments)
+        assert mock_send.call_count == 3
+        periods = [
+            json.loads(call.args[0].content)["filters"]["time_period"][0]
+            for call in mock_send.call_args_list
+        ]
+        assert {(period["start_date"], period["end_date"]) for period in periods} == {
+            ("2021-10-01", "2022-09-30"),
+            ("2022-10-01", "2023-09-30"),
+            ("2023-10-01", "2024-02-01"),
+        }
+        assert all(period["date_type"] == "action_date" for period in periods)
+
+        response = json.loads(res[0].text)
+        assert [row["time_period"]["calendar_year"] for row in response["results"]] == [
+            "2021",
+            "2022",
+            "2023",
+            "2024",
+        ]
+        # Calendar years 2022 and 2023 are each split across two fiscal years
+        assert [row["aggregated_amount"] for row in response["results"]] == [1, 2, 2, 1]
+        assert response["results"][0]["total_outlays"] is None
+        assert response["messages"][0] == "same message"
+
+        # FY2022 and FY2023 are closed, only FY2024 is fetched again
+        await call_tool_spending_over_time(arguments)
+        assert mock_send.call_count == 4
+
+    @pytest.mark.asyncio
+    @patch(
+        "utils.http.client.send",
+    )
+    async def test_split_within_one_fiscal_year(self, mock_send):
+        mock_send.return_value = Response(status_code=200, json={})
+        await call_tool_spending_over_time(
+            {
+                "group": "month",
+                "filters": {
+                    "time_period": [{"start_date": "2023-10-01", "end_date": "2024-02-01"}]
+                },
+                "split_by_fiscal_year": True,
+            }
+        )
+        mock_send.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_split_invalid_dates(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_spending_over_time(
+                {
+                    "group": "month",
+                    "filters": {"time_period": [{"start_date": "2023", "end_date": "2024"}]},
+                    "split_by_fiscal_year": True,
+                }
+            )
+        assert err.value.error.code == INVALID_PARAMS
+
+    @staticmethod
+    def fiscal_year_response(request, **kwargs):
+        period = json.loads(request.content)["filters"]["time_period"][0]
+        first = date_to_fy(date.fromisoformat(period["start_date"]))
+        last = date_to_fy(date.fromisoformat(period["end_date"]))
+        return Response(
+            status_code=200,
+            json={
+                "group": "fiscal_year",
+                "spending_level": "transactions",
+                "results": [
+                    {"time_period": {"fiscal_year": str(year)}, "aggregated_amount": 1}
+                    for year in range(first, last + 1)
+                ],
+                "messages": [],
+            },
+        )
+
+    @pytest.mark.asyncio
+    @freeze_time("2024-03-01")
+    @patch("utils.http.client.send")
+    async def test_closed_periods_from_timeseries_store(self, mock_send):
+        mock_send.side_effect = self.fiscal_year_response
+        arguments = {
+            "group": "fiscal_year",
+            "filters": {"time_period": [{"start_date": "2021-10-01", "end_date": "2024-02-01"}]},
+        }
+        res = await call_tool_spending_over_time(arguments)
+        # FY 2024 Q1 is the last closed quarter on 2024-03-01
+        periods = [
+            json.loads(call.args[0].content)["filters"]["time_period"][0]
+            for call in mock_send.call_args_list
+        ]
+        assert {(period["start_date"], period["end_date"]) for period in periods} == {
+            ("2021-10-01", "2023-12-31"),
+            ("2024-01-01", "2024-02-01"),
+        }
+        response = json.loads(res[0].text)
+        assert [row["aggregated_amount"] for row in response["results"]] == [1, 1, 2]
+        assert "2023-12-31" in response["messages"][-1]
+
+        # Only the open periods are fetched again, even with a later end_date
+        response_cache.clear()
+        mock_send.reset_mock()
+        arguments["filters"]["time_period"][0]["end_date"] = "2024-02-20"
+        res = await call_tool_spending_over_time(arguments)
+        assert mock_send.call_count == 1
+        period = json.loads(mock_send.call_args.args[0].content)["filters"]["time_period"][0]
+        assert (period["start_date"], period["end_date"]) == ("2024-01-01", "2024-02-20")
+        response = json.loads(res[0].text)
+        assert [row["aggregated_amount"] for row in response["results"]] == [1, 1, 2]
+
+    @pytest.mark.asyncio
+    @freeze_time("2024-03-01")
+    @patch("utils.http.client.send")
+    async def test_closed_periods_only(self, mock_send):
+        mock_send.side_effect = self.fiscal_year_response
+        arguments = {
+            "group": "fiscal_year",
+            "filters": {"time_period": [{"start_date": "2021-10-01", "end_date": "2023-06-30"}]},
+        }
+        res = await call_tool_spending_over_time(arguments)
+        first = json.loads(res[0].text)["results"]
+        # The whole time_period has closed so repeats are served from the store
+        for _ in range(2):
+            response_cache.clear()
+            res = await call_tool_spending_over_time(arguments)
+            assert json.loads(res[0].text)["results"] == first
+        assert mock_send.call_count == 1
+        period = json.loads(mock_send.call_args.args[0].content)["filters"]["time_period"][0]
+        assert (period["start_date"], period["end_date"]) == ("2021-10-01", "2023-06-30")
+
+        # A different end_date is a different series
+        arguments["filters"]["time_period"][0]["end_date"] = "2022-09-30"
+        await call_tool_spending_over_time(arguments)
+        assert mock_send.call_count == 2
+
 
 class TestSpending(Validation):
     @pytest.mark.asyncio
@@ -272,6 +882,153 @@ class TestSpending(Validation):
         mock_send.assert_called_once()
         self.validate_text_content(res, text="{}")
 
+    @pytest.mark.asyncio
+    async def test_drill_down_too_many_requests(self):
+        with pytest.raises(McpError) as err:
+            await call_tool_spending({"type": "agency", "depth": 3, "top_n": 10})
+        assert err.value.error.code == INVALID_PARAMS
+        assert "would take more than 100 requests" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @freeze_time("2026-01-30")
+    @patch("utils.http.client.send")
+    async def test_drill_down(self, mock_send):
+        def node_response(request, **kwargs):
+            payload = json.loads(request.content)
+            if payload["filters"].get("federal_account") == 23:
+                return Response(
+                    status_code=500, text="error", request=Request(method="POST", url="/")
+                )
+            parent = payload["filters"].get("agency", "")
+            return Response(
+                status_code=200,
+                json={
+                    "total": 6,
+                    "end_date": "2025-09-30",
+                    "results": [
+                        {
+                            "code": str(amount),
+                            "id": f"{parent}{amount}",
+                            "type": payload["type"],
+                            "name": f"{payload['type']} {amount}",
+                            "amount": amount,
+                        }
+                        for amount in [1, 3, 2]
+                    ],
+                },
+            )
+
+        mock_send.side_effect = node_response
+        res = await call_tool_spending(
+            {
+                "type": "agency",
+                "filters": {"fy": "2025", "quarter": "4"},
+                "depth": 2,
+                "top_n": 2,
+            }
+        )
+        # The root, 2 agencies and 2 federal accounts for each agency
+        assert mock_send.call_count == 7
+        response = json.loads(res[0].text)
+        assert [row["amount"] for row in response["results"]] == [3, 2]
+        assert response["pruned"] == {"count": 1, "amount": 1}
+
+        agency = response["results"][0]
+        assert agency["children"]["type"] == "federal_account"
+        assert [row["id"] for row in agency["children"]["results"]] == ["33", "32"]
+        federal_account = agency["children"]["results"][0]
+        assert federal_account["children"]["type"] == "object_class"
+        assert "children" not in federal_account["children"]["results"][0]
+
+        agency = response["results"][1]
+        assert [row["id"] for row in agency["children"]["results"]] == ["23", "22"]
+        # One node that fails does not fail the whole tree
+        assert agency["children"]["results"][0]["children"]["error"].startswith("Received non 2xx")
+        assert agency["children"]["results"][1]["children"]["type"] == "object_class"
+
+        # Every node is cached so drilling down again only retries the node that failed
+        await call_tool_spending(
+            {
+                "type": "agency",
+                "filters": {"fy": "2025", "quarter": "4"},
+                "depth": 2,
+                "top_n": 2,
+            }
+        )
+        assert mock_send.call_count == 8
+
+    @pytest.mark.asyncio
+    @freeze_time("2026-01-30")
+    @patch("utils.http.client.send")
+    async def test_drill_down_filter_values(self, mock_send):
+        def node_response(request, **kwargs):
+            payload = json.loads(request.content)
+            if payload["type"] == "budget_function":
+                results = [{"code": "050", "id": "050", "name": "Defense", "amount": 2}]
+            else:
+                results = [{"code": "01", "id": 7, "name": "Sub", "amount": 1}]
+            return Response(status_code=200, json={"total": 1, "results": results})
+
+        mock_send.side_effect = node_response
+        await call_tool_spending(
+            {"type": "budget_function", "filters": {"fy": "2025"}, "depth": 2, "top_n": 1}
+        )
+        filters = [json.loads(call.args[0].content)["filters"] for call in mock_send.call_args_list]
+        # Codes keep their leading zeros and ids are integers
+        assert filters[1]["budget_function"] == "050"
+        assert filters[2]["budget_subfunction"] == "01"
+
+    @pytest.mark.asyncio
+    @freeze_time("2026-01-30")
+    @patch("utils.http.client.send")
+    async def test_drill_down_recipient_without_id(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=200,
+            json={
+                "total": 3,
+                "results": [
+                    {"code": "abc", "id": "5f2c-hash", "name": "Acme", "amount": 2},
+                    {"code": None, "id": None, "name": "Multiple", "amount": 1},
+                ],
+            },
+        )
+        res = await call_tool_spending(
+            {"type": "recipient", "filters": {"fy": "2025"}, "depth": 1, "top_n": 2}
+        )
+        # Recipients identified by a hash or name are not sent as recipient ids
+        mock_send.assert_called_once()
+        response = json.loads(res[0].text)
+        recipient = response["results"][0]
+        assert recipient["children"]["type"] == "award"
+        assert "can not be drilled into" in recipient["children"]["error"]
+        assert "children" not in response["results"][1]
+
+    @pytest.mark.asyncio
+    @freeze_time("2026-01-30")
+    @patch("utils.http.MAX_RESPONSE_BYTES", 400)
+    @patch("utils.http.client.send")
+    async def test_drill_down_truncated_root(self, mock_send):
+        def node_response(request, **kwargs):
+            payload = json.loads(request.content)
+            results = [
+                {"code": str(amount), "id": amount, "name": "x" * 40, "amount": amount}
+                for amount in range(20, 0, -1)
+            ]
+            if payload["type"] == "federal_account":
+                results = results[:1]
+            return Response(status_code=200, json={"results": results, "total": 210})
+
+        mock_send.side_effect = node_response
+        res = await call_tool_spending(
+            {"type": "agency", "filters": {"fy": "2025"}, "depth": 1, "top_n": 2}
+        )
+        # The complete rows of the root are still drilled into
+        assert mock_send.call_count == 3
+        response = json.loads(res[0].text)
+        assert response["truncated"]["rows_returned"] < 20
+        assert [row["amount"] for row in response["results"]] == [20, 19]
+        assert response["results"][0]["children"]["results"][0]["amount"] == 20
+
 
 class TestSubawards(Validation):
     arguments = {}
@@ -309,3 +1066,104 @@ class TestSubawards(Validation):
         res = await call_tool_subawards(self.arguments)
         mock_send.assert_called_once()
         self.validate_text_content(res, text="{}")
+
+    @staticmethod
+    def subaward_page(request, **kwargs):
+        payload = json.loads(request.content)
+        if payload["award_id"] == "BAD":
+            return Response(status_code=422, text="bad", request=Request(method="POST", url="/"))
+        page = payload["page"]
+        # Page 2 repeats the last subaward of page 1, as if a subaward was added in between
+        ids = {1: [1, 2], 2: [2, 3]}[page]
+        return Response(
+            status_code=200,
+            json={
+                "results": [
+                    {"id": subaward_id, "amount": subaward_id, "award": payload["award_id"]}
+                    for subaward_id in ids
+                ],
+                "page_metadata": {"page": page, "hasNext": page < 2},
+            },
+        )
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_bulk_all_pages(self, mock_send):
+        mock_send.side_effect = self.subaward_page
+        res = await call_tool_subawards(
+            {
+                "page": 1,
+                "sort": "amount",
+                "order": "desc",
+                "award_ids": ["A", "B", "A", "BAD"],
+                "all_pages": True,
+                "select": ["results.id"],
+            }
+        )
+        # A and B have two pages each, BAD fails on its first page
+        assert mock_send.call_count == 5
+        awards = json.loads(res[0].text)["awards"]
+        assert [award["award_id"] for award in awards] == ["A", "B", "BAD"]
+        assert awards[0] == {
+            "award_id": "A",
+            "pages_fetched": 2,
+            "complete": True,
+            "results": [{"id": 1}, {"id": 2}, {"id": 3}],
+        }
+        assert "non 2xx" in awards[2]["error"]
+        assert awards[2]["results"] == []
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_bulk_one_page(self, mock_send):
+        mock_send.side_effect = self.subaward_page
+        res = await call_tool_subawards(
+            {"page": 1, "sort": "amount", "order": "desc", "award_ids": ["A"]}
+        )
+        mock_send.assert_called_once()
+        award = json.loads(res[0].text)["awards"][0]
+        assert award["pages_fetched"] == 1
+        assert award["complete"] is False
+        assert [row["id"] for row in award["results"]] == [1, 2]
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_bulk_page_defaults_to_first(self, mock_send):
+        mock_send.side_effect = self.subaward_page
+        await call_tool_subawards({"sort": "amount", "order": "desc", "award_ids": ["A"]})
+        assert json.loads(mock_send.call_args.args[0].content)["page"] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("max_pages", ["many", None, 0])
+    async def test_bulk_invalid_max_pages(self, max_pages):
+        with pytest.raises(McpError) as err:
+            await call_tool_subawards(
+                {
+                    "sort": "amount",
+                    "order": "desc",
+                    "award_ids": ["A"],
+                    "all_pages": True,
+                    "max_pages": max_pages,
+                }
+            )
+        assert err.value.error.code == INVALID_PARAMS
+        assert "max_pages must be a whole number of 1 or more" in err.value.error.message
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_bulk_rows_without_id_kept(self, mock_send):
+        mock_send.return_value = Response(
+            status_code=200,
+            json={
+                "results": [
+                    {"id": None, "subaward_number": None, "amount": 1},
+                    {"id": None, "subaward_number": None, "amount": 2},
+                    {"id": None, "subaward_number": "S1", "amount": 3},
+                    {"id": None, "subaward_number": "S1", "amount": 3},
+                ],
+                "page_metadata": {"page": 1, "hasNext": False},
+            },
+        )
+        res = await call_tool_subawards({"sort": "amount", "order": "desc", "award_ids": ["A"]})
+        award = json.loads(res[0].text)["awards"][0]
+        assert [row["amount"] for row in award["results"]] == [1, 2, 3]
@@ -0,0 +1,107 @@
+# Unit tests for salvaging responses cut off at the byte cap
+
+import json
+from unittest.mock import patch
+
+import pytest
+from httpx import Response
+from mcp.shared.exceptions import McpError
+
+from utils.http import HttpClient
+from utils.reshape import get_transform
+from utils.truncate import decode_prefix, salvage
+
+rows = [{"Award ID": f"A{i}", "Award Amount": 10.0 * i, "internal_id": i} for i in range(20)]
+body = {"limit": 20, "results": rows, "page_metadata": {"page": 1, "hasNext": True}}
+content = json.dumps(body).encode()
+
+
+class TestDecodePrefix:
+    def test_complete_body(self):
+        assert decode_prefix(content.decode()) == (body, False)
+
+    def test_cut_in_the_middle_of_a_row(self):
+        text = content.decode()
+        cut = text.index('"A5"') + 2
+        decoded, truncated = decode_prefix(text[:cut])
+        assert truncated is True
+        assert decoded == {"limit": 20, "results": rows[:5]}
+
+    def test_cut_number_is_dropped(self):
+        decoded, truncated = decode_prefix('{"limit": 10')
+        assert decoded == {}
+        assert truncated is True
+
+    def test_not_an_object(self):
+        assert decode_prefix("[1, 2") == ({}, True)
+
+    def test_results_is_not_a_list(self):
+        decoded, truncated = decode_prefix('{"results": {"x": 1}, "y": 2}')
+        assert decoded == {"results": {"x": 1}, "y": 2}
+        assert truncated is False
+
+
+class TestSalvage:
+    def test_every_byte_offset_is_valid(self):
+        for max_bytes in range(0, len(content) + 1, 7):
+            salvaged = salvage(content, max_bytes)
+            kept = salvaged.get("results", [])
+            assert kept == rows[: len(kept)]
+            assert salvaged["truncated"]["rows_returned"] == len(kept)
+
+    def test_summary(self):
+        salvaged = salvage(content, len(content) // 2)
+        kept = salvaged["results"]
+        summary = salvaged["truncated"]
+        # Amounts are totaled, ids are not
+        assert summary["totals"] == {"Award Amount": sum(row["Award Amount"] for row in kept)}
+        assert f"limit={len(kept)}" in summary["hint"]
+
+    def test_no_complete_rows(self):
+        salvaged = salvage(content, 30)
+        assert "results" not in salvaged or salvaged["results"] == []
+        assert "smaller limit" in salvaged["truncated"]["hint"]
+
+
+class TestResponseByteCap:
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_under_the_cap(self, mock_send):
+        mock_send.return_value = Response(status_code=200, content=content)
+        get_client = HttpClient(method="POST", endpoint="/", max_bytes=len(content))
+        res = await get_client.send()
+        assert json.loads(res[0].text) == body
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_over_the_cap(self, mock_send):
+        mock_send.return_value = Response(status_code=200, content=content)
+        get_client = HttpClient(method="POST", endpoint="/", max_bytes=len(content) // 2)
+        res = await get_client.send()
+        result = json.loads(res[0].text)
+        assert 0 < len(result["results"]) < len(rows)
+        assert result["truncated"]["max_bytes"] == len(content) // 2
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_over_the_cap_with_transform(self, mock_send):
+        mock_send.return_value = Response(status_code=200, content=content)
+        get_client = HttpClient(
+            method="POST",
+            endpoint="/",
+            max_bytes=len(content) // 2,
+            transform=get_transform("columnar", ["results.Award ID"]),
+        )
+        res = await get_client.send()
+        result = json.loads(res[0].text)
+        assert result["results"]["columns"] == ["Award ID"]
+        assert result["truncated"]["rows_returned"] == len(result["results"]["rows"])
+
+    @pytest.mark.asyncio
+    @patch("utils.http.client.send")
+    async def test_send_json_over_the_cap(self, mock_send):
+        mock_send.return_value = Response(status_code=200, content=content)
+        get_client = HttpClient(method="POST", endpoint="/", max_bytes=100)
+        with pytest.raises(McpError) as err:
+            await get_client.send_json()
+        assert "larger than 100 bytes" in str(err.value)